@@ -0,0 +1,43 @@
+import argparse
+import sys
+from typing import List
+
+from contrib.utils import logger
+from benchmarks.suite import Regression, compare, load_report, run_suite, save_report
+from benchmarks.workloads import WORKLOADS
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Seeded performance benchmarks')
+    parser.add_argument(
+        '--workloads', nargs='+', choices=list(WORKLOADS), default=list(WORKLOADS), help='Workloads to run',
+    )
+    parser.add_argument('--steps', type=int, default=200, help='Measured steps of every workload')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of every workload')
+    parser.add_argument('--output', type=str, default='benchmark_results.json', help='Where to save the results')
+    parser.add_argument('--baseline', type=str, default=None, help='Results to compare with')
+    parser.add_argument(
+        '--tolerance', type=float, default=0.1, help='Relative change of a metric that is reported as regression',
+    )
+    args = parser.parse_args()
+
+    report: dict = run_suite([WORKLOADS[name] for name in args.workloads], steps=args.steps, seed=args.seed)
+    save_report(report, args.output)
+    for name, result in report['results'].items():
+        logger.info(
+            f"{name}: {result['steps_per_second']:.1f} steps/sec, p50 {result['latency_p50_ms']:.2f}ms, "
+            f"p99 {result['latency_p99_ms']:.2f}ms, peak memory {result['peak_memory_mb']:.1f}MB"
+        )
+
+    if args.baseline:
+        regressions: List[Regression] = compare(report, load_report(args.baseline), tolerance=args.tolerance)
+        for regression in regressions:
+            logger.warning(f'Regression {regression}')
+        if regressions:
+            return 1
+        logger.info('No regressions against baseline')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,130 @@
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from benchmarks.workloads import PreparedWorkload, Workload
+
+# Metric -> True when a bigger value is better
+METRICS: Dict[str, bool] = {
+    'steps_per_second': True,
+    'latency_p50_ms': False,
+    'latency_p90_ms': False,
+    'latency_p99_ms': False,
+    'peak_memory_mb': False,
+}
+
+
+@dataclass(frozen=True)
+class BenchmarkResult:
+    workload: str
+    steps: int
+    seconds: float
+    steps_per_second: float
+    latency_p50_ms: float
+    latency_p90_ms: float
+    latency_p99_ms: float
+    peak_memory_mb: float
+
+
+@dataclass(frozen=True)
+class Regression:
+    workload: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        return (self.current - self.baseline) / self.baseline if self.baseline else 0.0
+
+    def __str__(self) -> str:
+        return f'{self.workload}.{self.metric}: {self.baseline:.3f} -> {self.current:.3f} ({self.change:+.1%})'
+
+
+def run_workload(workload: Workload, steps: int, seed: int, warmup: int = 5) -> BenchmarkResult:
+    """ Timing pass and memory pass are separate, tracemalloc would slow the timed steps down. Both passes start from
+    the same seed so they replay the same scenario. A scenario whose entities all died ends early """
+
+    prepared: PreparedWorkload = workload.build(seed)
+    for _ in range(warmup):
+        prepared.step()
+
+    latencies: List[float] = []
+    started_at: float = time.perf_counter()
+    for _ in range(steps):
+        step_started_at: float = time.perf_counter()
+        prepared.step()
+        latencies.append(time.perf_counter() - step_started_at)
+        if prepared.environment.game_over:
+            break
+    seconds: float = time.perf_counter() - started_at
+
+    tracemalloc.start()
+    try:
+        prepared = workload.build(seed)
+        for _ in range(warmup + len(latencies)):
+            prepared.step()
+            if prepared.environment.game_over:
+                break
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    latencies_ms: np.ndarray = np.array(latencies) * 1000
+    return BenchmarkResult(
+        workload=workload.name,
+        steps=len(latencies),
+        seconds=seconds,
+        steps_per_second=len(latencies) / seconds if seconds > 0 else 0.0,
+        latency_p50_ms=float(np.percentile(latencies_ms, 50)),
+        latency_p90_ms=float(np.percentile(latencies_ms, 90)),
+        latency_p99_ms=float(np.percentile(latencies_ms, 99)),
+        peak_memory_mb=peak / 2 ** 20,
+    )
+
+
+def run_suite(workloads: Iterable[Workload], steps: int, seed: int) -> dict:
+    return {
+        'meta': {
+            'seed': seed,
+            'steps': steps,
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': {workload.name: asdict(run_workload(workload, steps=steps, seed=seed)) for workload in workloads},
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float = 0.1) -> List[Regression]:
+    """ Metrics that got worse than baseline by more than tolerance, workloads missing in the baseline are skipped """
+
+    regressions: List[Regression] = []
+    for name, result in report['results'].items():
+        baseline_result: Optional[dict] = baseline['results'].get(name)
+        if baseline_result is None:
+            continue
+        for metric, bigger_is_better in METRICS.items():
+            current, previous = result[metric], baseline_result[metric]
+            worse: bool = (
+                current < previous * (1 - tolerance) if bigger_is_better else current > previous * (1 + tolerance)
+            )
+            if worse:
+                regressions.append(Regression(workload=name, metric=metric, baseline=previous, current=current))
+    return regressions
+
+
+def save_report(report: dict, path: str) -> None:
+    with open(path, 'w') as file:
+        json.dump(report, file, indent=2)
+
+
+def load_report(path: str) -> dict:
+    with open(path) as file:
+        return json.load(file)
@@ -0,0 +1,198 @@
+import os
+import random
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from domain.entities import Herbivore, Predator
+from domain.environment import Environment
+from domain.grid import ArrayGrid
+from domain.interfaces.entities import AliveEntity, BirthSetup
+from domain.interfaces.objects import Movement, ObservationRange
+from domain.service import HerbivoreFoodSustainConstantService, HerbivoreSustainConstantService
+from evolution.brain import RandomBrain, TrainedBrainHerbivoreOneCells100000
+from evolution.tabular import get_tabular_brain
+from evolution.training import HerbivoreTrainer
+
+
+def seed_everything(seed: int) -> None:
+    """ Environments take the seed themselves, this covers the code that still draws from the global generators """
+
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+@dataclass(frozen=True)
+class PreparedWorkload:
+    """ Built scenario, `step` performs exactly one measured step of it """
+
+    environment: Environment
+    step: Callable[[], None]
+
+
+@dataclass(frozen=True)
+class Workload:
+    """ Canonical seeded benchmark scenario """
+
+    name: str
+    description: str
+    build: Callable[[int], PreparedWorkload]
+
+
+def _populated_environment_step(
+        width: int,
+        height: int,
+        entities: List[AliveEntity],
+        sustain_services: list,
+        seed: int,
+        array_grid: bool = False,
+) -> PreparedWorkload:
+    environment = Environment(
+        window_width=width,
+        window_height=height,
+        sustain_services=sustain_services,
+        grid_class=ArrayGrid if array_grid else None,
+        seed=seed,
+    )
+    environment.setup_initial_state(entities=entities)
+
+    def step() -> None:
+        environment.step_living_regime()
+
+    return PreparedWorkload(environment=environment, step=step)
+
+
+def _herbivores(amount: int, health: int, brain_factory: Callable = RandomBrain) -> List[AliveEntity]:
+    return [
+        Herbivore(
+            name=f'Herbivore#{i}',
+            health=health,
+            brain=brain_factory(),
+            birth_config=BirthSetup(decrease_health_after_birth=50, health_after_birth=50, birth_after=health * 2),
+        )
+        for i in range(amount)
+    ]
+
+
+def build_dense_herbivores(seed: int) -> PreparedWorkload:
+    seed_everything(seed)
+    return _populated_environment_step(
+        width=100,
+        height=100,
+        entities=_herbivores(amount=2500, health=1000),
+        sustain_services=[HerbivoreFoodSustainConstantService(required_amount_of_herb_food=2500, food_nutrition=5)],
+        seed=seed,
+    )
+
+
+def build_predator_heavy(seed: int) -> PreparedWorkload:
+    seed_everything(seed)
+    predators: List[AliveEntity] = [
+        Predator(name=f'Predator#{i}', health=1000, brain=RandomBrain(), birth_config=None) for i in range(1000)
+    ]
+    return _populated_environment_step(
+        width=100,
+        height=100,
+        entities=predators,
+        sustain_services=[
+            HerbivoreSustainConstantService(required_amount_of_herbivores=1500, initial_herbivore_health=50),
+        ],
+        seed=seed,
+    )
+
+
+def build_sparse_large(seed: int) -> PreparedWorkload:
+    seed_everything(seed)
+    return _populated_environment_step(
+        width=500,
+        height=500,
+        entities=_herbivores(amount=500, health=1000),
+        sustain_services=[HerbivoreFoodSustainConstantService(required_amount_of_herb_food=5000, food_nutrition=5)],
+        seed=seed,
+        array_grid=True,
+    )
+
+
+def build_trained_herbivores(seed: int) -> PreparedWorkload:
+    seed_everything(seed)
+    return _populated_environment_step(
+        width=50,
+        height=50,
+        entities=_herbivores(amount=300, health=1000, brain_factory=TrainedBrainHerbivoreOneCells100000),
+        sustain_services=[HerbivoreFoodSustainConstantService(required_amount_of_herb_food=250, food_nutrition=5)],
+        seed=seed,
+    )
+
+
+def build_tabular_herbivores(seed: int) -> PreparedWorkload:
+    """ trained_herbivores with the model distilled into an action table """
+
+    seed_everything(seed)
+    brain = get_tabular_brain('PPO_model_Herbivore_100000_20x20_food60_3_one_cells')
+    return _populated_environment_step(
+        width=50,
+        height=50,
+        entities=_herbivores(amount=300, health=1000, brain_factory=brain.get_copy),
+        sustain_services=[HerbivoreFoodSustainConstantService(required_amount_of_herb_food=250, food_nutrition=5)],
+        seed=seed,
+    )
+
+
+def build_trainer_steps(seed: int) -> PreparedWorkload:
+    """ Gym loop of EntityTrainer as stable_baselines3 sees it: step with a random action, reset when done """
+
+    seed_everything(seed)
+    trainer = HerbivoreTrainer(
+        movement_class=Movement,
+        environment=Environment(
+            window_width=20,
+            window_height=20,
+            sustain_services=[HerbivoreFoodSustainConstantService(required_amount_of_herb_food=40, food_nutrition=3)],
+            seed=seed,
+        ),
+        max_live_training_length=3000,
+        health_after_birth=20,
+        observation_range=ObservationRange.ONE_CELL_AROUND,
+    )
+    actions = np.random.default_rng(seed)
+    trainer.reset()
+
+    def step() -> None:
+        _, _, done, _ = trainer.step(int(actions.integers(len(Movement))))
+        if done:
+            trainer.reset()
+
+    return PreparedWorkload(environment=trainer.environment, step=step)
+
+
+def build_render(seed: int) -> PreparedWorkload:
+    """ Drawing of the dense grid without the frame rate limit of Visualizer.render_step """
+
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    from visualization.visualize import Visualizer
+
+    dense_herbivores: PreparedWorkload = build_dense_herbivores(seed)
+    visualizer = Visualizer(dense_herbivores.environment)
+
+    def step() -> None:
+        dense_herbivores.step()
+        visualizer._create_blank_space()
+        visualizer._render(dense_herbivores.environment.matrix)
+
+    return PreparedWorkload(environment=dense_herbivores.environment, step=step)
+
+
+WORKLOADS: Dict[str, Workload] = {
+    workload.name: workload
+    for workload in (
+        Workload('dense_herbivores', '100x100, 2500 random herbivores, 2500 food', build_dense_herbivores),
+        Workload('predator_heavy', '100x100, 1000 random predators, 1500 sustained herbivores', build_predator_heavy),
+        Workload('sparse_500x500', '500x500 array grid, 500 random herbivores, 5000 food', build_sparse_large),
+        Workload('trained_herbivores', '50x50, 300 herbivores sharing one trained model', build_trained_herbivores),
+        Workload('tabular_herbivores', 'trained_herbivores with the one cell model as action table',
+                 build_tabular_herbivores),
+        Workload('trainer_steps', 'HerbivoreTrainer step/reset loop on 20x20', build_trainer_steps),
+        Workload('render', 'dense_herbivores plus drawing every cycle', build_render),
+    )
+}
@@ -1,4 +1,5 @@
 import logging
+import multiprocessing
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -10,3 +11,10 @@ formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
 handler.setFormatter(formatter)
 
 logger.addHandler(handler)
+
+
+def process_context() -> multiprocessing.context.BaseContext:
+    """ Context of the worker processes. Workers are started by a fork server, forking a process that already runs
+    torch threads may deadlock """
+
+    return multiprocessing.get_context('forkserver')
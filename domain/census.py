@@ -0,0 +1,62 @@
+from collections import defaultdict
+from typing import Any, Dict, Iterable
+
+from domain.grid import cell_type_of
+from domain.interfaces.entities import AliveEntity
+from domain.interfaces.objects import CellType
+
+
+class PopulationCensus:
+    """ Per species counts and health totals of the environment objects, kept up to date on every spawn, birth, meal
+    and death so that reading them is O(1). Species are identified by their CellType code """
+
+    def __init__(self):
+        self.counts: Dict[int, int] = defaultdict(int)
+        self.health: Dict[int, int] = defaultdict(int)
+
+    @classmethod
+    def from_objects(cls, objects: Iterable[Any]) -> 'PopulationCensus':
+        census = cls()
+        for obj in objects:
+            census.add(obj)
+        return census
+
+    def copy(self) -> 'PopulationCensus':
+        census = PopulationCensus()
+        census.counts.update(self.counts)
+        census.health.update(self.health)
+        return census
+
+    def add(self, obj: Any) -> None:
+        """ Object appeared in the environment """
+
+        cell_type: int = cell_type_of(obj)
+        if cell_type in (CellType.EMPTY, CellType.WALL):
+            return
+        self.counts[cell_type] += 1
+        if isinstance(obj, AliveEntity):
+            self.health[cell_type] += obj.health
+
+    def remove(self, obj: Any) -> None:
+        """ Object left the environment: eaten, died or erased """
+
+        cell_type: int = cell_type_of(obj)
+        if cell_type in (CellType.EMPTY, CellType.WALL):
+            return
+        self.counts[cell_type] -= 1
+        if isinstance(obj, AliveEntity):
+            self.health[cell_type] -= obj.health
+
+    def change_health(self, entity: AliveEntity, delta: int) -> None:
+        """ Health of an entity that lives in the environment was changed by delta """
+
+        self.health[cell_type_of(entity)] += delta
+
+    def count(self, cell_type: int) -> int:
+        return self.counts[cell_type]
+
+    def set_count(self, cell_type: int, amount: int) -> None:
+        self.counts[cell_type] = amount
+
+    def total_health(self, cell_type: int) -> int:
+        return self.health[cell_type]
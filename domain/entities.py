@@ -3,8 +3,9 @@ from typing import List
 import numpy as np
 
 from contrib.utils import logger
+from domain.grid import cell_types_of, register_cell_type
 from domain.interfaces.entities import AliveEntity
-
+from domain.interfaces.objects import CellType
 from domain.interfaces.setup import HerbivoreFood
 
 
@@ -22,6 +23,7 @@ class Herbivore(AliveEntity):
 
     def eat(self, food: HerbivoreFood) -> None:
         self.health += food.nutrition
+        self.meals += 1
         logger.debug(f'{self.name} ate! New health: {self.health}')
 
 
@@ -33,46 +35,41 @@ class Predator(AliveEntity):
 
     def eat(self, food: Herbivore) -> None:
         self.health += food.health
+        self.meals += 1
         logger.debug(f'{self.name} ate {food.name}! New health: {self.health}')
 
 
 class HerbivoreMatrixConverter:
+    """ Herbivore sees empty cells as 1, walls and other herbivores as 0, food as 2 and predators as 3 """
 
-    @staticmethod
-    def from_environment_to_stable_baseline(matrix: List[List]) -> np.ndarray:
-        result = []
+    # Indexed by CellType code, codes of unknown species are seen as 0
+    lookup_table: np.ndarray = np.zeros(256, dtype=np.uint8)
+    lookup_table[[CellType.EMPTY, CellType.FOOD, CellType.PREDATOR]] = [1, 2, 3]
 
-        for row in matrix:
-            new_row = []
-            for element in row:
-                if element == 0:
-                    new_row.append(1)
-                elif element is None or isinstance(element, Herbivore):
-                    new_row.append(0)
-                elif isinstance(element, HerbivoreFood):
-                    new_row.append(2)
-                elif isinstance(element, Predator):
-                    new_row.append(3)
-            result.append(new_row)
+    @classmethod
+    def from_cell_types(cls, cell_types: np.ndarray) -> np.ndarray:
+        return cls.lookup_table.take(cell_types)
 
-        return np.array(result).ravel()
+    @classmethod
+    def from_environment_to_stable_baseline(cls, matrix: List[List]) -> np.ndarray:
+        return cls.from_cell_types(cell_types_of(matrix)).ravel()
 
 
 class PredatorMatrixConverter:
+    """ Predator sees empty cells as 1, herbivores as 2 and everything else as 0 """
+
+    # Indexed by CellType code, codes of unknown species are seen as 0
+    lookup_table: np.ndarray = np.zeros(256, dtype=np.uint8)
+    lookup_table[[CellType.EMPTY, CellType.HERBIVORE]] = [1, 2]
+
+    @classmethod
+    def from_cell_types(cls, cell_types: np.ndarray) -> np.ndarray:
+        return cls.lookup_table.take(cell_types)
+
+    @classmethod
+    def from_environment_to_stable_baseline(cls, matrix: List[List]) -> np.ndarray:
+        return cls.from_cell_types(cell_types_of(matrix)).ravel()
+
 
-    @staticmethod
-    def from_environment_to_stable_baseline(matrix: List[List]) -> np.ndarray:
-        result = []
-
-        for row in matrix:
-            new_row = []
-            for element in row:
-                if element == 0:
-                    new_row.append(1)
-                elif element is None or isinstance(element, Predator) or isinstance(element, HerbivoreFood):
-                    new_row.append(0)
-                elif isinstance(element, Herbivore):
-                    new_row.append(2)
-            result.append(new_row)
-
-        return np.array(result).ravel()
+register_cell_type(Herbivore, CellType.HERBIVORE)
+register_cell_type(Predator, CellType.PREDATOR)
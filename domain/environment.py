@@ -1,39 +1,137 @@
-import random
+import pathlib
+from collections import defaultdict
 from copy import copy
-from typing import Optional, List, Any, Tuple
+from dataclasses import dataclass
+from typing import Optional, List, Any, Tuple, Dict, Hashable, Set, Callable, Iterable, Type, Union
 
-from domain.entities import Predator, Herbivore
+import numpy as np
+
+from domain.census import PopulationCensus
 from domain.exceptions import (
     NotVacantPlaceException,
     UnsupportedMovement,
     ObjectNotExistsInEnvironment,
     SetupEnvironmentError,
 )
+from domain.grid import (
+    MatrixView,
+    FreeCellIndex,
+    OBSERVATION_RADIUS,
+    cell_type_of,
+    cell_types_of,
+)
 from domain.interfaces.entities import AliveEntity
-from domain.interfaces.environment import EnvironmentInterface
-from domain.interfaces.setup import HerbivoreFood
-from domain.interfaces.objects import Coordinates, ObservationRange, Movement
+from domain.interfaces.environment import EnvironmentInterface, SustainEnvironmentService
+from domain.interfaces.grid import Grid
+from domain.interfaces.objects import Coordinates, ObservationRange, Movement, CellType
+from domain.replay import KEYFRAME_INTERVAL, ReplayRecorder
+from domain.rules import DEFAULT_INTERACTION_RULES, MOVEMENT_DELTAS, Interaction, InteractionRules
 from contrib.utils import logger
 
 
+@dataclass(frozen=True)
+class EnvironmentSnapshot:
+    """ Frozen copy of the environment state. Either matrix rows or a grid are stored, depending on the storage that
+    the environment uses """
+
+    cycle: int
+    matrix: Optional[List[List]]
+    grid: Optional[Grid]
+    alive_entities_coords: Dict[AliveEntity, Coordinates]
+    free_cells: FreeCellIndex
+    census: PopulationCensus
+
+
 class Environment(EnvironmentInterface):
     """ EnvironmentInterface realization """
 
+    # Set by start_recording
+    replay_recorder: Optional[ReplayRecorder] = None
+
+    def __init__(
+            self,
+            window_width: int,
+            window_height: int,
+            sustain_services: List[SustainEnvironmentService],
+            grid_class: Optional[Type[Grid]] = None,
+            batch_decisions: bool = True,
+            seed: Optional[int] = None,
+            rules: Optional[InteractionRules] = None,
+    ):
+        """ What happens when an entity moves into a cell is looked up in the rules, see InteractionRules. Every
+        environment gets its own copy of the default rules, so allowing an interaction in one leaks nowhere else """
+
+        self.rules: InteractionRules = rules if rules is not None else DEFAULT_INTERACTION_RULES.copy()
+        super().__init__(
+            window_width=window_width,
+            window_height=window_height,
+            sustain_services=sustain_services,
+            grid_class=grid_class,
+            batch_decisions=batch_decisions,
+            seed=seed,
+        )
+
+    @property
+    def matrix(self) -> List[List]:
+        return self._matrix
+
+    @matrix.setter
+    def matrix(self, matrix: List[List]) -> None:
+        """ Whenever the whole matrix is replaced, the index of free cells is rebuilt from it. Single cells are
+        expected to be changed through the environment methods that keep the index up to date. In grid mode a plain
+        list of lists is copied into a new grid, so the grid never goes stale behind the matrix """
+
+        if self.grid_class is not None and not isinstance(matrix, MatrixView):
+            self.grid = self.grid_class(len(matrix[0]) if len(matrix) else 0, len(matrix))
+            for y, row in enumerate(matrix):
+                for x, obj in enumerate(row):
+                    self.grid.set(y, x, obj)
+            matrix = MatrixView(self.grid)  # noqa
+        self._matrix = matrix
+        if isinstance(matrix, MatrixView):
+            self.free_cells: FreeCellIndex = self.grid.free_cell_index()
+            self.census: PopulationCensus = PopulationCensus.from_objects(self.grid.iter_objects())
+        else:
+            self.free_cells: FreeCellIndex = FreeCellIndex.from_matrix(matrix)
+            self.census: PopulationCensus = PopulationCensus.from_objects(
+                element for row in matrix for element in row
+            )
+
     @property
     def has_space_left(self) -> bool:
-        for row in self.matrix:
-            for place in row:
-                if place == 0:
-                    return True
-        return False
+        return len(self.free_cells) > 0
 
     @property
     def herbivores_amount(self) -> int:
-        return len([herbivore for herbivore in self.alive_entities_coords if isinstance(herbivore, Herbivore)])
+        return self.census.count(CellType.HERBIVORE)
 
     @property
     def predators_amount(self) -> int:
-        return len([predator for predator in self.alive_entities_coords if isinstance(predator, Predator)])
+        return self.census.count(CellType.PREDATOR)
+
+    @property
+    def herbivore_food_amount(self) -> int:
+        return self.census.count(CellType.FOOD)
+
+    @herbivore_food_amount.setter
+    def herbivore_food_amount(self, amount: int) -> None:
+        self.census.set_count(CellType.FOOD, amount)
+
+    @property
+    def herbivores_health(self) -> int:
+        return self.census.total_health(CellType.HERBIVORE)
+
+    @property
+    def predators_health(self) -> int:
+        return self.census.total_health(CellType.PREDATOR)
+
+    @property
+    def cell_types(self) -> np.ndarray:
+        """ CellType codes of the whole matrix, computed from the objects when no grid is used """
+
+        if self.grid is not None:
+            return self.grid.cell_types()
+        return cell_types_of(self.matrix)
 
     @property
     def game_over(self) -> bool:
@@ -42,35 +140,120 @@ class Environment(EnvironmentInterface):
     def increment_cycle(self):
         self.cycle += 1
 
-    def increment_food_amount(self):
-        self.herbivore_food_amount += 1
-
-    def decrease_food_amount(self):
-        self.herbivore_food_amount -= 1
-
     def setup_initial_state(self, entities: List[AliveEntity]) -> None:
-        self.matrix = self._create_blank_matrix()
+        with self.rng.activated():
+            self.matrix = self._create_blank_matrix()
 
-        if len(entities) < 1:
-            raise SetupEnvironmentError("No herbivores were provided")
+            if len(entities) < 1:
+                raise SetupEnvironmentError("No herbivores were provided")
 
-        for entity in entities:
-            self.set_object_randomly_in_environment(entity)
+            for entity in entities:
+                self.set_object_randomly_in_environment(entity)
 
-        for sustain_service in self.sustain_services:
-            sustain_service.initial_sustain(self)
+            for sustain_service in self.sustain_services:
+                sustain_service.initial_sustain(self)
 
     def set_object_randomly_in_environment(self, obj: Any) -> None:
-        if not self.has_space_left:
-            raise SetupEnvironmentError('No space left in environment')
-
-        in_process = True
+        while True:
+            if not self.has_space_left:
+                raise SetupEnvironmentError('No space left in environment')
 
-        while in_process:
-            random_coordinates: Coordinates = self._get_random_coordinates()
+            random_coordinates: Coordinates = self.free_cells.random(self.rng.placement)
             if self._is_empty_coordinates(random_coordinates):
                 self._respawn_object(random_coordinates, obj)
-                in_process = False
+                return
+
+            # The cell was filled bypassing the environment methods, the index is healed on the fly
+            self.free_cells.discard(random_coordinates)
+
+    def snapshot(self, exclude: Iterable[AliveEntity] = ()) -> EnvironmentSnapshot:
+        """ Copy of the current state, excluded entities are left out as if their cells were empty """
+
+        grid: Optional[Grid] = self.grid.copy() if self.grid is not None else None
+        snapshot = EnvironmentSnapshot(
+            cycle=self.cycle,
+            matrix=None if grid is not None else [row[:] for row in self.matrix],
+            grid=grid,
+            alive_entities_coords={},
+            free_cells=grid.free_cell_index(self.free_cells) if grid is not None else self.free_cells.copy(),
+            census=self.census.copy(),
+        )
+        excluded: Set[AliveEntity] = set(exclude)
+        for entity, where in self.alive_entities_coords.items():
+            obj: Any = 0 if entity in excluded else self._clone_entity(entity)
+            if snapshot.grid is not None:
+                snapshot.grid.set(where.y, where.x, obj)
+            else:
+                snapshot.matrix[where.y][where.x] = obj
+            if entity in excluded:
+                snapshot.free_cells.add(where)
+                snapshot.census.remove(entity)
+            else:
+                snapshot.alive_entities_coords[obj] = where
+        return snapshot
+
+    def restore(self, snapshot: EnvironmentSnapshot) -> None:
+        """ Bring the state of the snapshot back by copying its buffers. Alive entities are mutable, so they are
+        restored as fresh copies and the snapshot can be restored again. Brains of the replaced entities are released
+        like the ones of dead entities """
+
+        for entity in self.alive_entities_coords:
+            entity.brain.release()
+        self.cycle = snapshot.cycle
+        if snapshot.grid is not None:
+            self.grid = snapshot.grid.copy()
+            matrix: List[List] = MatrixView(self.grid)  # noqa
+        else:
+            matrix = [row[:] for row in snapshot.matrix]
+
+        self.alive_entities_coords = {}
+        for entity, where in snapshot.alive_entities_coords.items():
+            clone: AliveEntity = self._clone_entity(entity)
+            if snapshot.grid is not None:
+                self.grid.set(where.y, where.x, clone)
+            else:
+                matrix[where.y][where.x] = clone
+            self.alive_entities_coords[clone] = where
+
+        # Setter of the matrix would rebuild the index and the census, copies of the snapshot ones are used instead
+        self._matrix = matrix
+        self.free_cells = (
+            self.grid.free_cell_index(snapshot.free_cells) if snapshot.grid is not None else snapshot.free_cells.copy()
+        )
+        self.census = snapshot.census.copy()
+
+    @staticmethod
+    def _clone_entity(entity: AliveEntity) -> AliveEntity:
+        clone: AliveEntity = copy(entity)
+        clone.brain = entity.brain.get_copy()
+        return clone
+
+    def flip(self, horizontal: bool, vertical: bool) -> None:
+        """ Mirror the whole state, walls are symmetric so any layout stays valid """
+
+        def mirrored(x: int, y: int) -> Coordinates:
+            return Coordinates(self.width - 1 - x if horizontal else x, self.height - 1 - y if vertical else y)
+
+        cycle: int = self.cycle
+        alive_entities_coords: Dict[AliveEntity, Coordinates] = self.alive_entities_coords
+        objects: List[Tuple[Coordinates, Any]] = [
+            (mirrored(x, y), obj)
+            for y, row in enumerate(self.matrix)
+            for x, obj in enumerate(row)
+            if cell_type_of(obj) not in (CellType.EMPTY, CellType.WALL)
+        ]
+
+        matrix: List[List] = self._create_blank_matrix()
+        for where, obj in objects:
+            matrix[where.y][where.x] = obj
+        self.alive_entities_coords = {
+            entity: mirrored(where.x, where.y) for entity, where in alive_entities_coords.items()
+        }
+        self.matrix = matrix
+        self.cycle = cycle
+
+    def remove_entity(self, entity: AliveEntity) -> None:
+        self._erase_object(obj=entity, where=self._get_object_coordinates(entity))
 
     def get_living_object_observation(self, living_obj: AliveEntity) -> List[List]:
         observation_range: ObservationRange = living_obj.get_observation_range()
@@ -80,87 +263,173 @@ class Environment(EnvironmentInterface):
             else self._get_observation_two_cells_around(self.alive_entities_coords[living_obj])
         )
 
-    def step_living_regime(self) -> Tuple[List[List], bool]:
+    def get_living_objects_observations(
+            self, observation_range: ObservationRange, entities: Optional[List[AliveEntity]] = None,
+    ) -> np.ndarray:
+        """ Cell type codes around every given alive entity (all alive entities by default) in one call, a row of
+        k * k codes per entity """
+
+        if entities is None:
+            entities = list(self.alive_entities_coords)
+        coordinates: List[Coordinates] = [self._get_object_coordinates(entity) for entity in entities]
+        radius: int = OBSERVATION_RADIUS[observation_range]
+
+        if self.grid is not None:
+            ys = np.fromiter((where.y for where in coordinates), dtype=np.intp, count=len(coordinates))
+            xs = np.fromiter((where.x for where in coordinates), dtype=np.intp, count=len(coordinates))
+            return self.grid.observation_windows(ys, xs, radius)
+
+        # The object matrix has no cell type codes to slide over, so only the observed cells are encoded
+        size: int = (2 * radius + 1) ** 2
+        observe: Callable[[Coordinates], List[List]] = (
+            self._get_observation_one_cell_around if observation_range == ObservationRange.ONE_CELL_AROUND
+            else self._get_observation_two_cells_around
+        )
+        observations: np.ndarray = np.empty((len(coordinates), size), dtype=np.uint8)
+        for row, where in enumerate(coordinates):
+            observations[row] = cell_types_of(observe(where)).ravel()
+        return observations
+
+    def step_living_regime(self, decisions: Optional[Dict[AliveEntity, int]] = None) -> Tuple[List[List], bool]:
         self.increment_cycle()
-        next_state: List[List] = self._get_next_state()
-        self._erase_dead_entities()
-        for sustain_service in self.sustain_services:
-            sustain_service.subsequent_sustain(self)
+        with self.rng.activated():
+            if self.batch_decisions:
+                decisions = {**self._decide_movements(), **(decisions or {})}
+            next_state: List[List] = self._get_next_state(decisions)
+            self._erase_dead_entities()
+            for sustain_service in self.sustain_services:
+                sustain_service.subsequent_sustain(self)
+        if self.replay_recorder is not None:
+            self.replay_recorder.record(self)
         return next_state, self.game_over
 
-    def _get_next_state(self) -> List[List]:
-        do_not_move: List[AliveEntity] = []
+    def start_recording(self, path: Union[str, pathlib.Path], keyframe_interval: int = KEYFRAME_INTERVAL) -> None:
+        """ Record the current state and every following cycle into a replay file, see ReplayRecorder """
+
+        self.stop_recording()
+        self.replay_recorder = ReplayRecorder(path, self.width, self.height, keyframe_interval)
+        self.replay_recorder.record(self)
+
+    def stop_recording(self) -> None:
+        if self.replay_recorder is not None:
+            self.replay_recorder.close()
+            self.replay_recorder = None
+
+    def _decide_movements(self) -> Dict[AliveEntity, int]:
+        """ Decision phase of a cycle: entities whose brains share a policy are predicted in one batch. Brains without
+        a batch key are asked one by one while movements are resolved """
+
+        groups: Dict[Hashable, List[AliveEntity]] = defaultdict(list)
+        for entity in self.alive_entities_coords:
+            batch_key: Optional[Hashable] = entity.brain.batch_key()
+            if batch_key is not None:
+                groups[(batch_key, type(entity.matrix_converted), entity.get_observation_range())].append(entity)
+
+        decisions: Dict[AliveEntity, int] = {}
+        for (_, _, observation_range), entities in groups.items():
+            cell_types: np.ndarray = self.get_living_objects_observations(observation_range, entities)
+            observations: np.ndarray = entities[0].matrix_converted.from_cell_types(cell_types)
+            actions: np.ndarray = entities[0].brain.predict_batch(observations)
+            decisions.update(zip(entities, actions))
+        return decisions
+
+    def _get_next_state(self, decisions: Optional[Dict[AliveEntity, int]] = None) -> List[List]:
+        do_not_move: Set[AliveEntity] = set()
+        rules: List[List[int]] = self.rules.table
+        # Blocked moves leave everything as it is, the others get the target cell built once
+        interaction_handlers: Tuple[Optional[Callable], ...] = (
+            None, self._interact_move, self._interact_eat_food, self._interact_eat_prey,
+        )
 
         for entity in copy(self.alive_entities_coords):
 
             if entity in do_not_move:
                 continue
 
-            observation: List[List] = self.get_living_object_observation(entity)
             from_ = self._get_object_coordinates(entity)
-            entity_movement: Movement = entity.get_move(observation=observation)
-            desired_coordinates: Coordinates = self._movements_to_coordinates(
-                movement=entity_movement,
-                from_=from_,
-            )
-
-            if self.matrix[desired_coordinates.y][desired_coordinates.x] == 0:
-                self._change_coordinates_of_alive_object(entity, desired_coordinates, from_=from_)
-
-            if isinstance(entity, Herbivore) and isinstance(
-                    self.matrix[desired_coordinates.y][desired_coordinates.x], HerbivoreFood
-            ):
-                herbivore_food = self.matrix[desired_coordinates.y][desired_coordinates.x]
-                entity.eat(herbivore_food)
-                self._change_coordinates_of_alive_object(entity, desired_coordinates, from_=from_)
-                self.decrease_food_amount()
-
-            if isinstance(entity, Predator) and isinstance(
-                    self.matrix[desired_coordinates.y][desired_coordinates.x], Herbivore
-            ):
-                herbivore = self.matrix[desired_coordinates.y][desired_coordinates.x]
-                entity.eat(herbivore)
-                herbivore.was_eaten()
-                self._erase_object(obj=herbivore, where=self._get_object_coordinates(herbivore))
-                self._change_coordinates_of_alive_object(entity, desired_coordinates, from_=from_)
-                do_not_move.append(herbivore)
-                logger.info(f'{entity} eats {herbivore}')
+            health_before: int = entity.health
+            if decisions and entity in decisions:
+                entity_movement: Movement = entity.make_move(decisions[entity])
+            else:
+                observation: List[List] = self.get_living_object_observation(entity)
+                entity_movement: Movement = entity.get_move(observation=observation)
+
+            try:
+                delta_x, delta_y = MOVEMENT_DELTAS[entity_movement]
+            except KeyError:
+                raise UnsupportedMovement(f'This movement is not supported: {entity_movement}')
+            x, y = from_.x + delta_x, from_.y + delta_y
+            interaction: int = rules[cell_type_of(entity)][self._cell_type_at(x, y)]
+            if interaction != Interaction.BLOCKED:
+                interaction_handlers[interaction](entity, from_, Coordinates(x, y), do_not_move)
 
             if child := entity.give_birth():
                 self._set_obj_near(near=self._get_object_coordinates(entity), obj=child)
-                do_not_move.append(child)
+                do_not_move.add(child)
 
-            do_not_move.append(entity)
+            self.census.change_health(entity, entity.health - health_before)
+            do_not_move.add(entity)
 
         return self.matrix
 
+    def _cell_type_at(self, x: int, y: int) -> int:
+        if self.grid is not None:
+            return int(self.grid.cell_type(y, x))
+        return cell_type_of(self.matrix[y][x])
+
+    def _object_at(self, x: int, y: int) -> Any:
+        if self.grid is not None:
+            return self.grid.get(y, x)
+        return self.matrix[y][x]
+
+    def _interact_move(self, entity: AliveEntity, from_: Coordinates, to: Coordinates, do_not_move: Set) -> None:
+        self._change_coordinates_of_alive_object(entity, to, from_=from_)
+
+    def _interact_eat_food(self, entity: AliveEntity, from_: Coordinates, to: Coordinates, do_not_move: Set) -> None:
+        food = self._object_at(to.x, to.y)
+        entity.eat(food)
+        self._change_coordinates_of_alive_object(entity, to, from_=from_)
+        self.census.remove(food)
+
+    def _interact_eat_prey(self, entity: AliveEntity, from_: Coordinates, to: Coordinates, do_not_move: Set) -> None:
+        prey: AliveEntity = self._object_at(to.x, to.y)
+        entity.eat(prey)
+        prey.was_eaten()
+        self._erase_object(obj=prey, where=to)
+        self._change_coordinates_of_alive_object(entity, to, from_=from_)
+        do_not_move.add(prey)
+        logger.info(f'{entity} eats {prey}')
+
     def _create_blank_matrix(self) -> List[List]:
-        self.herbivore_food_amount = 0
         self.alive_entities_coords = {}
         self.cycle = 0
+        if self.grid_class is not None:
+            self.grid = self.grid_class(self.width, self.height)
+            return MatrixView(self.grid)  # noqa
         return [
-            [0 if i not in (0, self.width - 1) and j not in (0, self.height - 1) else None for j in range(self.height)]
-            for i in range(self.width)
+            [0 if i not in (0, self.height - 1) and j not in (0, self.width - 1) else None for j in range(self.width)]
+            for i in range(self.height)
         ]
 
     def _is_empty_coordinates(self, where: Coordinates) -> bool:
+        if self.grid is not None:
+            return self.grid.cell_type(where.y, where.x) == CellType.EMPTY
         return True if self.matrix[where.y][where.x] == 0 else False
 
     def _respawn_object(self, where: Coordinates, obj: Any) -> None:
-        if self.matrix[where.y][where.x] == 0:
-            self.matrix[where.y][where.x] = obj
+        if self._object_at(where.x, where.y) == 0:
+            if self.grid is not None:
+                self.grid.set(where.y, where.x, obj)
+            else:
+                self.matrix[where.y][where.x] = obj
+            self.free_cells.discard(where)
+            self.census.add(obj)
             if isinstance(obj, AliveEntity):
                 self._change_coordinates_of_alive_object(obj, where)
             logger.debug(f'Object {obj} was respawned at {where}')
         else:
             raise NotVacantPlaceException('Desired position != 0')
 
-    def _get_random_coordinates(self) -> Coordinates:
-        return Coordinates(
-            random.randint(1, self.width) - 1,
-            random.randint(1, self.height) - 1,
-        )
-
     def _get_observation_one_cell_around(self, point_of_observation: Coordinates) -> List[List]:
         return [
             row[point_of_observation.x - 1:point_of_observation.x + 2]
@@ -187,9 +456,18 @@ class Environment(EnvironmentInterface):
             self, entity: AliveEntity, new_coordinates: Coordinates, from_: Optional[Coordinates] = None
     ) -> None:
         self.alive_entities_coords[entity] = new_coordinates
-        self.matrix[new_coordinates.y][new_coordinates.x] = entity
+        # Grid is written directly, row views of the matrix would be allocated for every move
+        if self.grid is not None:
+            self.grid.set(new_coordinates.y, new_coordinates.x, entity)
+            if from_:
+                self.grid.set(from_.y, from_.x, 0)
+        else:
+            self.matrix[new_coordinates.y][new_coordinates.x] = entity
+            if from_:
+                self.matrix[from_.y][from_.x] = 0
+        self.free_cells.discard(new_coordinates)
         if from_:
-            self.matrix[from_.y][from_.x] = 0
+            self.free_cells.add(from_)
 
     def _set_obj_near(self, near: Coordinates, obj: Any) -> None:
         coordinates_around: List[Coordinates] = [
@@ -205,12 +483,18 @@ class Environment(EnvironmentInterface):
         logger.warning('Cannot respawn near to the parent, respawning randomly')
 
     def _erase_object(self, obj: AliveEntity, where: Coordinates) -> None:
-        self.matrix[where.y][where.x] = 0
+        if self.grid is not None:
+            self.grid.set(where.y, where.x, 0)
+        else:
+            self.matrix[where.y][where.x] = 0
+        self.free_cells.add(where)
+        self.census.remove(obj)
         if isinstance(obj, AliveEntity):
             if obj in self.alive_entities_coords:
                 del self.alive_entities_coords[obj]
             else:
                 raise ObjectNotExistsInEnvironment(f'Error while deleting object: {obj}, where: {where}')
+            obj.brain.release()
 
     def _erase_dead_entities(self):
         dead_entities: List[AliveEntity] = [
@@ -218,28 +502,3 @@ class Environment(EnvironmentInterface):
         ]
         for entity in dead_entities:
             self._erase_object(obj=entity, where=self._get_object_coordinates(entity))
-
-    @staticmethod
-    def _movements_to_coordinates(movement: Movement, from_: Coordinates) -> Coordinates:
-        if movement == Movement.STAY:
-            return Coordinates(from_.x, from_.y)
-        elif movement == Movement.UP:
-            desired_coordinates = Coordinates(from_.x, from_.y - 1)
-        elif movement == Movement.DOWN:
-            desired_coordinates = Coordinates(from_.x, from_.y + 1)
-        elif movement == Movement.LEFT:
-            desired_coordinates = Coordinates(from_.x - 1, from_.y)
-        elif movement == Movement.RIGHT:
-            desired_coordinates = Coordinates(from_.x + 1, from_.y)
-        elif movement == Movement.UP_LEFT:
-            desired_coordinates = Coordinates(from_.x - 1, from_.y - 1)
-        elif movement == Movement.UP_RIGHT:
-            desired_coordinates = Coordinates(from_.x + 1, from_.y - 1)
-        elif movement == Movement.DOWN_LEFT:
-            desired_coordinates = Coordinates(from_.x - 1, from_.y + 1)
-        elif movement == Movement.DOWN_RIGHT:
-            desired_coordinates = Coordinates(from_.x + 1, from_.y + 1)
-        else:
-            raise UnsupportedMovement(f'This movement is not supported: {movement}')
-
-        return desired_coordinates
@@ -24,3 +24,15 @@ class InvalidEntityState(Exception):
 
 class UnknownObservationSpace(Exception):
     """ Invalid/unknown observation range for given brain """
+
+
+class UnsupportedPolicy(Exception):
+    """ Policy architecture cannot be exported """
+
+
+class ShardWorkerError(EnvironmentException):
+    """ Worker process of a sharded environment failed """
+
+
+class SweepWorkerError(Exception):
+    """ Worker process of a parameter sweep died before it could take any run """
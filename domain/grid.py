@@ -0,0 +1,482 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type, Union
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from domain.interfaces.grid import Grid
+from domain.interfaces.objects import CellType, ObservationRange, Coordinates
+from domain.interfaces.setup import HerbivoreFood
+from domain.rng import RandomStream, active_random
+
+OBSERVATION_RADIUS: Dict[ObservationRange, int] = {
+    ObservationRange.ONE_CELL_AROUND: 1,
+    ObservationRange.TWO_CELL_AROUND: 2,
+}
+
+# Width of the wall frame around padded cell arrays, enough for the widest observation
+PADDING: int = max(OBSERVATION_RADIUS.values())
+
+# Plain int codes for the per cell hot paths, member lookup of the enum is slow
+EMPTY_CELL: int = int(CellType.EMPTY)
+WALL_CELL: int = int(CellType.WALL)
+
+# Species register themselves next to their class definition, see domain.entities
+_CELL_TYPES_BY_CLASS: Dict[Type, int] = {
+    HerbivoreFood: CellType.FOOD,
+}
+
+
+def register_cell_type(object_class: Type, cell_type: int) -> None:
+    """ Teach grids how to encode objects of a new class (new species, new food) """
+
+    _CELL_TYPES_BY_CLASS[object_class] = cell_type
+
+
+def cell_type_of(obj: Any) -> int:
+    """ CellType code of an object from the matrix. Unknown non empty objects are treated as walls """
+
+    cell_type = _CELL_TYPES_BY_CLASS.get(type(obj))
+    if cell_type is not None:
+        return cell_type
+    if obj is None:
+        return CellType.WALL
+    if isinstance(obj, int) and obj == 0:
+        return CellType.EMPTY
+
+    for base in type(obj).__mro__[1:]:
+        if base in _CELL_TYPES_BY_CLASS:
+            _CELL_TYPES_BY_CLASS[type(obj)] = _CELL_TYPES_BY_CLASS[base]
+            return _CELL_TYPES_BY_CLASS[base]
+    return CellType.WALL
+
+
+def cell_types_of(matrix: List[List]) -> np.ndarray:
+    """ CellType codes of a list of lists matrix of objects """
+
+    return np.array([[cell_type_of(element) for element in row] for row in matrix], dtype=np.uint8)
+
+
+def gather_windows(padded_cell_types: np.ndarray, ys: np.ndarray, xs: np.ndarray, radius: int) -> np.ndarray:
+    """ Flattened (2 * radius + 1) squares of a padded cell type array centered at the given cells """
+
+    size: int = 2 * radius + 1
+    windows: np.ndarray = sliding_window_view(padded_cell_types, (size, size))
+    offset: int = PADDING - radius
+    return windows[ys + offset, xs + offset].reshape(len(ys), size * size)
+
+
+class ArrayGrid(Grid):
+    """ Grid backed by numpy arrays: uint8 cell type codes and a parallel int32 array of object ids """
+
+    def __init__(self, width: int, height: int):
+        super().__init__(width, height)
+        # Cells are a view into the wall padded array, so observations never need bounds checks or copies
+        self.padded_cells: np.ndarray = np.full(
+            (height + 2 * PADDING, width + 2 * PADDING), CellType.WALL, dtype=np.uint8,
+        )
+        self.cells: np.ndarray = self.padded_cells[PADDING:PADDING + height, PADDING:PADDING + width]
+        self.cells[1:-1, 1:-1] = CellType.EMPTY
+        self.object_ids: np.ndarray = np.zeros((height, width), dtype=np.int32)
+
+        # Id 0 is reserved for cells without an object
+        self.objects: Dict[int, Any] = {}
+        self._ids: Dict[int, int] = {}
+        self._positions: Dict[int, Tuple[int, int]] = {}
+        self._next_id: int = 1
+
+    def get(self, y: int, x: int) -> Any:
+        object_id = self.object_ids[y, x]
+        if object_id:
+            return self.objects[object_id]
+        return 0 if self.cells[y, x] == CellType.EMPTY else None
+
+    def set(self, y: int, x: int, obj: Any) -> None:
+        self._release(y, x)
+        cell_type: int = cell_type_of(obj)
+        self.cells[y, x] = cell_type
+        if cell_type in (CellType.EMPTY, CellType.WALL):
+            return
+
+        object_id = self._ids.get(id(obj))
+        if object_id is None:
+            object_id = self._next_id
+            self._next_id += 1
+            self._ids[id(obj)] = object_id
+            self.objects[object_id] = obj
+        self.object_ids[y, x] = object_id
+        self._positions[object_id] = (y, x)
+
+    def cell_type(self, y: int, x: int) -> int:
+        return self.cells[y, x]
+
+    def copy(self) -> 'ArrayGrid':
+        grid = ArrayGrid.__new__(ArrayGrid)
+        grid.width, grid.height = self.width, self.height
+        grid.padded_cells = self.padded_cells.copy()
+        grid.cells = grid.padded_cells[PADDING:PADDING + self.height, PADDING:PADDING + self.width]
+        grid.object_ids = self.object_ids.copy()
+        grid.objects = dict(self.objects)
+        grid._ids = dict(self._ids)
+        grid._positions = dict(self._positions)
+        grid._next_id = self._next_id
+        return grid
+
+    def iter_objects(self) -> Iterator[Any]:
+        return iter(self.objects.values())
+
+    def cell_types(self) -> np.ndarray:
+        return self.cells
+
+    def observation_windows(self, ys: np.ndarray, xs: np.ndarray, radius: int) -> np.ndarray:
+        return gather_windows(self.padded_cells, ys, xs, radius)
+
+    def free_cell_index(self, template: Optional['FreeCellIndex'] = None) -> 'FreeCellIndex':
+        return template.copy() if template is not None else FreeCellIndex.from_cell_types(self.cells)
+
+    def _release(self, y: int, x: int) -> None:
+        """ Forget the object at the cell unless it has already been moved to another cell """
+
+        object_id = int(self.object_ids[y, x])
+        if not object_id:
+            return
+        self.object_ids[y, x] = 0
+        if self._positions.get(object_id) == (y, x):
+            obj = self.objects.pop(object_id)
+            del self._ids[id(obj)]
+            del self._positions[object_id]
+
+
+class ChunkedGrid(Grid):
+    """ Sparse grid for big, mostly empty worlds. Cell type codes are kept in fixed size chunks that are allocated
+    when something is put into them and freed when they become empty, objects are kept in a dict by their cell.
+    Missing chunks read as empty, so memory follows the occupancy rather than the area """
+
+    CHUNK_SIZE: int = 64
+    # Pool of chunks is compacted when more than this fraction of it is unused, small pools are left as they are
+    MAX_UNUSED_FRACTION: float = 0.5
+    MIN_COMPACTED_POOL: int = 64
+
+    def __init__(self, width: int, height: int):
+        super().__init__(width, height)
+        size: int = self.CHUNK_SIZE
+        # Like ArrayGrid, coordinates are shifted by the wall padding, so observation windows never need bounds checks
+        self.chunk_slots: np.ndarray = np.zeros(
+            (-(-(height + 2 * PADDING) // size), -(-(width + 2 * PADDING) // size)), dtype=np.int32,
+        )
+        # Slot 0 is an empty chunk that every missing chunk points to, it is never written
+        self.pool: np.ndarray = np.zeros((1, size, size), dtype=np.uint8)
+        self.filled: List[int] = [0]
+        self.unused_slots: List[int] = []
+        self.objects: Dict[Tuple[int, int], Any] = {}
+        # Non empty cells inside the grid, border walls included
+        self.occupied: int = 0
+
+        padded_height, padded_width = height + 2 * PADDING, width + 2 * PADDING
+        frame: int = PADDING + 1
+        for y0, y1, x0, x1 in (
+                (0, frame, 0, padded_width),
+                (padded_height - frame, padded_height, 0, padded_width),
+                (frame, padded_height - frame, 0, frame),
+                (frame, padded_height - frame, padded_width - frame, padded_width),
+        ):
+            self._fill_walls(y0, y1, x0, x1)
+        self.occupied = 2 * (width + height) - 4
+
+    @property
+    def chunks(self) -> int:
+        """ Amount of allocated chunks """
+
+        return int(np.count_nonzero(self.chunk_slots))
+
+    def get(self, y: int, x: int) -> Any:
+        obj = self.objects.get((y, x))
+        if obj is not None:
+            return obj
+        return 0 if self.cell_type(y, x) == EMPTY_CELL else None
+
+    def set(self, y: int, x: int, obj: Any) -> None:
+        cell_type: int = cell_type_of(obj)
+        if cell_type == EMPTY_CELL or cell_type == WALL_CELL:
+            self.objects.pop((y, x), None)
+        else:
+            self.objects[(y, x)] = obj
+
+        chunk_y, cell_y = divmod(y + PADDING, self.CHUNK_SIZE)
+        chunk_x, cell_x = divmod(x + PADDING, self.CHUNK_SIZE)
+        slot: int = int(self.chunk_slots[chunk_y, chunk_x])
+        previous: int = int(self.pool[slot, cell_y, cell_x])
+        if previous == cell_type:
+            return
+        if not slot:
+            slot = self._allocate(chunk_y, chunk_x)
+        self.pool[slot, cell_y, cell_x] = cell_type
+
+        if previous == EMPTY_CELL:
+            self.filled[slot] += 1
+            self.occupied += 1
+        elif cell_type == EMPTY_CELL:
+            self.filled[slot] -= 1
+            self.occupied -= 1
+            if not self.filled[slot]:
+                self._free(chunk_y, chunk_x)
+
+    def cell_type(self, y: int, x: int) -> int:
+        chunk_y, cell_y = divmod(y + PADDING, self.CHUNK_SIZE)
+        chunk_x, cell_x = divmod(x + PADDING, self.CHUNK_SIZE)
+        return int(self.pool[self.chunk_slots[chunk_y, chunk_x], cell_y, cell_x])
+
+    def row_cell_types(self, y: int) -> np.ndarray:
+        chunk_y, cell_y = divmod(y + PADDING, self.CHUNK_SIZE)
+        padded: np.ndarray = self.pool[self.chunk_slots[chunk_y], cell_y].ravel()
+        return padded[PADDING:PADDING + self.width]
+
+    def copy(self) -> 'ChunkedGrid':
+        grid = ChunkedGrid.__new__(ChunkedGrid)
+        grid.width, grid.height = self.width, self.height
+        grid.chunk_slots = self.chunk_slots.copy()
+        grid.pool = self.pool.copy()
+        grid.filled = self.filled[:]
+        grid.unused_slots = self.unused_slots[:]
+        grid.objects = dict(self.objects)
+        grid.occupied = self.occupied
+        return grid
+
+    def iter_objects(self) -> Iterator[Any]:
+        return iter(self.objects.values())
+
+    def cell_types(self) -> np.ndarray:
+        """ Dense array is assembled on request, it takes the full area """
+
+        rows, columns = self.chunk_slots.shape
+        size: int = self.CHUNK_SIZE
+        padded: np.ndarray = self.pool[self.chunk_slots].transpose(0, 2, 1, 3).reshape(rows * size, columns * size)
+        return padded[PADDING:PADDING + self.height, PADDING:PADDING + self.width]
+
+    def observation_windows(self, ys: np.ndarray, xs: np.ndarray, radius: int) -> np.ndarray:
+        offsets: np.ndarray = np.arange(-radius, radius + 1)
+        window_ys: np.ndarray = (ys[:, None, None] + offsets[None, :, None] + PADDING).repeat(len(offsets), axis=2)
+        window_xs: np.ndarray = (xs[:, None, None] + offsets[None, None, :] + PADDING).repeat(len(offsets), axis=1)
+        size: int = self.CHUNK_SIZE
+        slots: np.ndarray = self.chunk_slots[window_ys // size, window_xs // size]
+        return self.pool[slots, window_ys % size, window_xs % size].reshape(len(ys), len(offsets) ** 2)
+
+    def free_cell_index(self, template: Optional['SampledFreeCells'] = None) -> 'SampledFreeCells':
+        return SampledFreeCells(self)
+
+    def _fill_walls(self, y0: int, y1: int, x0: int, x1: int) -> None:
+        """ Fill a rectangle of padded coordinates with walls chunk by chunk """
+
+        size: int = self.CHUNK_SIZE
+        for chunk_y in range(y0 // size, (y1 - 1) // size + 1):
+            for chunk_x in range(x0 // size, (x1 - 1) // size + 1):
+                slot: int = int(self.chunk_slots[chunk_y, chunk_x]) or self._allocate(chunk_y, chunk_x)
+                chunk: np.ndarray = self.pool[slot]
+                chunk[
+                    max(y0 - chunk_y * size, 0):min(y1 - chunk_y * size, size),
+                    max(x0 - chunk_x * size, 0):min(x1 - chunk_x * size, size),
+                ] = CellType.WALL
+                self.filled[slot] = int(np.count_nonzero(chunk))
+
+    def _allocate(self, chunk_y: int, chunk_x: int) -> int:
+        if self.unused_slots:
+            slot: int = self.unused_slots.pop()
+        else:
+            slot = len(self.filled)
+            if slot == len(self.pool):
+                self.pool = np.concatenate([self.pool, np.zeros_like(self.pool)])
+            self.filled.append(0)
+        self.chunk_slots[chunk_y, chunk_x] = slot
+        return slot
+
+    def _free(self, chunk_y: int, chunk_x: int) -> None:
+        """ Empty chunk is detached, its slot is reused by the next allocation. When most of the pool is unused,
+        the chunks in use are moved to the front and the pool shrinks """
+
+        self.unused_slots.append(int(self.chunk_slots[chunk_y, chunk_x]))
+        self.chunk_slots[chunk_y, chunk_x] = 0
+        pool_size: int = len(self.filled)
+        if pool_size > self.MIN_COMPACTED_POOL and len(self.unused_slots) > self.MAX_UNUSED_FRACTION * pool_size:
+            self._compact()
+
+    def _compact(self) -> None:
+        used: np.ndarray = np.flatnonzero(self.chunk_slots)
+        slots: np.ndarray = self.chunk_slots.ravel()[used]
+        self.pool = np.concatenate([self.pool[:1], self.pool[slots]])
+        self.filled = [0] + [self.filled[slot] for slot in slots]
+        self.chunk_slots.ravel()[used] = np.arange(1, len(used) + 1)
+        self.unused_slots = []
+
+
+class MatrixRowView:
+    """ One row of MatrixView """
+
+    def __init__(self, grid: Grid, y: int):
+        self.grid: Grid = grid
+        self.y: int = y
+
+    def __len__(self) -> int:
+        return self.grid.width
+
+    def __getitem__(self, x):
+        if isinstance(x, slice):
+            return [self.grid.get(self.y, i) for i in range(*x.indices(self.grid.width))]
+        if x < 0:
+            x += self.grid.width
+        if not 0 <= x < self.grid.width:
+            raise IndexError('Matrix row index out of range')
+        return self.grid.get(self.y, x)
+
+    def __setitem__(self, x: int, obj: Any) -> None:
+        if x < 0:
+            x += self.grid.width
+        if not 0 <= x < self.grid.width:
+            raise IndexError('Matrix row index out of range')
+        self.grid.set(self.y, x, obj)
+
+    def __iter__(self):
+        return (self.grid.get(self.y, x) for x in range(self.grid.width))
+
+    def __eq__(self, other):
+        return list(self) == other
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class MatrixView:
+    """ List of lists compatible view over a grid, keeps `matrix[y][x]` working for code that expects objects """
+
+    def __init__(self, grid: Grid):
+        self.grid: Grid = grid
+
+    def __len__(self) -> int:
+        return self.grid.height
+
+    def __getitem__(self, y):
+        if isinstance(y, slice):
+            return [MatrixRowView(self.grid, i) for i in range(*y.indices(self.grid.height))]
+        if y < 0:
+            y += self.grid.height
+        if not 0 <= y < self.grid.height:
+            raise IndexError('Matrix index out of range')
+        return MatrixRowView(self.grid, y)
+
+    def __iter__(self):
+        return (MatrixRowView(self.grid, y) for y in range(self.grid.height))
+
+    def __eq__(self, other):
+        return self.to_list() == other
+
+    def to_list(self) -> List[List]:
+        return [list(row) for row in self]
+
+    def __repr__(self):
+        return repr(self.to_list())
+
+
+class FreeCellIndex:
+    """ Set of empty cells with O(1) insert, remove and random pick. The first `len` cells of a packed array are the
+    free ones, a parallel array keeps the position of every cell in the packed one (-1 if the cell is not free) """
+
+    def __init__(self, width: int, height: int, free_cells: Union[np.ndarray, List[int]]):
+        self.width: int = width
+        cells: np.ndarray = np.asarray(free_cells, dtype=np.int32)
+        self._size: int = len(cells)
+        self._cells: np.ndarray = np.empty(width * height, dtype=np.int32)
+        self._cells[:self._size] = cells
+        self._positions: np.ndarray = np.full(width * height, -1, dtype=np.int32)
+        self._positions[cells] = np.arange(self._size, dtype=np.int32)
+
+    @classmethod
+    def from_matrix(cls, matrix: List[List]) -> 'FreeCellIndex':
+        width: int = len(matrix[0]) if len(matrix) else 0
+        return cls(
+            width=width,
+            height=len(matrix),
+            free_cells=[y * width + x for y, row in enumerate(matrix) for x, place in enumerate(row) if place == 0],
+        )
+
+    @classmethod
+    def from_cell_types(cls, cell_types: np.ndarray) -> 'FreeCellIndex':
+        height, width = cell_types.shape
+        return cls(width=width, height=height, free_cells=np.flatnonzero(cell_types == CellType.EMPTY))
+
+    def copy(self) -> 'FreeCellIndex':
+        free_cells = FreeCellIndex.__new__(FreeCellIndex)
+        free_cells.width = self.width
+        free_cells._size = self._size
+        free_cells._cells = self._cells.copy()
+        free_cells._positions = self._positions.copy()
+        return free_cells
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, where: Coordinates) -> bool:
+        return bool(self._positions[where.y * self.width + where.x] >= 0)
+
+    def add(self, where: Coordinates) -> None:
+        cell: int = where.y * self.width + where.x
+        if self._positions[cell] < 0:
+            self._positions[cell] = self._size
+            self._cells[self._size] = cell
+            self._size += 1
+
+    def discard(self, where: Coordinates) -> None:
+        cell: int = where.y * self.width + where.x
+        position: int = int(self._positions[cell])
+        if position < 0:
+            return
+        self._size -= 1
+        last_cell: int = int(self._cells[self._size])
+        if last_cell != cell:
+            self._cells[position] = last_cell
+            self._positions[last_cell] = position
+        self._positions[cell] = -1
+
+    def random(self, stream: Optional[RandomStream] = None) -> Coordinates:
+        """ Cells are drawn from the given stream, the placement stream of the active random service by default """
+
+        stream = stream or active_random().placement
+        cell: int = int(self._cells[stream.randrange(self._size)])
+        return Coordinates(cell % self.width, cell // self.width)
+
+
+class SampledFreeCells:
+    """ Free cells of a ChunkedGrid without an index: a random cell is drawn until an empty one is hit, which is
+    cheap while the grid is mostly empty. Cells are read from the grid, so add and discard have nothing to do.
+    Only rows [top, bottom) are sampled and counted, by default all but the border rows """
+
+    def __init__(self, grid: ChunkedGrid, top: int = 1, bottom: Optional[int] = None):
+        self.grid: ChunkedGrid = grid
+        self.top: int = top
+        self.bottom: int = grid.height - 1 if bottom is None else bottom
+
+    def copy(self) -> 'SampledFreeCells':
+        return SampledFreeCells(self.grid, self.top, self.bottom)
+
+    def __len__(self) -> int:
+        """ Occupied cells are only counted for the whole grid, the ones outside of the rows are subtracted """
+
+        outside: List[int] = [*range(self.top), *range(self.bottom, self.grid.height)]
+        occupied_outside: int = sum(
+            int(np.count_nonzero(self.grid.row_cell_types(y) != EMPTY_CELL)) for y in outside
+        )
+        return self.grid.width * (self.bottom - self.top) - (self.grid.occupied - occupied_outside)
+
+    def __contains__(self, where: Coordinates) -> bool:
+        return self.top <= where.y < self.bottom and self.grid.cell_type(where.y, where.x) == EMPTY_CELL
+
+    def add(self, where: Coordinates) -> None:
+        pass
+
+    def discard(self, where: Coordinates) -> None:
+        pass
+
+    def random(self, stream: Optional[RandomStream] = None) -> Coordinates:
+        stream = stream or active_random().placement
+        while True:
+            y: int = stream.randrange(self.top, self.bottom)
+            x: int = stream.randrange(1, self.grid.width - 1)
+            if self.grid.cell_type(y, x) == EMPTY_CELL:
+                return Coordinates(x, y)
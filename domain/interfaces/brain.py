@@ -1,4 +1,6 @@
-from typing import Protocol, Tuple
+from typing import Protocol, Tuple, Hashable, Optional
+
+import numpy as np
 
 from domain.interfaces.objects import ObservationRange
 
@@ -20,3 +22,15 @@ class Brain(Protocol):
 
     def required_observation_range(self) -> ObservationRange:
         pass
+
+    def batch_key(self) -> Optional[Hashable]:
+        """ Brains with the same key share a policy and are predicted together, None means predict one by one """
+        pass
+
+    def predict_batch(self, observations: np.ndarray) -> np.ndarray:
+        """ Actions for a stack of observations, one per row """
+        pass
+
+    def release(self) -> None:
+        """ Entity that owns the brain left the environment, drop whatever the brain holds exclusively """
+        pass
@@ -1,4 +1,3 @@
-import random
 import uuid
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
@@ -8,6 +7,7 @@ from contrib.utils import logger
 from domain.exceptions import InvalidEntityState
 from domain.interfaces.brain import Brain
 from domain.interfaces.objects import ObservationRange, Movement, MOVEMENT_MAPPER_ADJACENT
+from domain.rng import active_random
 
 
 @dataclass(frozen=True)
@@ -38,6 +38,8 @@ class AliveEntity(ABC):
         self.matrix_converted: MatrixConverter = None  # noqa
         self.uid = uuid.uuid4()
         self.eaten: bool = False
+        # Food eaten by herbivores, herbivores killed by predators
+        self.meals: int = 0
 
     @property
     def is_dead(self) -> bool:
@@ -77,7 +79,7 @@ class AliveEntity(ABC):
 
         if self.birth_config and self.health > self.birth_config.birth_after:
             child = self.__class__(
-                name=f'Child-{random.randint(1, 1000)}',
+                name=f'Child-{active_random().births.randint(1, 1000)}',
                 health=self.birth_config.health_after_birth,
                 brain=self.brain.get_copy(),
                 birth_config=self.birth_config,
@@ -88,10 +90,15 @@ class AliveEntity(ABC):
     def get_move(self, observation: List[List]) -> Movement:
         """ Return the next movement. Based on the environment observation """
 
-        self.decrease_health(1)
-        self.increase_lived_for()
         converted_observation = self.matrix_converted.from_environment_to_stable_baseline(observation)
         action_num, _ = self.brain.predict(converted_observation)
+        return self.make_move(action_num)
+
+    def make_move(self, action_num: int) -> Movement:
+        """ Spend a cycle of life on the action that was already decided by the brain """
+
+        self.decrease_health(1)
+        self.increase_lived_for()
         movement: Movement = MOVEMENT_MAPPER_ADJACENT[int(action_num)]
         logger.debug(f'{self} moves {movement} health {self.health}')
         return movement
@@ -1,22 +1,39 @@
 from abc import abstractmethod
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional, Type
+
+import numpy as np
 
 from domain.interfaces.entities import AliveEntity
-from domain.interfaces.objects import Coordinates
+from domain.interfaces.grid import Grid
+from domain.interfaces.objects import Coordinates, ObservationRange
+from domain.rng import RandomService
 
 
 class EnvironmentInterface:
     """ Environment that represent world around living objects and key rules. Core domain object """
 
     def __init__(
-            self, window_width: int, window_height: int, sustain_services: List['SustainEnvironmentService'],
+            self,
+            window_width: int,
+            window_height: int,
+            sustain_services: List['SustainEnvironmentService'],
+            grid_class: Optional[Type[Grid]] = None,
+            batch_decisions: bool = True,
+            seed: Optional[int] = None,
     ):
         """ Accept width and height of the environment (int), and services that are responsible for sustaining
-        environment in given shape """
+        environment in given shape. If grid class is given the cells are stored in that grid and the matrix is only a
+        compatibility view over it. With batch decisions brains that share a policy are asked for their moves once per
+        cycle before the movements are resolved. Randomness of the run is drawn from the streams of the seed """
 
         self.width: int = window_width
         self.height: int = window_height
         self.sustain_services: List[SustainEnvironmentService] = sustain_services
+        self.grid_class: Optional[Type[Grid]] = grid_class
+        self.grid: Optional[Grid] = None
+        self.batch_decisions: bool = batch_decisions
+        self.rng: RandomService = RandomService(seed)
+        self.rng.activate()
         self.matrix: List[List] = self._create_blank_matrix()
 
         # Place for storage abstraction
@@ -35,6 +52,16 @@ class EnvironmentInterface:
         """ Amount of predators left in the environment """
         pass
 
+    @abstractmethod
+    def herbivores_health(self) -> int:
+        """ Total health of herbivores left in the environment """
+        pass
+
+    @abstractmethod
+    def predators_health(self) -> int:
+        """ Total health of predators left in the environment """
+        pass
+
     @abstractmethod
     def setup_initial_state(self, entities: List[AliveEntity]) -> None:
         """ Set initial objects that start living right from the beginning """
@@ -51,9 +78,21 @@ class EnvironmentInterface:
         pass
 
     @abstractmethod
-    def step_living_regime(self) -> Tuple[List[List], bool]:
+    def get_living_objects_observations(
+            self, observation_range: ObservationRange, entities: Optional[List[AliveEntity]] = None,
+    ) -> np.ndarray:
+        """ Batched observation of many alive entities as a (n_entities, k * k) array of cell type codes """
+        pass
+
+    @abstractmethod
+    def remove_entity(self, entity: AliveEntity) -> None:
+        """ Take alive entity out of the environment before it died """
+        pass
+
+    @abstractmethod
+    def step_living_regime(self, decisions: Optional[Dict[AliveEntity, int]] = None) -> Tuple[List[List], bool]:
         """ Ask living objects about their next step and change environment state, return new state and boolean wither
-        game is finished """
+        game is finished. Actions of decisions are used as is for their entities instead of asking their brains """
         pass
 
     @abstractmethod
@@ -0,0 +1,56 @@
+from abc import ABC, abstractmethod
+from typing import Any, Iterator, Optional
+
+import numpy as np
+
+
+class Grid(ABC):
+    """ Storage of the environment cells. Keeps a compact cell type code for every cell and the object living there """
+
+    def __init__(self, width: int, height: int):
+        """ Accept width and height of the grid, border cells are walls """
+
+        self.width: int = width
+        self.height: int = height
+
+    @abstractmethod
+    def get(self, y: int, x: int) -> Any:
+        """ Object at the cell in the matrix notation: 0 for an empty cell, None for a wall """
+        pass
+
+    @abstractmethod
+    def set(self, y: int, x: int, obj: Any) -> None:
+        """ Put an object (or 0 / None) to the cell """
+        pass
+
+    @abstractmethod
+    def cell_type(self, y: int, x: int) -> int:
+        """ CellType code of the cell """
+        pass
+
+    @abstractmethod
+    def copy(self) -> 'Grid':
+        """ Independent grid with the same cells, objects themselves are not copied """
+        pass
+
+    @abstractmethod
+    def iter_objects(self) -> Iterator[Any]:
+        """ Every food and alive entity stored in the grid """
+        pass
+
+    @abstractmethod
+    def cell_types(self) -> np.ndarray:
+        """ Dense (height, width) array of CellType codes """
+        pass
+
+    @abstractmethod
+    def observation_windows(self, ys: np.ndarray, xs: np.ndarray, radius: int) -> np.ndarray:
+        """ Flattened cell type squares of the given radius around every (y, x) pair, cells beyond the grid are
+        walls """
+        pass
+
+    @abstractmethod
+    def free_cell_index(self, template: Optional[Any] = None) -> Any:
+        """ Index of the empty cells that the environment places objects into. Template is an index of the same
+        cells, e.g. of the grid this one was copied from, that can be copied instead of building a new one """
+        pass
@@ -36,3 +36,13 @@ MOVEMENT_MAPPER_ADJACENT = {
     7: Movement.DOWN_LEFT,
     8: Movement.LEFT,
 }
+
+
+class CellType(enum.IntEnum):
+    """ Compact code of what occupies a cell of the environment grid """
+
+    EMPTY = 0
+    WALL = 1
+    FOOD = 2
+    HERBIVORE = 3
+    PREDATOR = 4
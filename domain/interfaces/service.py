@@ -9,3 +9,7 @@ class MatrixConverter(Protocol):
     def from_environment_to_stable_baseline(self, matrix: List[List]) -> np.ndarray:
         """ From environment to numpy array """
         pass
+
+    def from_cell_types(self, cell_types: np.ndarray) -> np.ndarray:
+        """ From CellType codes of any shape (a single observation or a batch) to uint8 codes of the same shape """
+        pass
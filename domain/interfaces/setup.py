@@ -4,6 +4,7 @@ from typing import Optional, List, Type, Callable
 from domain.interfaces.brain import Brain
 from domain.interfaces.entities import BirthSetup, AliveEntity
 from domain.interfaces.environment import SustainEnvironmentService
+from domain.interfaces.grid import Grid
 
 
 @dataclass(frozen=True)
@@ -22,6 +23,7 @@ class TrainSetup:
     learn_frequency: int = 4  # Randomly after this number of steps
     learn_n_steps: int = 128  # Rollout capacity
     learn_timesteps: int = 1  # noqa
+    learning_workers: int = 0  # Processes that learn in background, 0 to learn inline in the simulation loop
 
 
 @dataclass(frozen=True)
@@ -39,3 +41,5 @@ class Setup:
     sustain_services:  List[SustainEnvironmentService]
     entities: List[EntitySetup]
     cycle_length: Optional[int] = None
+    grid_class: Optional[Type[Grid]] = None
+    seed: Optional[int] = None  # Seeds every random stream of the environment, None to seed from the OS entropy
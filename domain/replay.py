@@ -0,0 +1,157 @@
+import pathlib
+import struct
+import zlib
+from typing import BinaryIO, List, Optional, Tuple, Union
+
+import numpy as np
+
+from domain.interfaces.environment import EnvironmentInterface
+
+MAGIC: bytes = b'EVREPLAY'
+VERSION: int = 1
+# Magic, version, width and height of the world, keyframe interval
+FILE_HEADER = struct.Struct('<8sIIII')
+# Cycle, kind and compressed payload size of a frame
+FRAME_HEADER = struct.Struct('<IBI')
+
+KEYFRAME: int = 0
+DELTA: int = 1
+
+# Deltas are cheap to write and slow to seek through, a keyframe every this amount of frames bounds the seek
+KEYFRAME_INTERVAL: int = 100
+# Fast zlib level, frames are written inside the simulation loop
+COMPRESSION_LEVEL: int = 1
+
+
+def health_grid(environment: EnvironmentInterface) -> np.ndarray:
+    """ Health of the alive entities at their cells, 0 elsewhere """
+
+    health: np.ndarray = np.zeros((environment.height, environment.width), dtype=np.int32)
+    for entity, coordinates in environment.alive_entities_coords.items():
+        health[coordinates.y, coordinates.x] = entity.health
+    return health
+
+
+class ReplayRecorder:
+    """ Writes one frame per recorded cycle: the cell type codes and health of the world as a keyframe every keyframe
+    interval frames and as the changed cells against the previous frame in between, each frame zlib compressed. The
+    file is append only, so a replay of a run that crashed is readable up to the last complete frame """
+
+    def __init__(
+            self,
+            path: Union[str, pathlib.Path],
+            width: int,
+            height: int,
+            keyframe_interval: int = KEYFRAME_INTERVAL,
+    ):
+        self.path: pathlib.Path = pathlib.Path(path)
+        self.keyframe_interval: int = keyframe_interval
+        self.frames: int = 0
+        self.previous: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file: BinaryIO = open(self.path, 'wb')
+        self.file.write(FILE_HEADER.pack(MAGIC, VERSION, width, height, keyframe_interval))
+
+    def record(self, environment: EnvironmentInterface) -> None:
+        cell_types: np.ndarray = np.ascontiguousarray(environment.cell_types, dtype=np.uint8).ravel()
+        health: np.ndarray = health_grid(environment).ravel()
+
+        if self.previous is None or self.frames % self.keyframe_interval == 0:
+            kind, payload = KEYFRAME, cell_types.tobytes() + health.tobytes()
+        else:
+            previous_types, previous_health = self.previous
+            changed: np.ndarray = np.flatnonzero((cell_types != previous_types) | (health != previous_health))
+            kind = DELTA
+            payload = changed.astype(np.uint32).tobytes() + cell_types[changed].tobytes() + health[changed].tobytes()
+
+        compressed: bytes = zlib.compress(payload, COMPRESSION_LEVEL)
+        self.file.write(FRAME_HEADER.pack(environment.cycle, kind, len(compressed)))
+        self.file.write(compressed)
+        # Frames reach the file as they are recorded, a killed run keeps its replay
+        self.file.flush()
+        self.previous = (cell_types, health)
+        self.frames += 1
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> 'ReplayRecorder':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class Replay:
+    """ Memory mapped replay file. Frames are indexed once on open, a frame is decoded from the nearest keyframe at or
+    before it, moving forward frame by frame only applies the next delta """
+
+    def __init__(self, path: Union[str, pathlib.Path]):
+        self.path: pathlib.Path = pathlib.Path(path)
+        self.data: np.memmap = np.memmap(self.path, dtype=np.uint8, mode='r')
+        magic, version, self.width, self.height, self.keyframe_interval = FILE_HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{self.path} is not a replay of version {VERSION}')
+
+        cycles: List[int] = []
+        kinds: List[int] = []
+        offsets: List[int] = []
+        sizes: List[int] = []
+        offset: int = FILE_HEADER.size
+        while offset + FRAME_HEADER.size <= len(self.data):
+            cycle, kind, size = FRAME_HEADER.unpack_from(self.data, offset)
+            if offset + FRAME_HEADER.size + size > len(self.data):
+                # The last frame of a run that was killed while writing it
+                break
+            cycles.append(cycle)
+            kinds.append(kind)
+            offsets.append(offset + FRAME_HEADER.size)
+            sizes.append(size)
+            offset += FRAME_HEADER.size + size
+
+        self.cycles: np.ndarray = np.array(cycles, dtype=np.int64)
+        self.keyframes: np.ndarray = np.flatnonzero(np.array(kinds) == KEYFRAME)
+        self.offsets: List[int] = offsets
+        self.sizes: List[int] = sizes
+        self.position: int = -1
+        self.cell_types: Optional[np.ndarray] = None
+        self.health: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.cycles)
+
+    def index_of_cycle(self, cycle: int) -> int:
+        """ Last frame recorded at or before the cycle """
+
+        return max(int(np.searchsorted(self.cycles, cycle, side='right')) - 1, 0)
+
+    def frame(self, index: int) -> Tuple[np.ndarray, np.ndarray]:
+        """ Cell type codes and health of the frame, (height, width) arrays that are valid until the next call """
+
+        if not 0 <= index < len(self):
+            raise IndexError(f'Replay has {len(self)} frames, {index} requested')
+        keyframe: int = int(self.keyframes[np.searchsorted(self.keyframes, index, side='right') - 1])
+        if not keyframe <= self.position <= index:
+            self._decode_keyframe(keyframe)
+        for position in range(self.position + 1, index + 1):
+            self._apply_delta(position)
+        return self.cell_types.reshape(self.height, self.width), self.health.reshape(self.height, self.width)
+
+    def _payload(self, index: int) -> bytes:
+        return zlib.decompress(self.data[self.offsets[index]:self.offsets[index] + self.sizes[index]])
+
+    def _decode_keyframe(self, index: int) -> None:
+        payload: bytes = self._payload(index)
+        cells: int = self.width * self.height
+        self.cell_types = np.frombuffer(payload, dtype=np.uint8, count=cells).copy()
+        self.health = np.frombuffer(payload, dtype=np.int32, count=cells, offset=cells).copy()
+        self.position = index
+
+    def _apply_delta(self, index: int) -> None:
+        payload: bytes = self._payload(index)
+        changed: int = len(payload) // 9
+        indices: np.ndarray = np.frombuffer(payload, dtype=np.uint32, count=changed)
+        self.cell_types[indices] = np.frombuffer(payload, dtype=np.uint8, count=changed, offset=4 * changed)
+        self.health[indices] = np.frombuffer(payload, dtype=np.int32, count=changed, offset=5 * changed)
+        self.position = index
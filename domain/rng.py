@@ -0,0 +1,153 @@
+import zlib
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple, TypeVar, Union
+
+import numpy as np
+
+T = TypeVar('T')
+
+# Uniform numbers drawn from a generator at once, single values are then handed out from the block
+BLOCK_SIZE: int = 4096
+
+# Streams of the simulation subsystems
+PLACEMENT: str = 'placement'
+BRAINS: str = 'brains'
+BIRTHS: str = 'births'
+LEARNING: str = 'learning'
+TRAINING: str = 'training'
+# Seeds derived from the seed of a run for what keeps random state of its own
+TRAINER: str = 'trainer'
+TORCH: str = 'torch'
+SHARD: str = 'shard'
+
+
+def _child_sequence(entropy, name: str) -> np.random.SeedSequence:
+    return np.random.SeedSequence(entropy, spawn_key=(zlib.crc32(name.encode()),))
+
+
+def derived_seed(seed: Optional[int], name: str) -> Optional[int]:
+    """ Seed of the named part of a seeded run, like the environment of a trainer or torch. None stays None, the part
+    is seeded from the OS entropy then """
+
+    if seed is None:
+        return None
+    return int(_child_sequence(seed, name).generate_state(1)[0])
+
+
+class RandomStream:
+    """ Random numbers of one subsystem. Single values come from a block of uniforms pre-drawn from a NumPy Generator,
+    so a draw costs a list step instead of a generator call, arrays are drawn from the generator directly """
+
+    def __init__(self, generator: np.random.Generator, block_size: int = BLOCK_SIZE):
+        self.generator: np.random.Generator = generator
+        self.block_size: int = block_size
+        self._values = iter(())
+
+    def random(self) -> float:
+        """ Uniform float in [0, 1) """
+
+        value: Optional[float] = next(self._values, None)
+        if value is None:
+            self._values = iter(self.generator.random(self.block_size).tolist())
+            value = next(self._values)
+        return value
+
+    def randrange(self, start: int, stop: Optional[int] = None) -> int:
+        """ Integer in [start, stop), or in [0, start) if stop is not given, like random.randrange """
+
+        if stop is None:
+            start, stop = 0, start
+        return start + int(self.random() * (stop - start))
+
+    def randint(self, low: int, high: int) -> int:
+        """ Integer in [low, high], both ends included, like random.randint """
+
+        return self.randrange(low, high + 1)
+
+    def choice(self, sequence: Sequence[T]) -> T:
+        return sequence[self.randrange(len(sequence))]
+
+    def choices(self, weights: np.ndarray, size: int) -> np.ndarray:
+        """ Array of indices of the weights, each drawn with the probability proportional to its weight """
+
+        return self.generator.choice(len(weights), size=size, p=weights / weights.sum())
+
+    def integers(self, high: int, size: Union[int, Tuple[int, ...]]) -> np.ndarray:
+        """ Array of integers in [0, high) """
+
+        return self.generator.integers(high, size=size)
+
+    def uniform(self, size: Union[int, Tuple[int, ...]]) -> np.ndarray:
+        """ Array of floats in [0, 1) """
+
+        return self.generator.random(size)
+
+    def get_state(self) -> Dict[str, Any]:
+        """ State of the generator together with the values of the block that were not handed out yet """
+
+        values = list(self._values)
+        self._values = iter(values)
+        return {'bit_generator': self.generator.bit_generator.state, 'values': values}
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        self.generator.bit_generator.state = state['bit_generator']
+        self._values = iter(list(state['values']))
+
+
+class RandomService:
+    """ Independent random streams of the simulation subsystems derived from a single seed. Streams are told apart by
+    their names, so a stream does not change when another one is drawn from more or less often. Without a seed the
+    streams are seeded from the OS entropy """
+
+    def __init__(self, seed: Optional[int] = None, block_size: int = BLOCK_SIZE):
+        self.seed_sequence: np.random.SeedSequence = np.random.SeedSequence(seed)
+        self.block_size: int = block_size
+        self.streams: Dict[str, RandomStream] = {}
+        self.placement: RandomStream = self.stream(PLACEMENT)
+        self.brains: RandomStream = self.stream(BRAINS)
+        self.births: RandomStream = self.stream(BIRTHS)
+        self.learning: RandomStream = self.stream(LEARNING)
+        self.training: RandomStream = self.stream(TRAINING)
+
+    def stream(self, name: str) -> RandomStream:
+        if name not in self.streams:
+            child = _child_sequence(self.seed_sequence.entropy, name)
+            self.streams[name] = RandomStream(np.random.Generator(np.random.PCG64(child)), self.block_size)
+        return self.streams[name]
+
+    def get_state(self) -> Dict[str, Dict[str, Any]]:
+        """ States of every stream by name, set_state continues the streams from there """
+
+        return {name: stream.get_state() for name, stream in self.streams.items()}
+
+    def set_state(self, state: Dict[str, Dict[str, Any]]) -> None:
+        for name, stream_state in state.items():
+            self.stream(name).set_state(stream_state)
+
+    def activate(self) -> None:
+        """ Make the streams of this service the ones that brains and entities draw from """
+
+        global _active
+        _active = self
+
+    @contextmanager
+    def activated(self) -> Iterator['RandomService']:
+        """ Active for the block only, the service that was active before is brought back afterwards. An environment
+        stepped inside the step of another one, like the trainer of a learning brain, hands the streams back this way """
+
+        global _active
+        previous, _active = _active, self
+        try:
+            yield self
+        finally:
+            _active = previous
+
+
+_active: RandomService = RandomService()
+
+
+def active_random() -> RandomService:
+    """ Service of the environment that is being stepped, outside of the steps the one of the environment built last.
+    Brains and entities have no reference to the environment, they draw from it through here """
+
+    return _active
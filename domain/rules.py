@@ -0,0 +1,59 @@
+import enum
+from typing import Dict, List, Tuple
+
+from domain.interfaces.objects import CellType, Movement
+
+# (dx, dy) of every movement, y grows downwards
+MOVEMENT_DELTAS: Dict[Movement, Tuple[int, int]] = {
+    Movement.STAY: (0, 0),
+    Movement.UP: (0, -1),
+    Movement.DOWN: (0, 1),
+    Movement.LEFT: (-1, 0),
+    Movement.RIGHT: (1, 0),
+    Movement.UP_LEFT: (-1, -1),
+    Movement.UP_RIGHT: (1, -1),
+    Movement.DOWN_LEFT: (-1, 1),
+    Movement.DOWN_RIGHT: (1, 1),
+}
+
+
+class Interaction(enum.IntEnum):
+    """ What happens when an entity tries to move into a cell """
+
+    BLOCKED = 0
+    MOVE = 1
+    EAT_FOOD = 2
+    EAT_PREY = 3
+
+
+class InteractionRules:
+    """ Precompiled (mover cell type x target cell type) table of interactions. Everything that is not allowed
+    explicitly is blocked, new species and food types are added with `allow` without touching the movement loop """
+
+    def __init__(self):
+        self.table: List[List[int]] = []
+
+    def allow(self, mover: int, target: int, interaction: Interaction) -> 'InteractionRules':
+        size: int = max(mover, target, len(self.table) - 1) + 1
+        for row in self.table:
+            row.extend([Interaction.BLOCKED] * (size - len(row)))
+        self.table.extend([[Interaction.BLOCKED] * size for _ in range(size - len(self.table))])
+        self.table[mover][target] = interaction
+        return self
+
+    def copy(self) -> 'InteractionRules':
+        rules = InteractionRules()
+        rules.table = [row[:] for row in self.table]
+        return rules
+
+    def interaction(self, mover: int, target: int) -> int:
+        return self.table[mover][target]
+
+
+DEFAULT_INTERACTION_RULES: InteractionRules = (
+    InteractionRules()
+    .allow(CellType.HERBIVORE, CellType.EMPTY, Interaction.MOVE)
+    .allow(CellType.HERBIVORE, CellType.FOOD, Interaction.EAT_FOOD)
+    .allow(CellType.PREDATOR, CellType.EMPTY, Interaction.MOVE)
+    .allow(CellType.PREDATOR, CellType.HERBIVORE, Interaction.EAT_PREY)
+)
@@ -21,12 +21,10 @@ class HerbivoreFoodSustainEvery3CycleService(SustainEnvironmentService):
         diff_in_amount: int = self.initial_food_amount - current_amount
         for _ in range(diff_in_amount):
             environment.set_object_randomly_in_environment(HerbivoreFood(self.food_nutrition))
-            environment.increment_food_amount()
 
     def subsequent_sustain(self, environment: Environment):
         if environment.cycle % 3 == 0:
             environment.set_object_randomly_in_environment(HerbivoreFood(self.food_nutrition))
-            environment.increment_food_amount()
 
 
 class HerbivoreFoodSustainEveryCycleService(SustainEnvironmentService):
@@ -41,12 +39,10 @@ class HerbivoreFoodSustainEveryCycleService(SustainEnvironmentService):
         diff_in_amount: int = self.initial_food_amount - current_amount
         for _ in range(diff_in_amount):
             environment.set_object_randomly_in_environment(HerbivoreFood(self.food_nutrition))
-            environment.increment_food_amount()
 
     def subsequent_sustain(self, environment: Environment):
         if environment.cycle % 1 == 0:
             environment.set_object_randomly_in_environment(HerbivoreFood(self.food_nutrition))
-            environment.increment_food_amount()
 
 
 class HerbivoreFoodSustainConstantService(SustainEnvironmentService):
@@ -61,7 +57,6 @@ class HerbivoreFoodSustainConstantService(SustainEnvironmentService):
         diff_in_amount: int = self.required_amount_of_herb_food - current_amount
         for _ in range(diff_in_amount):
             environment.set_object_randomly_in_environment(HerbivoreFood(self.food_nutrition))
-            environment.increment_food_amount()
 
     def subsequent_sustain(self, environment: Environment) -> None:
         self.initial_sustain(environment)
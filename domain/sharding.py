@@ -0,0 +1,495 @@
+import multiprocessing
+import traceback
+from dataclasses import dataclass, field
+from multiprocessing.connection import Connection, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+import numpy as np
+
+from contrib.utils import process_context
+from domain.environment import Environment
+from domain.exceptions import SetupEnvironmentError, ShardWorkerError
+from domain.grid import PADDING, SampledFreeCells, cell_type_of, cell_types_of, register_cell_type
+from domain.interfaces.entities import AliveEntity
+from domain.interfaces.environment import SustainEnvironmentService
+from domain.interfaces.grid import Grid
+from domain.interfaces.objects import CellType, Coordinates
+from domain.rules import Interaction
+from domain.rng import SHARD, RandomService, derived_seed
+
+# Rows of the neighbour shards every shard keeps around its own rows, enough for the widest observation
+HALO: int = PADDING
+
+# Fraction of the world rows owned by a shard -> sustain services of the shard
+SustainServicesFactory = Callable[[float], List[SustainEnvironmentService]]
+
+
+def split_rows(height: int, shards: int) -> List[Tuple[int, int]]:
+    """ [top, bottom) rows of every horizontal strip, strips differ by at most one row """
+
+    if shards < 1 or height // shards < HALO:
+        raise SetupEnvironmentError(f'Cannot split {height} rows into {shards} strips of at least {HALO} rows')
+    edges: List[int] = [height * i // shards for i in range(shards + 1)]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+class HaloObject:
+    """ Stand-in for an object of a neighbour shard, only its cell type is known """
+
+
+_HALO_CLASSES: Dict[int, Type[HaloObject]] = {}
+
+
+def halo_object(cell_type: int) -> Any:
+    """ Matrix value that encodes as the given cell type """
+
+    if cell_type == CellType.EMPTY:
+        return 0
+    if cell_type == CellType.WALL:
+        return None
+    if cell_type not in _HALO_CLASSES:
+        _HALO_CLASSES[cell_type] = type(f'HaloObject{cell_type}', (HaloObject,), {})
+        register_cell_type(_HALO_CLASSES[cell_type], cell_type)
+    return _HALO_CLASSES[cell_type]()
+
+
+@dataclass(frozen=True)
+class ShardSummary:
+    """ State of a shard that the coordinator keeps after every request """
+
+    cycle: int
+    alive: int
+    arrivals: int
+    counts: Dict[int, int] = field(default_factory=dict)
+    health: Dict[int, int] = field(default_factory=dict)
+
+
+class ShardEnvironment(Environment):
+    """ Rows [top, bottom) of the world together with the halo rows of the neighbour shards around them. Halo cells
+    are never free and are not counted, entities that move into the halo leave the shard and are handed off to the
+    owner of the target cell """
+
+    def __init__(
+            self,
+            window_width: int,
+            world_height: int,
+            top: int,
+            bottom: int,
+            sustain_services: List[SustainEnvironmentService],
+            grid_class: Optional[Type[Grid]] = None,
+            batch_decisions: bool = True,
+            seed: Optional[int] = None,
+    ):
+        self.world_height: int = world_height
+        self.top: int = top
+        self.bottom: int = bottom
+        self.departures: List[Tuple[AliveEntity, Coordinates]] = []
+        self.arrivals: int = 0
+        super().__init__(
+            window_width=window_width,
+            window_height=bottom - top + 2 * HALO,
+            sustain_services=sustain_services,
+            grid_class=grid_class,
+            batch_decisions=batch_decisions,
+            seed=seed,
+        )
+
+    @Environment.matrix.setter
+    def matrix(self, matrix: List[List]) -> None:
+        """ Halo cells become empty with the exchanges, the sampled free cells of a chunked grid are limited to the
+        owned rows so that they are neither counted nor drawn """
+
+        Environment.matrix.fset(self, matrix)
+        if isinstance(self.free_cells, SampledFreeCells):
+            self.free_cells = SampledFreeCells(self.grid, top=HALO, bottom=self.height - HALO)
+
+    def owns(self, y: int) -> bool:
+        return HALO <= y < self.height - HALO
+
+    def _is_empty_coordinates(self, where: Coordinates) -> bool:
+        return self.owns(where.y) and super()._is_empty_coordinates(where)
+
+    def _create_blank_matrix(self) -> List[List]:
+        """ Halo starts as walls until the first exchange, world border rows are walls as usual """
+
+        matrix: List[List] = super()._create_blank_matrix()
+        for y in range(self.height):
+            world_y: int = y + self.top - HALO
+            if not self.owns(y) or world_y in (0, self.world_height - 1):
+                for x in range(self.width):
+                    matrix[y][x] = None
+        self.halo_cell_types: np.ndarray = np.full((2 * HALO, self.width), CellType.WALL, dtype=np.uint8)
+        return matrix
+
+    def setup_shard(self, entities: List[AliveEntity]) -> None:
+        """ Same as setup_initial_state, but a shard may start without entities """
+
+        self.matrix = self._create_blank_matrix()
+        for entity in entities:
+            self.set_object_randomly_in_environment(entity)
+        for sustain_service in self.sustain_services:
+            sustain_service.initial_sustain(self)
+
+    def step_local(self) -> List[Tuple[AliveEntity, Coordinates]]:
+        """ Move phase of a cycle, returns the entities that left the shard with their targets in world rows """
+
+        self.increment_cycle()
+        self.arrivals = 0
+        self._get_next_state(self._decide_movements() if self.batch_decisions else None)
+        return self._take_departures()
+
+    def arrive(self, entity: AliveEntity, target: Coordinates) -> None:
+        """ Entity handed off by a neighbour finishes its move. The neighbour saw the target in its halo one phase
+        earlier, if the cell was taken since then the entity lands on the closest free cell """
+
+        where = Coordinates(target.x, target.y - self.top + HALO)
+        interaction: int = self.rules.table[cell_type_of(entity)][self._cell_type_at(where.x, where.y)]
+        if interaction == Interaction.EAT_FOOD:
+            food: Any = self.matrix[where.y][where.x]
+            entity.eat(food)
+            self.census.remove(food)
+            self.matrix[where.y][where.x] = 0
+        elif interaction == Interaction.EAT_PREY:
+            prey: AliveEntity = self.matrix[where.y][where.x]
+            entity.eat(prey)
+            prey.was_eaten()
+            self._erase_object(obj=prey, where=where)
+
+        if interaction == Interaction.BLOCKED:
+            self._set_obj_near(near=where, obj=entity)
+        else:
+            self._respawn_object(where, entity)
+        self.arrivals += 1
+
+    def finish_cycle(self) -> None:
+        self._erase_dead_entities()
+        for sustain_service in self.sustain_services:
+            sustain_service.subsequent_sustain(self)
+
+    def border_rows(self) -> Tuple[np.ndarray, np.ndarray]:
+        """ Cell types of the first and the last owned rows, the halo of the shards above and below """
+
+        return (
+            self._cell_types_of_rows(HALO, 2 * HALO),
+            self._cell_types_of_rows(self.height - 2 * HALO, self.height - HALO),
+        )
+
+    def write_halo(self, above: Optional[np.ndarray], below: Optional[np.ndarray]) -> None:
+        """ Only the halo cells that changed since the previous exchange are written """
+
+        for rows, offset in ((above, 0), (below, HALO)):
+            if rows is None:
+                continue
+            current: np.ndarray = self.halo_cell_types[offset:offset + HALO]
+            for row, x in zip(*np.nonzero(rows != current)):
+                y: int = int(row) if offset == 0 else self.height - HALO + int(row)
+                self.matrix[y][int(x)] = halo_object(int(rows[row, x]))
+            current[:] = rows
+
+    def owned_cell_types(self) -> np.ndarray:
+        return self._cell_types_of_rows(HALO, self.height - HALO)
+
+    def owned_rows(self) -> List[List]:
+        return [list(row) for row in self.matrix[HALO:self.height - HALO]]
+
+    def summary(self) -> ShardSummary:
+        return ShardSummary(
+            cycle=self.cycle,
+            alive=len(self.alive_entities_coords),
+            arrivals=self.arrivals,
+            counts=dict(self.census.counts),
+            health=dict(self.census.health),
+        )
+
+    def _cell_types_of_rows(self, start: int, stop: int) -> np.ndarray:
+        if self.grid is not None:
+            return self.grid.cell_types()[start:stop].copy()
+        return cell_types_of(self.matrix[start:stop])
+
+    def _interact_move(self, entity: AliveEntity, from_: Coordinates, to: Coordinates, do_not_move: set) -> None:
+        if self.owns(to.y):
+            super()._interact_move(entity, from_, to, do_not_move)
+        else:
+            self.departures.append((entity, to))
+
+    def _interact_eat_food(self, entity: AliveEntity, from_: Coordinates, to: Coordinates, do_not_move: set) -> None:
+        if self.owns(to.y):
+            super()._interact_eat_food(entity, from_, to, do_not_move)
+        else:
+            self.departures.append((entity, to))
+
+    def _interact_eat_prey(self, entity: AliveEntity, from_: Coordinates, to: Coordinates, do_not_move: set) -> None:
+        if self.owns(to.y):
+            super()._interact_eat_prey(entity, from_, to, do_not_move)
+        else:
+            self.departures.append((entity, to))
+
+    def _take_departures(self) -> List[Tuple[AliveEntity, Coordinates]]:
+        """ Leaving entities stay in place until the whole shard moved, the ones that died or were eaten meanwhile
+        stay for good """
+
+        leaving: List[Tuple[AliveEntity, Coordinates]] = []
+        for entity, target in self.departures:
+            if entity not in self.alive_entities_coords or entity.is_dead:
+                continue
+            where: Coordinates = self.alive_entities_coords.pop(entity)
+            self.matrix[where.y][where.x] = 0
+            self.free_cells.add(where)
+            self.census.remove(entity)
+            leaving.append((entity, Coordinates(target.x, target.y + self.top - HALO)))
+        self.departures = []
+        return leaving
+
+
+class NeighbourExchange:
+    """ One message of a kind from every shard to each of its neighbours per round. A neighbour can be one round
+    ahead, its messages of the next round are kept until they are asked for """
+
+    def __init__(self, index: int, inboxes: List[multiprocessing.Queue]):
+        self.index: int = index
+        self.inboxes: List[multiprocessing.Queue] = inboxes
+        self.neighbours: List[int] = [i for i in (index - 1, index + 1) if 0 <= i < len(inboxes)]
+        self.early: Dict[Tuple[str, int], Any] = {}
+
+    def swap(self, kind: str, messages: Dict[int, Any]) -> Dict[int, Any]:
+        for neighbour in self.neighbours:
+            self.inboxes[neighbour].put((kind, self.index, messages.get(neighbour)))
+        received: Dict[int, Any] = {}
+        for neighbour in self.neighbours:
+            while (kind, neighbour) not in self.early:
+                message_kind, sender, message = self.inboxes[self.index].get()
+                self.early[(message_kind, sender)] = message
+            received[neighbour] = self.early.pop((kind, neighbour))
+        return received
+
+
+def _exchange_halo(shard: ShardEnvironment, exchange: NeighbourExchange) -> None:
+    top_rows, bottom_rows = shard.border_rows()
+    halo: Dict[int, Any] = exchange.swap('halo', {exchange.index - 1: top_rows, exchange.index + 1: bottom_rows})
+    shard.write_halo(above=halo.get(exchange.index - 1), below=halo.get(exchange.index + 1))
+
+
+def _step_shard(shard: ShardEnvironment, exchange: NeighbourExchange) -> None:
+    outgoing: Dict[int, List[Tuple[AliveEntity, Coordinates]]] = {neighbour: [] for neighbour in exchange.neighbours}
+    for entity, target in shard.step_local():
+        outgoing[exchange.index - 1 if target.y < shard.top else exchange.index + 1].append((entity, target))
+    for incoming in exchange.swap('handoff', outgoing).values():
+        for entity, target in incoming:
+            shard.arrive(entity, target)
+    shard.finish_cycle()
+    _exchange_halo(shard, exchange)
+
+
+def _run_shard(
+        index: int,
+        bounds: List[Tuple[int, int]],
+        window_width: int,
+        world_height: int,
+        sustain_services_factory: Optional[SustainServicesFactory],
+        grid_class: Optional[Type[Grid]],
+        batch_decisions: bool,
+        seed: Optional[int],
+        connection: Connection,
+        inboxes: List[multiprocessing.Queue],
+) -> None:
+    """ Worker process: owns one shard and serves the commands of the coordinator until it is closed """
+
+    try:
+        top, bottom = bounds[index]
+        sustain_services: List[SustainEnvironmentService] = (
+            sustain_services_factory((bottom - top) / world_height) if sustain_services_factory else []
+        )
+        shard = ShardEnvironment(
+            window_width=window_width,
+            world_height=world_height,
+            top=top,
+            bottom=bottom,
+            sustain_services=sustain_services,
+            grid_class=grid_class,
+            batch_decisions=batch_decisions,
+            seed=derived_seed(seed, f'{SHARD}{index}'),
+        )
+        exchange = NeighbourExchange(index, inboxes)
+        while True:
+            command, payload = connection.recv()
+            if command == 'setup':
+                shard.setup_shard(payload)
+                _exchange_halo(shard, exchange)
+                connection.send(('ok', shard.summary()))
+            elif command == 'step':
+                _step_shard(shard, exchange)
+                connection.send(('ok', shard.summary()))
+            elif command == 'cell_types':
+                connection.send(('ok', shard.owned_cell_types()))
+            elif command == 'rows':
+                connection.send(('ok', shard.owned_rows()))
+            elif command == 'close':
+                connection.send(('ok', None))
+                return
+    except Exception:  # noqa
+        connection.send(('error', traceback.format_exc()))
+
+
+class ShardedEnvironment:
+    """ World split into horizontal strips, every strip is an environment stepped by its own worker process.
+    Per cycle the shards move their entities in parallel, hand off the ones that crossed a strip border to the
+    neighbour and exchange the border rows that the neighbours observe as their halo. Only counters come back to this
+    process every cycle, the merged state is gathered on request """
+
+    def __init__(
+            self,
+            window_width: int,
+            window_height: int,
+            shards: int,
+            sustain_services_factory: Optional[SustainServicesFactory] = None,
+            grid_class: Optional[Type[Grid]] = None,
+            batch_decisions: bool = True,
+            seed: Optional[int] = None,
+    ):
+        """ Sustain services factory gets the fraction of the world that a shard owns and returns the services of
+        that shard, e.g. with the food amount scaled by the fraction. It is called in the worker processes, so it has
+        to be picklable """
+
+        self.width: int = window_width
+        self.height: int = window_height
+        self.bounds: List[Tuple[int, int]] = split_rows(window_height, shards)
+        self.summaries: List[ShardSummary] = [ShardSummary(cycle=0, alive=0, arrivals=0) for _ in self.bounds]
+        self.rng: RandomService = RandomService(seed)
+
+        context = process_context()
+        # Kept for the lifetime of the workers, queues that are collected here break in the workers
+        self.inboxes: List[multiprocessing.Queue] = [context.Queue() for _ in self.bounds]
+        self.connections: List[Connection] = []
+        self.workers: List[multiprocessing.Process] = []
+        for index in range(len(self.bounds)):
+            connection, worker_connection = context.Pipe()
+            worker = context.Process(
+                target=_run_shard,
+                args=(
+                    index, self.bounds, window_width, window_height, sustain_services_factory, grid_class,
+                    batch_decisions, seed, worker_connection, self.inboxes,
+                ),
+                daemon=True,
+            )
+            worker.start()
+            self.connections.append(connection)
+            self.workers.append(worker)
+
+    def __enter__(self) -> 'ShardedEnvironment':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @property
+    def cycle(self) -> int:
+        return self.summaries[0].cycle
+
+    @property
+    def alive_entities_amount(self) -> int:
+        return sum(summary.alive for summary in self.summaries)
+
+    @property
+    def handoffs(self) -> int:
+        """ Entities that crossed a strip border during the last cycle """
+
+        return sum(summary.arrivals for summary in self.summaries)
+
+    @property
+    def herbivores_amount(self) -> int:
+        return self._total('counts', CellType.HERBIVORE)
+
+    @property
+    def predators_amount(self) -> int:
+        return self._total('counts', CellType.PREDATOR)
+
+    @property
+    def herbivore_food_amount(self) -> int:
+        return self._total('counts', CellType.FOOD)
+
+    @property
+    def herbivores_health(self) -> int:
+        return self._total('health', CellType.HERBIVORE)
+
+    @property
+    def predators_health(self) -> int:
+        return self._total('health', CellType.PREDATOR)
+
+    @property
+    def game_over(self) -> bool:
+        return self.alive_entities_amount == 0
+
+    @property
+    def cell_types(self) -> np.ndarray:
+        """ Merged (height, width) array of CellType codes """
+
+        return np.vstack(self._request('cell_types'))
+
+    def gather_matrix(self) -> List[List]:
+        """ Merged copy of the world in the matrix notation, objects are copies of the ones in the workers """
+
+        return [row for rows in self._request('rows') for row in rows]
+
+    def setup_initial_state(self, entities: List[AliveEntity]) -> None:
+        """ Entities are dealt to the shards in proportion to their rows and placed randomly inside them """
+
+        if len(entities) < 1:
+            raise SetupEnvironmentError("No herbivores were provided")
+        dealt: List[List[AliveEntity]] = [[] for _ in self.bounds]
+        rows: np.ndarray = np.array([bottom - top for top, bottom in self.bounds])
+        shards: np.ndarray = self.rng.placement.choices(rows, size=len(entities))
+        for entity, shard in zip(entities, shards):
+            dealt[shard].append(entity)
+        self.summaries = self._request('setup', dealt)
+
+    def step(self) -> bool:
+        """ One cycle of the whole world, returns whether the game is over """
+
+        self.summaries = self._request('step')
+        return self.game_over
+
+    def close(self) -> None:
+        for connection, worker in zip(self.connections, self.workers):
+            if worker.is_alive():
+                try:
+                    connection.send(('close', None))
+                except (BrokenPipeError, OSError):
+                    pass
+        for worker in self.workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+        self.connections, self.workers = [], []
+
+    def _total(self, attribute: str, cell_type: int) -> int:
+        return sum(getattr(summary, attribute).get(cell_type, 0) for summary in self.summaries)
+
+    def _request(self, command: str, payloads: Optional[List[Any]] = None) -> List[Any]:
+        """ Send a command to every worker and collect the replies in shard order. Replies are read as they come, a
+        failed worker leaves its neighbours waiting, so all workers are stopped then """
+
+        for index, connection in enumerate(self.connections):
+            try:
+                connection.send((command, payloads[index] if payloads is not None else None))
+            except (BrokenPipeError, OSError):
+                self._fail(index, 'Worker process exited')
+
+        replies: Dict[int, Any] = {}
+        while len(replies) < len(self.connections):
+            waiting: List[Connection] = [c for i, c in enumerate(self.connections) if i not in replies]
+            for connection in wait(waiting):
+                index: int = self.connections.index(connection)
+                try:
+                    status, reply = connection.recv()
+                except EOFError:
+                    status, reply = 'error', 'Worker process exited'
+                if status == 'error':
+                    self._fail(index, reply)
+                replies[index] = reply
+        return [replies[index] for index in range(len(self.connections))]
+
+    def _fail(self, index: int, reason: str) -> None:
+        for worker in self.workers:
+            worker.terminate()
+        self.connections, self.workers = [], []
+        raise ShardWorkerError(f'Shard {index} failed:\n{reason}')
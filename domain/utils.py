@@ -1,27 +1,132 @@
 import json
-from typing import List
+import pathlib
+import queue
+import threading
+from typing import Dict, List, Optional, Tuple, Union
 
+import numpy as np
+
+from contrib.utils import logger
 from domain.interfaces.environment import EnvironmentInterface
 
+STATISTICS_DIRECTORY: pathlib.Path = pathlib.Path('statistics')
+# Seconds between the checks that the writer is still alive while waiting for a spare buffer
+WRITER_CHECK_INTERVAL: float = 1.0
+
+# Metrics of a snapshot, in the order of the buffer columns
+COLUMNS: Tuple[str, ...] = (
+    'cycle',
+    'alive_entities',
+    'herbivores_amount',
+    'predators_amount',
+    'herbivores_health',
+    'predators_health',
+    'herbivore_food',
+)
+
 
 class StatisticsCollector:
+    """ Per cycle metrics of the environment, recorded every interval cycles into a preallocated buffer of chunk size
+    rows. A full chunk is handed to a background thread that appends it to an NDJSON file as one line of columns, and
+    recording goes on in the spare buffer. With two buffers memory stays bounded however long the run is, the file
+    can be read with read_statistics while the run still goes and a crash loses at most the unflushed chunk """
 
-    def __init__(self, environment: EnvironmentInterface, filename: str):
+    def __init__(
+            self,
+            environment: EnvironmentInterface,
+            filename: str,
+            directory: Union[str, pathlib.Path] = STATISTICS_DIRECTORY,
+            interval: int = 1,
+            chunk_size: int = 256,
+    ):
         self.environment: EnvironmentInterface = environment
-        self.filename: str = filename
-        self.snapshots: List[dict] = []
-
-    def make_snapshot(self):
-        self.snapshots.append(
-            {
-                "cycle": self.environment.cycle,
-                "alive_entities": len(self.environment.alive_entities_coords),
-                "herbivores_amount": self.environment.herbivores_amount,
-                "predators_amount": self.environment.predators_amount,
-                "herbivore_food": self.environment.herbivore_food_amount,
-            }
+        self.path: pathlib.Path = pathlib.Path(directory) / f'{filename}.ndjson'
+        self.interval: int = interval
+        self.buffer: np.ndarray = np.zeros((chunk_size, len(COLUMNS)), dtype=np.int64)
+        self.rows: int = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text('')
+        # Buffers go to the writer full and come back empty, the spare one is what the recording swaps to
+        self.spare_buffers: queue.Queue = queue.Queue()
+        self.spare_buffers.put(np.zeros_like(self.buffer))
+        self.chunks: queue.Queue = queue.Queue()
+        # Set by the writer when it fails, raised by the next flush or dump instead of waiting for it forever
+        self.writer_error: Optional[BaseException] = None
+        self.writer = threading.Thread(target=self._write_chunks, name='statistics-writer', daemon=True)
+        self.writer.start()
+
+    def make_snapshot(self) -> None:
+        if self.environment.cycle % self.interval:
+            return
+        self.buffer[self.rows] = (
+            self.environment.cycle,
+            len(self.environment.alive_entities_coords),
+            self.environment.herbivores_amount,
+            self.environment.predators_amount,
+            self.environment.herbivores_health,
+            self.environment.predators_health,
+            self.environment.herbivore_food_amount,
         )
+        self.rows += 1
+        if self.rows == len(self.buffer):
+            self.flush()
+
+    def flush(self) -> None:
+        """ Hand the recorded rows to the writer, waits only if the writer is a whole chunk behind """
+
+        if not self.rows:
+            return
+        self.chunks.put((self.buffer, self.rows))
+        while True:
+            try:
+                self.buffer = self.spare_buffers.get(timeout=WRITER_CHECK_INTERVAL)
+                break
+            except queue.Empty:
+                if not self.writer.is_alive():
+                    self._raise_writer_error()
+        self.rows = 0
+
+    def dump_to_file(self) -> None:
+        """ Write the rest of the rows and wait for the writer to finish """
+
+        self.flush()
+        self.chunks.put(None)
+        self.writer.join()
+        if self.writer_error is not None:
+            self._raise_writer_error()
+        logger.info(f'Statistics saved to {self.path}')
+
+    def _raise_writer_error(self) -> None:
+        """ Error of the writer is raised again in the recording thread, the writer only stops without one if the
+        collector was dumped already """
+
+        raise self.writer_error or RuntimeError(f'Statistics writer of {self.path} is not running')
+
+    def _write_chunks(self) -> None:
+        try:
+            with open(self.path, 'a') as file:
+                while (chunk := self.chunks.get()) is not None:
+                    buffer, rows = chunk
+                    columns: Dict[str, List[int]] = dict(zip(COLUMNS, buffer[:rows].T.tolist()))
+                    self.spare_buffers.put(buffer)
+                    file.write(json.dumps(columns) + '\n')
+                    file.flush()
+        except BaseException as error:
+            self.writer_error = error
+
+
+def read_statistics(path: Union[str, pathlib.Path], columns: Optional[Tuple[str, ...]] = None) -> Dict[str, np.ndarray]:
+    """ Columns of a statistics file, chunks concatenated. A line that is still being written is skipped """
 
-    def dump_to_file(self):
-        with open(f"statistics/{self.filename}.json", "w") as file:
-            json.dump(self.snapshots, file)
+    chunks: List[Dict[str, List[int]]] = []
+    with open(path) as file:
+        for line in file:
+            try:
+                chunks.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+    return {
+        column: np.array([value for chunk in chunks for value in chunk[column]], dtype=np.int64)
+        for column in (columns or COLUMNS)
+    }
@@ -1,15 +1,18 @@
-import pathlib
-import random
-from typing import Tuple
+from concurrent.futures import Future
+from typing import Any, Tuple, Hashable, Optional
 
 import gym
+import numpy as np
 from stable_baselines3 import PPO
 
 from contrib.utils import logger
 from domain.interfaces.setup import TrainSetup
 from domain.interfaces.objects import ObservationRange, Movement
+from domain.rng import active_random
 
 from domain.exceptions import UnknownObservationSpace
+from evolution.learning import BackgroundLearner
+from evolution.registry import ModelRegistry, RegisteredModel, model_registry
 
 
 class ControlledBrain:
@@ -32,6 +35,15 @@ class ControlledBrain:
     def predict(self, *args, **kwargs) -> Tuple:
         return self.next_movement.pop(), None
 
+    def batch_key(self) -> Optional[Hashable]:
+        return None
+
+    def predict_batch(self, observations: np.ndarray) -> np.ndarray:
+        return np.array([self.next_movement.pop() for _ in range(len(observations))])
+
+    def release(self) -> None:
+        pass
+
     def required_observation_range(self) -> ObservationRange:
         return self.observation_range
 
@@ -47,7 +59,17 @@ class RandomBrain:
         pass
 
     def predict(self, *args, **kwargs) -> Tuple:
-        return random.randint(0, len(Movement) - 1), None
+        return active_random().brains.randrange(len(Movement)), None
+
+    def batch_key(self) -> Optional[Hashable]:
+        return RandomBrain
+
+    @staticmethod
+    def predict_batch(observations: np.ndarray) -> np.ndarray:
+        return active_random().brains.integers(len(Movement), size=len(observations))
+
+    def release(self) -> None:
+        pass
 
     def set_next_movement(self, movement: int):
         raise NotImplemented('This brain class generates movements itself')
@@ -57,12 +79,69 @@ class RandomBrain:
         return ObservationRange.ONE_CELL_AROUND
 
 
+class InferenceBrain:
+    """ Inference only brain over a model loaded from a registry, like an exported policy or an action table. Copies
+    share the model, nothing is learnt and nothing is released. Subclasses give the registry, the model, the length
+    of the observations it reads and the constructor options that follow the model """
+
+    registry: ModelRegistry
+    observation_length: int
+
+    @property
+    def model(self) -> Any:
+        raise NotImplementedError
+
+    def options(self) -> Tuple:
+        return ()
+
+    def __reduce_ex__(self, protocol):
+        # Model from the registry travels between processes as the path and stays shared on the other side
+        path = self.registry.path_of(self.model)
+        if path is not None:
+            return _load_inference_brain, (self.__class__, str(path), *self.options())
+        return super().__reduce_ex__(protocol)
+
+    def learn(self, *args, **kwargs) -> None:
+        pass
+
+    def batch_key(self) -> Optional[Hashable]:
+        return (id(self.model), *self.options())
+
+    def set_next_movement(self, movement: int):
+        raise NotImplemented('This brain class generates movements itself')
+
+    def required_observation_range(self) -> ObservationRange:
+        if self.observation_length == 9:
+            return ObservationRange.ONE_CELL_AROUND
+        elif self.observation_length == 25:
+            return ObservationRange.TWO_CELL_AROUND
+        else:
+            raise UnknownObservationSpace(f'Cannot match the length: {self.observation_length}')
+
+    def release(self) -> None:
+        pass
+
+
+def _load_inference_brain(brain_class: type, path: str, *options) -> InferenceBrain:
+    return brain_class(brain_class.registry.load(path), *options)
+
+
 class TrainedModelMixin:
     """ Previously trained brain, stable_baseline model """
 
-    @classmethod
-    def get_copy(cls):
-        return cls()
+    def get_copy(self):
+        brain = self.__class__()
+        if 'model' in vars(self):
+            # Model that was given to the instance, e.g. user trained one, is shared with the child as well
+            brain.model = self.model
+        return brain
+
+    def __reduce_ex__(self, protocol):
+        # Brain of a model from the registry travels between processes as the path, not as the weights
+        path = model_registry.path_of(vars(self).get('model'))
+        if path is not None:
+            return get_user_trained_brain, (str(path),)
+        return super().__reduce_ex__(protocol)
 
     def learn(self, *args, **kwargs) -> None:
         self.model.learn(*args, **kwargs)
@@ -70,6 +149,18 @@ class TrainedModelMixin:
     def predict(self, *args, **kwargs) -> Tuple:
         return self.model.predict(*args, **kwargs)
 
+    def batch_key(self) -> Optional[Hashable]:
+        # Subclasses share a class level model, so every entity with the same model is predicted in one pass
+        return id(self.model)
+
+    def predict_batch(self, observations: np.ndarray) -> np.ndarray:
+        actions, _ = self.model.predict(observations)
+        return actions
+
+    def release(self) -> None:
+        # Models are shared through the registry and live as long as the process
+        pass
+
     def set_next_movement(self, movement: int):
         raise NotImplemented('This brain class generates movements itself')
 
@@ -84,69 +175,127 @@ class TrainedModelMixin:
 
 
 class TrainedBrainHerbivoreTwoCells100000(TrainedModelMixin):
-    model = PPO.load(
-        pathlib.Path(__file__).resolve().parent.parent /
-        'Training' / 'saved_models' / 'PPO_model_Herbivore_100000_20x20_food60_3_two_cells'
-    )
+    model = RegisteredModel('PPO_model_Herbivore_100000_20x20_food60_3_two_cells')
 
 
 class TrainedBrainHerbivoreOneCells100000(TrainedModelMixin):
-    model = PPO.load(
-        pathlib.Path(__file__).resolve().parent.parent /
-        'Training' / 'saved_models' / 'PPO_model_Herbivore_100000_20x20_food60_3_one_cells'
-    )
+    model = RegisteredModel('PPO_model_Herbivore_100000_20x20_food60_3_one_cells')
 
 
 class TrainedBrainHerbivoreTwoCells1000000(TrainedModelMixin):
-    model = PPO.load(
-        pathlib.Path(__file__).resolve().parent.parent /
-        'Training' / 'saved_models' / 'PPO_model_Herbivore_1000000_20x20_food60_3_two_cells'
-    )
+    model = RegisteredModel('PPO_model_Herbivore_1000000_20x20_food60_3_two_cells')
 
 
 class TrainedBrainPredator100000(TrainedModelMixin):
-    model = PPO.load(
-        pathlib.Path(__file__).resolve().parent.parent /
-        'Training' / 'saved_models' / 'PPO_model_Predator_100000_20x20_food30'
-    )
+    model = RegisteredModel('PPO_model_Predator_100000_20x20_food30')
 
 
 def get_user_trained_brain(model_name: str) -> TrainedModelMixin:
     brain = TrainedModelMixin()
-    brain.model = PPO.load(
-        pathlib.Path(__file__).resolve().parent.parent /
-        'Training' / 'saved_models' / model_name
-    )
+    brain.model = model_registry.load(model_name)
     return brain
 
 
+class SharedModel:
+    """ PPO model together with the amount of brains that currently use it """
+
+    def __init__(self, model: PPO):
+        self.model: PPO = model
+        self.owners: int = 1
+
+
 class BrainForTraining:
+    """ Brain that keeps learning during its life. Children share the weights of the parent copy-on-write: own PPO
+    with optimizer and rollout buffer is built only when the brain learns while somebody else still uses the model """
+
     def __init__(
             self, train_setup: TrainSetup, gym_trainer: gym.Env
     ):
         self.train_setup: TrainSetup = train_setup
         self.gym_trainer: gym.Env = gym_trainer
-        self.model = PPO(
+        self.shared: Optional[SharedModel] = SharedModel(self._build_model())
+        self.learner: Optional[BackgroundLearner] = (
+            BackgroundLearner.shared(self.gym_trainer, self.train_setup, self.train_setup.learning_workers)
+            if self.train_setup.learning_workers > 0 else None
+        )
+        self.learning_job: Optional[Future] = None
+
+    @property
+    def model(self) -> PPO:
+        return self.shared.model
+
+    def _build_model(self) -> PPO:
+        # Seed of the weights, the sampling and the learning of the model is drawn from the run
+        return PPO(
             "MlpPolicy", self.gym_trainer, verbose=1, tensorboard_log=None, n_steps=self.train_setup.learn_n_steps,
+            seed=active_random().training.randrange(2 ** 31),
         )
 
+    def _own_model(self) -> PPO:
+        """ Model that is safe to change: the shared one is copied if anybody else still uses it """
+
+        if self.shared.owners > 1:
+            model: PPO = self._build_model()
+            model.set_parameters(self.shared.model.get_parameters())
+            self.shared.owners -= 1
+            self.shared = SharedModel(model)
+        return self.shared.model
+
     def predict(self, *args, **kwargs) -> Tuple:
-        if random.randint(0, self.train_setup.learn_frequency) == 0:
-            logger.debug(f"Brain {id(self)} started learning")
-            self.learn(total_timesteps=self.train_setup.learn_timesteps)
+        self._apply_finished_learning()
+        if active_random().learning.randint(0, self.train_setup.learn_frequency) == 0:
+            if self.learner is None:
+                logger.debug(f"Brain {id(self)} started learning")
+                self.learn(total_timesteps=self.train_setup.learn_timesteps)
+            elif self.learning_job is None:
+                logger.debug(f"Brain {id(self)} started learning in background")
+                self.learning_job = self.learner.submit(self.model.get_parameters())
         return self.model.predict(*args, **kwargs)
 
+    def _apply_finished_learning(self) -> None:
+        """ Entity keeps acting with its current weights until the background job is done, then the learned ones are
+        swapped in between two predictions """
+
+        if self.learning_job is None or not self.learning_job.done():
+            return
+        job, self.learning_job = self.learning_job, None
+        if job.exception() is not None:
+            logger.error(f"Brain {id(self)} background learning failed: {job.exception()!r}")
+            return
+        self._own_model().set_parameters(job.result())
+
     def learn(self, *args, **kwargs):
-        return self.model.learn(*args, **kwargs)
+        return self._own_model().learn(*args, **kwargs)
+
+    def batch_key(self) -> Optional[Hashable]:
+        # Every brain decides on its own whether to learn before predicting
+        return None
+
+    def predict_batch(self, observations: np.ndarray) -> np.ndarray:
+        return np.array([self.predict(observation)[0] for observation in observations])
 
     def get_copy(self):
-        brain = self.__class__(
-            train_setup=self.train_setup,
-            gym_trainer=self.gym_trainer,
-        )
-        brain.model.set_parameters(self.model.get_parameters())
+        """ Child starts with the weights of the parent without copying them """
+
+        brain = self.__class__.__new__(self.__class__)
+        brain.train_setup = self.train_setup
+        brain.gym_trainer = self.gym_trainer
+        brain.shared = self.shared
+        brain.learner = self.learner
+        brain.learning_job = None
+        self.shared.owners += 1
         return brain
 
+    def release(self) -> None:
+        """ The model is freed together with its last owner, background job result is not needed anymore """
+
+        if self.shared is not None:
+            self.shared.owners -= 1
+            self.shared = None
+        if self.learning_job is not None:
+            self.learning_job.cancel()
+            self.learning_job = None
+
     def required_observation_range(self) -> ObservationRange:
         observation_space_length: int = len(self.model.observation_space)
         if observation_space_length == 9:
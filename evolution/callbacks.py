@@ -1,5 +1,12 @@
+import pathlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Union
+
 from stable_baselines3.common.callbacks import BaseCallback
 
+from contrib.utils import logger
+from evolution.checkpoints import capture_checkpoint, prune_checkpoints, write_checkpoint
+
 
 class TrainerVisualizer(BaseCallback):
     """ Visualization for training process. User only for gym.Env subclasses """
@@ -7,3 +14,46 @@ class TrainerVisualizer(BaseCallback):
     def _on_step(self) -> bool:
         self.model.env.envs[0].render()
         return True
+
+
+class AsyncCheckpointCallback(BaseCallback):
+    """ Every save_frequency steps policy, optimizer and counters are copied on the training thread and written to the
+    disk by a background thread, only the last keep_last checkpoints are kept. Checkpoints are taken between rollouts,
+    after the update of the previous rollout, so that resuming starts from a consistent state """
+
+    def __init__(self, directory: Union[str, pathlib.Path], save_frequency: int, keep_last: int = 3, verbose: int = 0):
+        super(AsyncCheckpointCallback, self).__init__(verbose)
+        self.directory: pathlib.Path = pathlib.Path(directory)
+        self.save_frequency: int = save_frequency
+        self.keep_last: int = keep_last
+        self.writer: Optional[ThreadPoolExecutor] = None
+        self.pending: List[Future] = []
+        self.last_saved_at: int = 0
+
+    def _on_training_start(self) -> None:
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='checkpoint-writer')
+        self.last_saved_at = self.model.num_timesteps
+
+    def _on_rollout_start(self) -> None:
+        if self.model.num_timesteps - self.last_saved_at >= self.save_frequency:
+            self.save()
+
+    def _on_step(self) -> bool:
+        return True
+
+    def save(self) -> None:
+        self.last_saved_at = self.model.num_timesteps
+        self.pending = [job for job in self.pending if not job.done()]
+        self.pending.append(self.writer.submit(self._write, capture_checkpoint(self.model)))
+
+    def _write(self, checkpoint: Dict) -> None:
+        path: pathlib.Path = write_checkpoint(checkpoint, self.directory)
+        prune_checkpoints(self.directory, self.keep_last)
+        logger.info(f'Checkpoint saved: {path}')
+
+    def _on_training_end(self) -> None:
+        if self.model.num_timesteps > self.last_saved_at:
+            self.save()
+        for job in self.pending:
+            job.result()
+        self.writer.shutdown(wait=True)
@@ -0,0 +1,89 @@
+import copy
+import os
+import pathlib
+import random
+import re
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import torch
+from stable_baselines3.common.base_class import BaseAlgorithm
+
+from evolution.registry import TRAINING_DIR
+
+CHECKPOINTS_DIR: pathlib.Path = TRAINING_DIR / 'checkpoints'
+
+_CHECKPOINT_NAME = re.compile(r'^checkpoint_(\d+)_steps\.pt$')
+
+
+def capture_checkpoint(model: BaseAlgorithm) -> Dict:
+    """ Copy of policy, optimizer, step counters and random state, taken on the training thread so that serializing
+    it later does not race with the next updates. Random state covers the streams of every trainer environment and the
+    global generators of the training process, which sample the actions and shuffle the minibatches """
+
+    return {
+        'parameters': {name: copy.deepcopy(state) for name, state in model.get_parameters().items()},
+        'num_timesteps': model.num_timesteps,
+        'n_updates': getattr(model, '_n_updates', 0),
+        'episode_num': model._episode_num,  # noqa
+        'environment_random_states': model.get_env().env_method('random_state'),
+        'global_random_states': {
+            'random': random.getstate(),
+            'numpy': np.random.get_state(),
+            'torch': torch.get_rng_state(),
+        },
+    }
+
+
+def write_checkpoint(checkpoint: Dict, directory: Union[str, pathlib.Path]) -> pathlib.Path:
+    """ Written to a temporary file first, a crash in the middle of writing never leaves a broken checkpoint """
+
+    directory = pathlib.Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path: pathlib.Path = directory / f"checkpoint_{checkpoint['num_timesteps']}_steps.pt"
+    temporary_path: pathlib.Path = path.with_suffix('.tmp')
+    torch.save(checkpoint, temporary_path)
+    os.replace(temporary_path, path)
+    return path
+
+
+def list_checkpoints(directory: Union[str, pathlib.Path]) -> List[pathlib.Path]:
+    """ Checkpoints of the directory from the oldest to the latest """
+
+    directory = pathlib.Path(directory)
+    if not directory.is_dir():
+        return []
+    checkpoints = [
+        (int(match.group(1)), path)
+        for path in directory.iterdir()
+        for match in [_CHECKPOINT_NAME.match(path.name)]
+        if match
+    ]
+    return [path for _, path in sorted(checkpoints)]
+
+
+def latest_checkpoint(directory: Union[str, pathlib.Path]) -> Optional[pathlib.Path]:
+    checkpoints: List[pathlib.Path] = list_checkpoints(directory)
+    return checkpoints[-1] if checkpoints else None
+
+
+def prune_checkpoints(directory: Union[str, pathlib.Path], keep_last: int) -> None:
+    for path in list_checkpoints(directory)[:-keep_last]:
+        path.unlink()
+
+
+def load_checkpoint(model: BaseAlgorithm, path: Union[str, pathlib.Path]) -> None:
+    """ Continue from the checkpoint: learn further with reset_num_timesteps=False """
+
+    checkpoint: Dict = torch.load(path)
+    model.set_parameters(checkpoint['parameters'])
+    model.num_timesteps = checkpoint['num_timesteps']
+    model._n_updates = checkpoint['n_updates']  # noqa
+    model._episode_num = checkpoint['episode_num']  # noqa
+    # Checkpoints written before the random state was saved continue with fresh streams
+    for index, state in enumerate(checkpoint.get('environment_random_states', [])):
+        model.get_env().env_method('set_random_state', state, indices=[index])
+    if 'global_random_states' in checkpoint:
+        random.setstate(checkpoint['global_random_states']['random'])
+        np.random.set_state(checkpoint['global_random_states']['numpy'])
+        torch.set_rng_state(checkpoint['global_random_states']['torch'])
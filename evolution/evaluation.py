@@ -0,0 +1,164 @@
+import math
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+import numpy as np
+from stable_baselines3.common.utils import set_random_seed
+
+from contrib.utils import process_context
+from domain.entities import EntityType, Herbivore, Predator
+from domain.environment import Environment
+from domain.interfaces.brain import Brain
+from domain.interfaces.entities import AliveEntity
+from domain.interfaces.environment import SustainEnvironmentService
+from domain.service import HerbivoreFoodSustainConstantService, HerbivoreSustainConstantService
+from evolution.brain import get_user_trained_brain
+from evolution.numpy_policy import get_numpy_brain
+from evolution.tabular import get_tabular_brain
+
+# Two sided 95% interval of the normal approximation
+CONFIDENCE_Z: float = 1.96
+
+
+@dataclass(frozen=True)
+class EvaluationSetup:
+    """ Episode every model is evaluated on: population of the model's entities on an empty field with food, no births.
+    Food amount defaults to 10% of the cells, like in the trainers """
+
+    entity_type: str
+    window_width: int = 20
+    window_height: int = 20
+    population: int = 10
+    health: int = 10
+    food_amount: int = 0
+    max_cycles: int = 1000
+
+
+@dataclass(frozen=True)
+class EpisodeResult:
+    """ Population means of one episode """
+
+    model_name: str
+    seed: int
+    survival: float
+    food_eaten: float
+    kills: float
+
+
+@dataclass(frozen=True)
+class Estimate:
+    mean: float
+    low: float
+    high: float
+
+    @classmethod
+    def of(cls, values: Sequence[float]) -> 'Estimate':
+        mean: float = float(np.mean(values))
+        if len(values) < 2:
+            return cls(mean, mean, mean)
+        margin: float = CONFIDENCE_Z * float(np.std(values, ddof=1)) / math.sqrt(len(values))
+        return cls(mean, mean - margin, mean + margin)
+
+    def __str__(self) -> str:
+        return f'{self.mean:.2f} [{self.low:.2f}, {self.high:.2f}]'
+
+
+@dataclass(frozen=True)
+class ModelEvaluation:
+    model_name: str
+    episodes: int
+    survival: Estimate
+    food_eaten: Estimate
+    kills: Estimate
+
+    @classmethod
+    def of(cls, model_name: str, results: Sequence[EpisodeResult]) -> 'ModelEvaluation':
+        return cls(
+            model_name=model_name,
+            episodes=len(results),
+            survival=Estimate.of([result.survival for result in results]),
+            food_eaten=Estimate.of([result.food_eaten for result in results]),
+            kills=Estimate.of([result.kills for result in results]),
+        )
+
+
+def load_brain(model_name: str) -> Brain:
+    """ Exported NumPy policies (.npz) and action tables (.npy) are evaluated with their own brains """
+
+    if model_name.endswith('.npz'):
+        return get_numpy_brain(model_name)
+    if model_name.endswith('.npy'):
+        return get_tabular_brain(model_name)
+    return get_user_trained_brain(model_name)
+
+
+def _sustain_services(setup: EvaluationSetup) -> List[SustainEnvironmentService]:
+    amount: int = setup.food_amount or int(0.1 * setup.window_width * setup.window_height)
+    if setup.entity_type == EntityType.HERBIVORE:
+        return [HerbivoreFoodSustainConstantService(required_amount_of_herb_food=amount, food_nutrition=10)]
+    elif setup.entity_type == EntityType.PREDATOR:
+        return [HerbivoreSustainConstantService(required_amount_of_herbivores=amount, initial_herbivore_health=10)]
+    else:
+        raise ValueError(f"Unknown entity type: {setup.entity_type}")
+
+
+def run_episode(model_name: str, setup: EvaluationSetup, seed: int) -> EpisodeResult:
+    """ Headless episode that lasts until the whole population is dead or max cycles passed. Same seed gives the same
+    layout to every model, so models are compared on equal episodes """
+
+    brain: Brain = load_brain(model_name)
+    # Torch sampling of the models is seeded after the load: loading a model draws random numbers, cached ones do not
+    set_random_seed(seed)
+    entity_class = Herbivore if setup.entity_type == EntityType.HERBIVORE else Predator
+    population: List[AliveEntity] = [
+        entity_class(name=f'Evaluated#{i}', health=setup.health, brain=brain.get_copy(), birth_config=None)
+        for i in range(setup.population)
+    ]
+    environment = Environment(
+        window_width=setup.window_width,
+        window_height=setup.window_height,
+        sustain_services=_sustain_services(setup),
+        seed=seed,
+    )
+    environment.setup_initial_state(population)
+
+    while environment.cycle < setup.max_cycles and any(
+            entity in environment.alive_entities_coords for entity in population
+    ):
+        environment.step_living_regime()
+
+    meals: float = float(np.mean([entity.meals for entity in population]))
+    return EpisodeResult(
+        model_name=model_name,
+        seed=seed,
+        survival=float(np.mean([entity.lived_for for entity in population])),
+        food_eaten=meals if setup.entity_type == EntityType.HERBIVORE else 0.0,
+        kills=meals if setup.entity_type == EntityType.PREDATOR else 0.0,
+    )
+
+
+def evaluate_models(
+        model_names: Sequence[str],
+        setup: EvaluationSetup,
+        episodes: int,
+        seed: int = 0,
+        workers: int = 0,
+) -> List[ModelEvaluation]:
+    """ Every model plays the episodes seeded seed, seed + 1, ... Episodes run in a process pool of given amount of
+    workers, 0 runs them in this process """
+
+    jobs: List[tuple] = [
+        (model_name, setup, seed + episode) for model_name in model_names for episode in range(episodes)
+    ]
+    if workers > 0:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=process_context()) as pool:
+            futures: List[Future] = [pool.submit(run_episode, *job) for job in jobs]
+            results: List[EpisodeResult] = [future.result() for future in futures]
+    else:
+        results: List[EpisodeResult] = [run_episode(*job) for job in jobs]
+
+    by_model: Dict[str, List[EpisodeResult]] = {model_name: [] for model_name in model_names}
+    for result in results:
+        by_model[result.model_name].append(result)
+    return [ModelEvaluation.of(model_name, model_results) for model_name, model_results in by_model.items()]
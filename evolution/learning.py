@@ -0,0 +1,68 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Optional, Set
+
+import gym
+from stable_baselines3 import PPO
+
+from contrib.utils import process_context
+from domain.interfaces.setup import TrainSetup
+
+# Model of the worker process, built once by the pool initializer and reused by every job of that worker
+_worker_model: Optional[PPO] = None
+
+
+def _init_worker(gym_trainer: gym.Env, train_setup: TrainSetup) -> None:
+    global _worker_model
+    _worker_model = PPO(
+        "MlpPolicy", gym_trainer, verbose=0, tensorboard_log=None, n_steps=train_setup.learn_n_steps,
+    )
+
+
+def _learn(parameters: Dict, total_timesteps: int) -> Dict:
+    _worker_model.set_parameters(parameters)
+    _worker_model.learn(total_timesteps=total_timesteps)
+    return _worker_model.get_parameters()
+
+
+class BackgroundLearner:
+    """ Process pool that runs PPO learning jobs off the simulation loop. Every worker owns a copy of the gym trainer,
+    a job gets the current parameters of a brain and returns the learned ones """
+
+    _shared: Dict[int, 'BackgroundLearner'] = {}
+
+    def __init__(self, gym_trainer: gym.Env, train_setup: TrainSetup, workers: int):
+        self.train_setup: TrainSetup = train_setup
+        self.jobs: Set[Future] = set()
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=process_context(),
+            initializer=_init_worker,
+            initargs=(gym_trainer, train_setup),
+        )
+
+    @classmethod
+    def shared(cls, gym_trainer: gym.Env, train_setup: TrainSetup, workers: int) -> 'BackgroundLearner':
+        """ Brains that train on the same gym trainer share one pool """
+
+        if id(gym_trainer) not in cls._shared:
+            cls._shared[id(gym_trainer)] = cls(gym_trainer, train_setup, workers)
+        return cls._shared[id(gym_trainer)]
+
+    @classmethod
+    def shutdown_all(cls) -> None:
+        for learner in cls._shared.values():
+            learner.shutdown()
+        cls._shared.clear()
+
+    def submit(self, parameters: Dict) -> Future:
+        job: Future = self.executor.submit(_learn, parameters, self.train_setup.learn_timesteps)
+        self.jobs.add(job)
+        job.add_done_callback(self.jobs.discard)
+        return job
+
+    def shutdown(self) -> None:
+        """ Jobs that have not started yet are dropped, running ones are waited for """
+
+        for job in list(self.jobs):
+            job.cancel()
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,171 @@
+import pathlib
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+
+from domain.exceptions import UnsupportedPolicy
+from domain.rng import active_random
+from evolution.brain import InferenceBrain
+from evolution.registry import ModelRegistry
+
+ACTIVATIONS = {
+    'Tanh': np.tanh,
+    'ReLU': lambda x: np.maximum(x, 0),
+}
+
+
+class NumpyPolicy:
+    """ Actor part of a stable_baselines3 MlpPolicy over MultiDiscrete observations, evaluated with NumPy only. The
+    one-hot encoding of stable_baselines3 is rebuilt by scattering ones at category offsets, then it is plain BLAS """
+
+    def __init__(
+            self,
+            category_offsets: np.ndarray,
+            layers: List[Tuple[np.ndarray, np.ndarray]],
+            action_layer: Tuple[np.ndarray, np.ndarray],
+            activation: str = 'Tanh',
+    ):
+        """ Weights are stored transposed, (in_features, out_features), so that a batch is multiplied from the left """
+
+        if activation not in ACTIVATIONS:
+            raise UnsupportedPolicy(f'Unsupported activation: {activation}')
+        self.category_offsets: np.ndarray = category_offsets
+        self.layers: List[Tuple[np.ndarray, np.ndarray]] = layers
+        self.action_layer: Tuple[np.ndarray, np.ndarray] = action_layer
+        self.activation: str = activation
+
+    @classmethod
+    def from_model(cls, model) -> 'NumpyPolicy':
+        """ Extract the weights of a stable_baselines3 actor critic model """
+
+        policy = model.policy
+        nvec: Optional[np.ndarray] = getattr(model.observation_space, 'nvec', None)
+        if nvec is None or not hasattr(model.action_space, 'n'):
+            raise UnsupportedPolicy('Only MultiDiscrete observations and Discrete actions are supported')
+
+        linear_layers = [
+            module
+            for network in (policy.mlp_extractor.shared_net, policy.mlp_extractor.policy_net)
+            for module in network
+            if type(module).__name__ == 'Linear'
+        ]
+        if not linear_layers:
+            raise UnsupportedPolicy('Policy network without hidden layers')
+
+        def to_numpy(linear) -> Tuple[np.ndarray, np.ndarray]:
+            return (
+                linear.weight.detach().cpu().numpy().T.astype(np.float32),
+                linear.bias.detach().cpu().numpy().astype(np.float32),
+            )
+
+        return cls(
+            category_offsets=np.concatenate([[0], np.cumsum(nvec)[:-1]]).astype(np.intp),
+            layers=[to_numpy(linear) for linear in linear_layers],
+            action_layer=to_numpy(policy.action_net),
+            activation=policy.activation_fn.__name__,
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, pathlib.Path]) -> 'NumpyPolicy':
+        with np.load(path) as data:
+            layers_amount: int = int(data['layers_amount'])
+            return cls(
+                category_offsets=data['category_offsets'],
+                layers=[(data[f'weight_{i}'], data[f'bias_{i}']) for i in range(layers_amount)],
+                action_layer=(data['action_weight'], data['action_bias']),
+                activation=str(data['activation']),
+            )
+
+    def save(self, path: Union[str, pathlib.Path]) -> None:
+        arrays = {f'weight_{i}': weight for i, (weight, _) in enumerate(self.layers)}
+        arrays.update({f'bias_{i}': bias for i, (_, bias) in enumerate(self.layers)})
+        np.savez(
+            path,
+            category_offsets=self.category_offsets,
+            layers_amount=len(self.layers),
+            action_weight=self.action_layer[0],
+            action_bias=self.action_layer[1],
+            activation=self.activation,
+            **arrays,
+        )
+
+    @property
+    def observation_length(self) -> int:
+        return len(self.category_offsets)
+
+    def logits(self, observations: np.ndarray) -> np.ndarray:
+        """ Action logits of a (n, observation_length) batch """
+
+        activation = ACTIVATIONS[self.activation]
+        hidden: np.ndarray = np.zeros((len(observations), self.layers[0][0].shape[0]), dtype=np.float32)
+        hidden[np.arange(len(observations))[:, None], observations + self.category_offsets] = 1
+        for weight, bias in self.layers:
+            hidden = activation(hidden @ weight + bias)
+        action_weight, action_bias = self.action_layer
+        return hidden @ action_weight + action_bias
+
+    def predict(self, observations: np.ndarray, deterministic: bool = False) -> np.ndarray:
+        """ Actions of a (n, observation_length) batch, argmax of the logits or a sample of their distribution """
+
+        logits: np.ndarray = self.logits(observations)
+        if deterministic:
+            return logits.argmax(axis=1)
+        probabilities: np.ndarray = np.exp(logits - logits.max(axis=1, keepdims=True))
+        cumulative: np.ndarray = probabilities.cumsum(axis=1)
+        thresholds: np.ndarray = active_random().brains.uniform((len(logits), 1)) * cumulative[:, -1:]
+        return np.minimum((cumulative < thresholds).sum(axis=1), logits.shape[1] - 1)
+
+
+def load_numpy_policy(path: pathlib.Path) -> NumpyPolicy:
+    """ Exported .npz policy is loaded without torch, a stable_baselines3 .zip is converted on load """
+
+    if path.suffix == '.npz':
+        return NumpyPolicy.load(path)
+    from stable_baselines3 import PPO
+    return NumpyPolicy.from_model(PPO.load(path))
+
+
+numpy_policy_registry = ModelRegistry(loader=load_numpy_policy)
+
+
+class NumpyBrain(InferenceBrain):
+    """ Inference only brain over a NumpyPolicy, children share the policy """
+
+    registry: ModelRegistry = numpy_policy_registry
+
+    def __init__(self, policy: NumpyPolicy, deterministic: bool = False):
+        self.policy: NumpyPolicy = policy
+        self.deterministic: bool = deterministic
+
+    @property
+    def model(self) -> NumpyPolicy:
+        return self.policy
+
+    @property
+    def observation_length(self) -> int:
+        return self.policy.observation_length
+
+    def options(self) -> Tuple:
+        return (self.deterministic,)
+
+    def get_copy(self) -> 'NumpyBrain':
+        return self.__class__(self.policy, self.deterministic)
+
+    def predict(self, observation: np.ndarray, deterministic: Optional[bool] = None, **kwargs) -> Tuple:
+        """ Same as stable_baselines3: a single observation gives a single action, a batch gives an array """
+
+        observation = np.asarray(observation)
+        actions: np.ndarray = self.policy.predict(
+            observation.reshape(-1, self.policy.observation_length),
+            self.deterministic if deterministic is None else deterministic,
+        )
+        return (actions[0] if observation.ndim == 1 else actions), None
+
+    def predict_batch(self, observations: np.ndarray) -> np.ndarray:
+        return self.policy.predict(observations, self.deterministic)
+
+
+def get_numpy_brain(model_name: str, deterministic: bool = False) -> NumpyBrain:
+    """ Brain of a saved model (.zip or exported .npz), the policy is loaded once and shared """
+
+    return NumpyBrain(numpy_policy_registry.load(model_name), deterministic=deterministic)
@@ -0,0 +1,102 @@
+import hashlib
+import pathlib
+import threading
+import weakref
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from stable_baselines3 import PPO
+
+from contrib.utils import logger
+
+# Saved models and training checkpoints live under the package, wherever the process was started from
+TRAINING_DIR: pathlib.Path = pathlib.Path(__file__).resolve().parent.parent / 'Training'
+SAVED_MODELS_DIR: pathlib.Path = TRAINING_DIR / 'saved_models'
+
+
+class ModelRegistry:
+    """ Loads saved models on first use and caches them by path and content hash, so every brain and sustain service
+    that asks for the same file shares one loaded model """
+
+    def __init__(self, loader: Callable[[pathlib.Path], Any] = PPO.load):
+        self.loader: Callable[[pathlib.Path], Any] = loader
+        self._models: Dict[str, Any] = {}
+        # id of a loaded model -> its file, so brains can be pickled as a reference to the file
+        self._paths: Dict[int, pathlib.Path] = {}
+        # path -> (mtime, size, digest), the file is hashed again only when it was changed on disk
+        self._digests: Dict[pathlib.Path, Tuple[int, int, str]] = {}
+        # Class attributes that keep a model of this registry, they forget it on clear
+        self._registered: 'weakref.WeakSet[RegisteredModel]' = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def load(self, path: Union[str, pathlib.Path]) -> Any:
+        path = self.resolve(path)
+        with self._lock:
+            digest: str = self._digest(path)
+            if digest not in self._models:
+                logger.info(f'Loading model {path.name}')
+                self._models[digest] = self.loader(path)
+                self._paths[id(self._models[digest])] = path
+            return self._models[digest]
+
+    def path_of(self, model: Any) -> Optional[pathlib.Path]:
+        """ File the model was loaded from, None for models that did not come from this registry """
+
+        return self._paths.get(id(model))
+
+    @staticmethod
+    def resolve(path: Union[str, pathlib.Path]) -> pathlib.Path:
+        """ Same lookup as stable_baselines3: bare names live in saved models dir, .zip suffix is optional """
+
+        path = pathlib.Path(path)
+        if not path.is_absolute() and not path.exists():
+            path = SAVED_MODELS_DIR / path
+        if not path.exists() and path.with_suffix('.zip').exists():
+            path = path.with_suffix('.zip')
+        return path.resolve()
+
+    def register(self, registered_model: 'RegisteredModel') -> None:
+        self._registered.add(registered_model)
+
+    def clear(self) -> None:
+        """ Forget the loaded models, registered class attributes load theirs again on the next access """
+
+        with self._lock:
+            self._models.clear()
+            self._digests.clear()
+            self._paths.clear()
+            for registered_model in self._registered:
+                registered_model.reset()
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+    def _digest(self, path: pathlib.Path) -> str:
+        stat = path.stat()
+        cached = self._digests.get(path)
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+        digest: str = hashlib.sha256(path.read_bytes()).hexdigest()
+        self._digests[path] = (stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
+
+model_registry = ModelRegistry()
+
+
+class RegisteredModel:
+    """ Class attribute that loads the model from the registry on first access and keeps the reference, so the hot
+    predict path does not touch the file system """
+
+    def __init__(self, path: Union[str, pathlib.Path], registry: ModelRegistry = model_registry):
+        self.path: Union[str, pathlib.Path] = path
+        self.registry: ModelRegistry = registry
+        self._model: Optional[Any] = None
+        registry.register(self)
+
+    def __get__(self, instance: Any, owner: type) -> Any:
+        if self._model is None:
+            self._model = self.registry.load(self.path)
+        return self._model
+
+    def reset(self) -> None:
+        self._model = None
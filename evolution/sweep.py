@@ -0,0 +1,281 @@
+import dataclasses
+import inspect
+import itertools
+import json
+import pathlib
+import time
+import traceback
+from dataclasses import dataclass
+from multiprocessing.connection import Connection, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from contrib.utils import logger, process_context
+from domain.exceptions import SweepWorkerError
+from domain.environment import Environment
+from domain.interfaces.setup import Setup
+from domain.rng import RandomService
+from evolution.learning import BackgroundLearner
+from run_setups import create_entities
+
+# Status of a run in the results file
+OK: str = 'ok'
+FAILED: str = 'failed'
+CRASHED: str = 'crashed'
+TIMEOUT: str = 'timeout'
+# Message of a worker that finished its imports and can take runs
+READY: str = 'ready'
+
+SetupFactory = Callable[..., Setup]
+
+
+@dataclass(frozen=True)
+class SweepRun:
+    """ One point of the sweep: keyword arguments of the setup factory and the seed of the run """
+
+    index: int
+    seed: int
+    parameters: Dict[str, Any]
+
+
+def parse_values(text: str) -> Tuple[str, List[Any]]:
+    """ 'name=1,2,3' of the command line into the name and its values, numbers are converted """
+
+    name, _, values = text.partition('=')
+    if not name or not values:
+        raise ValueError(f'Expected name=value[,value...], got {text!r}')
+    return name, [_parse_value(value) for value in values.split(',')]
+
+
+def _parse_value(value: str) -> Any:
+    for convert in (int, float):
+        try:
+            return convert(value)
+        except ValueError:
+            pass
+    return value
+
+
+def grid_runs(
+        factory: SetupFactory, varied: Dict[str, Sequence], fixed: Optional[Dict[str, Any]] = None, seed: int = 0,
+) -> List[SweepRun]:
+    """ Every combination of the varied values, run i is seeded seed + i """
+
+    names: List[str] = list(varied)
+    points: List[Dict[str, Any]] = [
+        {**(fixed or {}), **dict(zip(names, values))} for values in itertools.product(*(varied[name] for name in names))
+    ]
+    return _runs(factory, points, seed)
+
+
+def sampled_runs(
+        factory: SetupFactory,
+        varied: Dict[str, Sequence],
+        samples: int,
+        fixed: Optional[Dict[str, Any]] = None,
+        seed: int = 0,
+) -> List[SweepRun]:
+    """ Given amount of points, each value picked uniformly from its sequence (a range works too). The points are
+    drawn from the seed, so the same seed gives the same sweep """
+
+    stream = RandomService(seed).stream('sweep')
+    points: List[Dict[str, Any]] = [
+        {**(fixed or {}), **{name: stream.choice(values) for name, values in varied.items()}} for _ in range(samples)
+    ]
+    return _runs(factory, points, seed)
+
+
+def _runs(factory: SetupFactory, points: List[Dict[str, Any]], seed: int) -> List[SweepRun]:
+    signature: inspect.Signature = inspect.signature(factory)
+    for point in points:
+        # A missing or misspelled parameter would fail every run in the workers, it is reported before they start
+        signature.bind(**point)
+    return [SweepRun(index=index, seed=seed + index, parameters=point) for index, point in enumerate(points)]
+
+
+def simulate(setup: Setup, max_cycles: int) -> Dict[str, Any]:
+    """ Headless run of the setup until the population dies out, the setup cycle length or max cycles. Returns the
+    final and peak counters of the run """
+
+    environment = Environment(
+        window_width=setup.window.width,
+        window_height=setup.window.height,
+        sustain_services=setup.sustain_services,
+        grid_class=setup.grid_class,
+        seed=setup.seed,
+    )
+    environment.setup_initial_state(create_entities(setup, environment.rng))
+    cycles: int = min(filter(None, (setup.cycle_length, max_cycles)))
+    peak_herbivores, peak_predators = environment.herbivores_amount, environment.predators_amount
+    started_at: float = time.perf_counter()
+    try:
+        while environment.cycle < cycles and not environment.game_over:
+            environment.step_living_regime()
+            peak_herbivores = max(peak_herbivores, environment.herbivores_amount)
+            peak_predators = max(peak_predators, environment.predators_amount)
+    finally:
+        BackgroundLearner.shutdown_all()
+
+    return {
+        'cycles': environment.cycle,
+        'extinct': environment.game_over,
+        'herbivores': environment.herbivores_amount,
+        'predators': environment.predators_amount,
+        'herbivores_health': environment.herbivores_health,
+        'predators_health': environment.predators_health,
+        'herbivore_food': environment.herbivore_food_amount,
+        'peak_herbivores': peak_herbivores,
+        'peak_predators': peak_predators,
+        'elapsed': round(time.perf_counter() - started_at, 3),
+    }
+
+
+def run_point(factory: SetupFactory, run: SweepRun, max_cycles: int) -> Dict[str, Any]:
+    if 'seed' in inspect.signature(factory).parameters:
+        # The factory seeds what it builds besides the setup, like the environments of the trainers
+        setup: Setup = factory(**run.parameters, seed=run.seed)
+    else:
+        setup = dataclasses.replace(factory(**run.parameters), seed=run.seed)
+    return simulate(setup, max_cycles)
+
+
+def _sweep_worker(factory: SetupFactory, max_cycles: int, connection: Connection) -> None:
+    """ Worker process: reports that its imports are done, then runs the points it gets until None comes """
+
+    connection.send((READY, None))
+    while (run := connection.recv()) is not None:
+        try:
+            outcome: tuple = (OK, run_point(factory, run, max_cycles))
+        except Exception:  # noqa
+            outcome = (FAILED, traceback.format_exc())
+        connection.send(outcome)
+
+
+class _Worker:
+    """ Coordinator side of a worker process and the run it is busy with """
+
+    def __init__(self, context, factory: SetupFactory, max_cycles: int):
+        self.connection, worker_connection = context.Pipe()
+        # Not a daemon, runs with background learning start processes of their own
+        self.process = context.Process(target=_sweep_worker, args=(factory, max_cycles, worker_connection))
+        self.process.start()
+        worker_connection.close()
+        self.ready: bool = False
+        self.run: Optional[SweepRun] = None
+        self.started: float = 0.0
+
+    def assign(self, run: SweepRun) -> None:
+        self.connection.send(run)
+        self.run = run
+        self.started = time.monotonic()
+
+    def stop(self) -> None:
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join()
+        self.connection.close()
+
+
+def _record(run: SweepRun, status: str, outcome: Any) -> Dict[str, Any]:
+    record: Dict[str, Any] = {'run': run.index, 'seed': run.seed, 'parameters': run.parameters, 'status': status}
+    if status == OK:
+        record['metrics'] = outcome
+    else:
+        record['error'] = outcome
+    return record
+
+
+def read_sweep_results(path: pathlib.Path) -> List[Dict[str, Any]]:
+    """ Records of a results file, a line cut off by a killed sweep is skipped """
+
+    records: List[Dict[str, Any]] = []
+    with open(path) as file:
+        for line in file:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                logger.warning(f'Skipped a broken line of {path}')
+    return records
+
+
+def run_sweep(
+        factory: SetupFactory,
+        runs: Sequence[SweepRun],
+        output: pathlib.Path,
+        workers: int = 1,
+        max_cycles: int = 1000,
+        timeout: Optional[float] = None,
+        resume: bool = False,
+) -> List[Dict[str, Any]]:
+    """ Runs the sweep and appends one JSON line per finished run to the output. Runs are handed to worker processes
+    one at a time, a run that raises is recorded as failed. A run that crashes its worker or exceeds the timeout in
+    seconds is recorded with that status and the worker is replaced, so the sweep goes on. 0 workers runs everything in
+    this process. With resume the runs that already succeeded in the output are skipped. The factory has to be
+    picklable, e.g. a module level function """
+
+    output = pathlib.Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    done: Set[int] = set()
+    if resume and output.exists():
+        done = {record['run'] for record in read_sweep_results(output) if record['status'] == OK}
+    pending: List[SweepRun] = [run for run in runs if run.index not in done]
+    logger.info(f'Sweep of {len(runs)} runs, {len(pending)} to go')
+
+    records: List[Dict[str, Any]] = []
+    with open(output, 'a') as file:
+        def finish(run: SweepRun, status: str, outcome: Any) -> None:
+            record: Dict[str, Any] = _record(run, status, outcome)
+            file.write(json.dumps(record) + '\n')
+            file.flush()
+            records.append(record)
+            logger.info(f'Run {run.index} {status}, {len(records)}/{len(pending)} done')
+
+        if workers == 0:
+            for run in pending:
+                try:
+                    finish(run, OK, run_point(factory, run, max_cycles))
+                except Exception:  # noqa
+                    finish(run, FAILED, traceback.format_exc())
+            return records
+
+        context = process_context()
+        queue: List[SweepRun] = list(reversed(pending))
+        pool: List[_Worker] = [_Worker(context, factory, max_cycles) for _ in range(min(workers, len(pending)))]
+        try:
+            while queue or any(worker.run for worker in pool):
+                for worker in pool:
+                    if worker.ready and worker.run is None and queue:
+                        worker.assign(queue.pop())
+
+                busy: List[_Worker] = [worker for worker in pool if worker.run]
+                wait_for: Optional[float] = None
+                if timeout is not None and busy:
+                    wait_for = max(min(worker.started for worker in busy) + timeout - time.monotonic(), 0)
+                for connection in wait([worker.connection for worker in pool], timeout=wait_for):
+                    index: int = next(i for i, worker in enumerate(pool) if worker.connection is connection)
+                    worker: _Worker = pool[index]
+                    try:
+                        status, outcome = connection.recv()
+                    except EOFError:
+                        worker.stop()
+                        if worker.run is None:
+                            raise SweepWorkerError(f'Sweep worker exited with code {worker.process.exitcode}')
+                        finish(worker.run, CRASHED, f'Worker exited with code {worker.process.exitcode}')
+                        pool[index] = _Worker(context, factory, max_cycles)
+                        continue
+                    if status == READY:
+                        worker.ready = True
+                    else:
+                        finish(worker.run, status, outcome)
+                        worker.run = None
+
+                for index, worker in enumerate(pool):
+                    if timeout is not None and worker.run and time.monotonic() - worker.started >= timeout:
+                        worker.stop()
+                        finish(worker.run, TIMEOUT, f'Exceeded {timeout}s')
+                        pool[index] = _Worker(context, factory, max_cycles)
+        finally:
+            for worker in pool:
+                if worker.process.is_alive() and worker.run is None:
+                    worker.connection.send(None)
+                worker.stop()
+    return records
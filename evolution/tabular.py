@@ -0,0 +1,115 @@
+import pathlib
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+from domain.exceptions import UnsupportedPolicy
+from domain.rng import active_random
+from evolution.brain import InferenceBrain
+from evolution.registry import ModelRegistry
+
+ONE_CELL_OBSERVATION_LENGTH: int = 9
+DISTILLATION_BATCH_SIZE: int = 16384
+
+
+def enumerate_observations(categories: int, observation_length: int = ONE_CELL_OBSERVATION_LENGTH) -> np.ndarray:
+    """ Every possible observation, row i is the observation whose base-categories digits give i """
+
+    indices: np.ndarray = np.arange(categories ** observation_length)
+    return np.stack(np.unravel_index(indices, (categories,) * observation_length), axis=1).astype(np.uint8)
+
+
+def distill_action_table(
+        model, batch_size: int = DISTILLATION_BATCH_SIZE, deterministic: bool = False,
+) -> np.ndarray:
+    """ Policy of the model for every one-cell observation, predicted once in batches. By default the table keeps the
+    cumulative action probabilities, (observations, actions) float32, and the brain samples them like the model does
+    in the live modes. Deterministic table holds only the argmax action of every observation, uint8, and the brain
+    over it always takes the most likely action, which changes the behaviour of a stochastic model """
+
+    nvec: Optional[np.ndarray] = getattr(model.observation_space, 'nvec', None)
+    if nvec is None or len(nvec) != ONE_CELL_OBSERVATION_LENGTH or len(set(nvec)) != 1:
+        raise UnsupportedPolicy('Only one cell MultiDiscrete observations with equal categories can be tabulated')
+
+    observations: np.ndarray = enumerate_observations(int(nvec[0]))
+    if deterministic:
+        table: np.ndarray = np.empty(len(observations), dtype=np.uint8)
+    else:
+        table = np.empty((len(observations), model.action_space.n), dtype=np.float32)
+    for start in range(0, len(observations), batch_size):
+        batch: np.ndarray = observations[start:start + batch_size]
+        if deterministic:
+            table[start:start + batch_size], _ = model.predict(batch, deterministic=True)
+        else:
+            cumulative: np.ndarray = action_probabilities(model, batch).cumsum(axis=1)
+            table[start:start + batch_size] = cumulative / cumulative[:, -1:]
+    return table
+
+
+def action_probabilities(model, observations: np.ndarray) -> np.ndarray:
+    """ Probabilities of the actions of a stable_baselines3 model for a batch of observations """
+
+    import torch
+
+    observations_tensor, _ = model.policy.obs_to_tensor(observations)
+    with torch.no_grad():
+        distribution = model.policy.get_distribution(observations_tensor)
+    return distribution.distribution.probs.cpu().numpy()
+
+
+def load_action_table(path: pathlib.Path) -> np.ndarray:
+    """ Saved .npy table is loaded as is, a stable_baselines3 .zip model is distilled into a stochastic table on load """
+
+    if path.suffix == '.npy':
+        return np.load(path)
+    from stable_baselines3 import PPO
+    return distill_action_table(PPO.load(path))
+
+
+action_table_registry = ModelRegistry(loader=load_action_table)
+
+
+class TabularBrain(InferenceBrain):
+    """ Inference only brain over an action table of a one-cell policy: the observation is read as a base-categories
+    number and indexes the table. The action is the entry of a deterministic table, or a sample of the cumulative
+    probabilities in the row of a stochastic one """
+
+    registry: ModelRegistry = action_table_registry
+    observation_length: int = ONE_CELL_OBSERVATION_LENGTH
+
+    def __init__(self, table: np.ndarray):
+        categories: int = int(round(len(table) ** (1 / ONE_CELL_OBSERVATION_LENGTH)))
+        if categories ** ONE_CELL_OBSERVATION_LENGTH != len(table):
+            raise UnsupportedPolicy(f'Table of {len(table)} actions does not cover one cell observations')
+        self.table: np.ndarray = table
+        self.place_values: np.ndarray = categories ** np.arange(ONE_CELL_OBSERVATION_LENGTH - 1, -1, -1)
+
+    @property
+    def model(self) -> np.ndarray:
+        return self.table
+
+    def get_copy(self) -> 'TabularBrain':
+        brain = self.__class__.__new__(self.__class__)
+        brain.table = self.table
+        brain.place_values = self.place_values
+        return brain
+
+    def predict(self, observation: np.ndarray, *args, **kwargs) -> Tuple:
+        """ Single observation gives a single action, a batch gives an array """
+
+        observation = np.asarray(observation)
+        actions: np.ndarray = self.predict_batch(observation.reshape(-1, ONE_CELL_OBSERVATION_LENGTH))
+        return (actions[0] if observation.ndim == 1 else actions), None
+
+    def predict_batch(self, observations: np.ndarray) -> np.ndarray:
+        rows: np.ndarray = self.table[observations @ self.place_values]
+        if self.table.ndim == 1:
+            return rows
+        thresholds: np.ndarray = active_random().brains.uniform((len(rows), 1))
+        return np.minimum((rows < thresholds).sum(axis=1), rows.shape[1] - 1)
+
+
+def get_tabular_brain(model_name: Union[str, pathlib.Path]) -> TabularBrain:
+    """ Brain of a saved one-cell model (.zip or distilled .npy), the table is built once and shared """
+
+    return TabularBrain(action_table_registry.load(model_name))
@@ -1,16 +1,21 @@
 from abc import ABC
 from enum import EnumMeta
-from typing import List, Tuple, Optional
+from typing import Tuple, Optional, TYPE_CHECKING, Type, List, Any, Dict
 
 import gym
 import numpy as np
 from gym.spaces import Discrete, MultiDiscrete
+from stable_baselines3.common.vec_env.base_vec_env import VecEnv, VecEnvIndices
 
 from evolution.brain import ControlledBrain
 from domain.entities import Herbivore, Predator, HerbivoreMatrixConverter, PredatorMatrixConverter
-from domain.environment import Environment
-from domain.interfaces.objects import ObservationRange
-from visualization.visualize import Visualizer
+from domain.environment import Environment, EnvironmentSnapshot
+from domain.grid import OBSERVATION_RADIUS
+from domain.interfaces.entities import AliveEntity
+from domain.interfaces.objects import ObservationRange, Movement
+
+if TYPE_CHECKING:
+    from visualization.visualize import Visualizer
 
 
 class EntityTrainer(gym.Env, ABC):
@@ -21,9 +26,15 @@ class EntityTrainer(gym.Env, ABC):
             max_live_training_length: int,
             health_after_birth: int,
             observation_range: ObservationRange,
-            visualizer: Optional[Visualizer] = None,
+            visualizer: Optional['Visualizer'] = None,
+            template_pool_size: int = 0,
     ):
+        """ With template pool size the first resets generate initial layouts as usual and keep snapshots of them
+        together with their mirrored variants, further resets restore a random one and only place the entity """
+
         self.environment: Environment = environment
+        self.template_pool_size: int = template_pool_size
+        self.templates: List[EnvironmentSnapshot] = []
         self.action_space = Discrete(len(movement_class))
         self.visualizer = visualizer
         self.max_live_training_length: int = max_live_training_length
@@ -57,18 +68,48 @@ class EntityTrainer(gym.Env, ABC):
         if not done:
             observation: np.ndarray = self._get_entity_observation()
         else:
-            observation: np.ndarray = np.array([[0 for _ in range(3)] for _ in range(3)]).ravel()
+            observation: np.ndarray = np.zeros(self.observation_space.shape, dtype=np.uint8)
 
         return observation, reward, done, {}
 
+    def _setup_environment(self) -> None:
+        if not self.template_pool_size:
+            self.environment.setup_initial_state([self.entity])
+            return
+        if len(self.templates) < self.template_pool_size * 4:
+            self.environment.setup_initial_state([self.entity])
+            self._add_templates()
+        self.environment.restore(self.environment.rng.training.choice(self.templates))
+        self.environment.set_object_randomly_in_environment(self.entity)
+
+    def _add_templates(self) -> None:
+        """ Layout that was just generated and its three mirrored variants """
+
+        base: EnvironmentSnapshot = self.environment.snapshot(exclude=[self.entity])
+        self.templates.append(base)
+        for horizontal, vertical in ((True, False), (False, True), (True, True)):
+            self.environment.restore(base)
+            self.environment.flip(horizontal, vertical)
+            self.templates.append(self.environment.snapshot())
+
     def _get_entity_observation(self) -> np.ndarray:
-        state_around_obj_list: List[List] = self.environment.get_living_object_observation(self.entity)
-        return self.matrix_converted.from_environment_to_stable_baseline(state_around_obj_list)
+        cell_types: np.ndarray = self.environment.get_living_objects_observations(
+            self.observation_range, [self.entity],
+        )
+        return self.matrix_converted.from_cell_types(cell_types[0])
 
     def render(self, mode="human"):
         if mode == 'human' and self.visualizer:
             self.visualizer.render_step(self.environment.matrix)
 
+    def random_state(self) -> Dict[str, Any]:
+        """ States of the random streams of the environment, saved with the checkpoints """
+
+        return self.environment.rng.get_state()
+
+    def set_random_state(self, state: Dict[str, Any]) -> None:
+        self.environment.rng.set_state(state)
+
 
 class HerbivoreTrainer(EntityTrainer):
     """ Trainer for herbivore entities """
@@ -77,9 +118,9 @@ class HerbivoreTrainer(EntityTrainer):
         super(HerbivoreTrainer, self).__init__(*args, **kwargs)
         self.matrix_converted = HerbivoreMatrixConverter()
         self.observation_space = (
-            MultiDiscrete([4] * 9)
+            MultiDiscrete([4] * 9, dtype=np.uint8)
             if self.observation_range == ObservationRange.ONE_CELL_AROUND
-            else MultiDiscrete([4] * 25)
+            else MultiDiscrete([4] * 25, dtype=np.uint8)
         )
 
     def reset(self) -> np.ndarray:
@@ -89,13 +130,9 @@ class HerbivoreTrainer(EntityTrainer):
             brain=ControlledBrain(observation_width=self.observation_range),
             birth_config=None,
         )
-        self.environment.setup_initial_state([self.entity])
+        self._setup_environment()
         return self._get_entity_observation()
 
-    def _get_entity_observation(self) -> np.ndarray:
-        state_around_obj_list: List[List] = self.environment.get_living_object_observation(self.entity)
-        return self.matrix_converted.from_environment_to_stable_baseline(state_around_obj_list)
-
 
 class PredatorTrainer(EntityTrainer):
     """ Custom Gym environment that runs training process """
@@ -104,9 +141,9 @@ class PredatorTrainer(EntityTrainer):
         super(PredatorTrainer, self).__init__(*args, **kwargs)
         self.matrix_converted = PredatorMatrixConverter()
         self.observation_space = (
-            MultiDiscrete([3] * 9)
+            MultiDiscrete([3] * 9, dtype=np.uint8)
             if self.observation_range == ObservationRange.ONE_CELL_AROUND
-            else MultiDiscrete([3] * 25)
+            else MultiDiscrete([3] * 25, dtype=np.uint8)
         )
 
     def reset(self) -> np.ndarray:
@@ -116,5 +153,105 @@ class PredatorTrainer(EntityTrainer):
             brain=ControlledBrain(self.observation_range),
             birth_config=None,
         )
-        self.environment.setup_initial_state([self.entity])
+        self._setup_environment()
         return self._get_entity_observation()
+
+
+class SpeciesTrainer(VecEnv):
+    """ Multi-agent trainer: every slot is an entity of the trained species living in the same environment and driven
+    by one shared policy. Observations, actions and rewards of all slots are exchanged as arrays once per cycle, an
+    entity that died or lived long enough is replaced by a newborn in its slot """
+
+    def __init__(
+            self,
+            entity_class: Type[AliveEntity],
+            environment: Environment,
+            n_agents: int,
+            max_live_training_length: int,
+            health_after_birth: int,
+            observation_range: ObservationRange,
+    ):
+        self.entity_class: Type[AliveEntity] = entity_class
+        self.environment: Environment = environment
+        self.max_live_training_length: int = max_live_training_length
+        self.health_after_birth: int = health_after_birth
+        self.observation_range: ObservationRange = observation_range
+        self.matrix_converted = self._newborn().matrix_converted
+        observation_side: int = 2 * OBSERVATION_RADIUS[observation_range] + 1
+        super(SpeciesTrainer, self).__init__(
+            num_envs=n_agents,
+            observation_space=MultiDiscrete(
+                [int(self.matrix_converted.lookup_table.max()) + 1] * observation_side ** 2, dtype=np.uint8,
+            ),
+            action_space=Discrete(len(Movement)),
+        )
+        self.agents: List[AliveEntity] = []
+        self.actions: Optional[np.ndarray] = None
+
+    def _newborn(self) -> AliveEntity:
+        return self.entity_class(
+            name='Species trainer entity',
+            health=self.health_after_birth,
+            brain=ControlledBrain(self.observation_range),
+            birth_config=None,
+        )
+
+    def _get_observations(self) -> np.ndarray:
+        cell_types: np.ndarray = self.environment.get_living_objects_observations(self.observation_range, self.agents)
+        return self.matrix_converted.from_cell_types(cell_types)
+
+    def reset(self) -> np.ndarray:
+        self.agents = [self._newborn() for _ in range(self.num_envs)]
+        self.environment.setup_initial_state(self.agents)
+        return self._get_observations()
+
+    def step_async(self, actions: np.ndarray) -> None:
+        self.actions = actions
+
+    def step_wait(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[dict]]:
+        previous_health: np.ndarray = np.array([agent.health for agent in self.agents])
+        self.environment.step_living_regime(decisions=dict(zip(self.agents, self.actions)))
+
+        health: np.ndarray = np.array([agent.health for agent in self.agents])
+        eaten: np.ndarray = np.array([agent.eaten for agent in self.agents])
+        rewards: np.ndarray = np.where(eaten, -5, (health > previous_health).astype(np.float32)).astype(np.float32)
+        dones: np.ndarray = np.array([
+            agent.is_dead or agent.lived_for >= self.max_live_training_length for agent in self.agents
+        ])
+
+        infos: List[dict] = [{} for _ in range(self.num_envs)]
+        for slot in np.flatnonzero(dones):
+            agent: AliveEntity = self.agents[slot]
+            if agent in self.environment.alive_entities_coords:
+                self.environment.remove_entity(agent)
+            infos[slot]['terminal_observation'] = np.zeros(self.observation_space.shape, dtype=np.uint8)
+            self.agents[slot] = self._newborn()
+            self.environment.set_object_randomly_in_environment(self.agents[slot])
+
+        return self._get_observations(), rewards, dones, infos
+
+    def close(self) -> None:
+        pass
+
+    def random_state(self) -> Dict[str, Any]:
+        """ States of the random streams of the environment, saved with the checkpoints """
+
+        return self.environment.rng.get_state()
+
+    def set_random_state(self, state: Dict[str, Any]) -> None:
+        self.environment.rng.set_state(state)
+
+    def seed(self, seed: Optional[int] = None) -> List[Optional[int]]:
+        return [None] * self.num_envs
+
+    def get_attr(self, attr_name: str, indices: VecEnvIndices = None) -> List[Any]:
+        return [getattr(self, attr_name)] * len(self._get_indices(indices))
+
+    def set_attr(self, attr_name: str, value: Any, indices: VecEnvIndices = None) -> None:
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name: str, *method_args, indices: VecEnvIndices = None, **method_kwargs) -> List[Any]:
+        return [getattr(self, method_name)(*method_args, **method_kwargs)] * len(self._get_indices(indices))
+
+    def env_is_wrapped(self, wrapper_class: Type[gym.Wrapper], indices: VecEnvIndices = None) -> List[bool]:
+        return [False] * len(self._get_indices(indices))
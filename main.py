@@ -1,67 +1,113 @@
 import argparse
-import random
-from typing import List
+import dataclasses
+import inspect
+import pathlib
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
 
-import pygame
+import numpy as np
+from stable_baselines3 import PPO
 
 from contrib.utils import logger
 from domain.entities import EntityType
 from domain.environment import Environment
+from domain.grid import ArrayGrid
 from domain.interfaces.entities import AliveEntity
 from domain.interfaces.objects import ObservationRange
+from domain.replay import Replay
 from domain.utils import StatisticsCollector
+from evolution.evaluation import EvaluationSetup, ModelEvaluation, evaluate_models
+from evolution.learning import BackgroundLearner
+from evolution.numpy_policy import NumpyPolicy
+from evolution.registry import ModelRegistry
+from evolution.sweep import SweepRun, grid_runs, parse_values, run_sweep, sampled_runs
+from evolution.tabular import distill_action_table
 from domain.interfaces.setup import Setup
 from run_setups import (
+    create_entities,
     train_the_best_entity,
     setup_for_real_time_training_visualization_herb_evolving,
     setup_for_real_time_training_visualization_predator_evolving
 )
-from visualization.visualize import Visualizer
 
 
 class Runner:
     def __init__(
             self,
             setup: Setup,
+            headless: bool = False,
+            max_cycles: Optional[int] = None,
+            time_budget: Optional[float] = None,
+            statistics_interval: int = 1,
+            record_replay: Optional[str] = None,
     ):
+        """ Headless runner never imports pygame and steps as fast as possible. The run stops at the setup cycle
+        length, max cycles or after time budget seconds, whichever comes first. Statistics are recorded every
+        statistics interval cycles. With record replay every cycle is recorded into that replay file """
+
         self.setup: Setup = setup
+        self.headless: bool = headless
+        self.max_cycles: Optional[int] = max_cycles
+        self.time_budget: Optional[float] = time_budget
+        self.record_replay: Optional[str] = record_replay
+        self.cycles_per_second: float = 0.0
         self.environment = Environment(
             window_width=setup.window.width,
             window_height=self.setup.window.height,
             sustain_services=self.setup.sustain_services,
+            grid_class=self.setup.grid_class,
+            seed=self.setup.seed,
+        )
+        self.visualizer = None
+        if not self.headless:
+            from visualization.visualize import Visualizer
+            self.visualizer = Visualizer(self.environment)
+        self.statistics_collector = StatisticsCollector(
+            environment=self.environment, filename='stat', interval=statistics_interval,
         )
-        self.visualizer: Visualizer = Visualizer(self.environment)
-        self.statistics_collector = StatisticsCollector(environment=self.environment, filename='stat')
 
     def run(self):
-        entities: List[AliveEntity] = [
-            entity_setup.entity_type(
-                health=entity_setup.initial_health,
-                name=f"{entity_setup.entity_type.__name__}#{random.randint(1, 10000)}",
-                brain=entity_setup.brain(),  # noqa
-                birth_config=entity_setup.birth,
-            )
-            for entity_setup in self.setup.entities
-            for _ in range(entity_setup.entities_amount)
-        ]
+        entities: List[AliveEntity] = create_entities(self.setup, self.environment.rng)
 
         self.environment.setup_initial_state(entities=entities)
+        if self.record_replay:
+            self.environment.start_recording(self.record_replay)
 
+        started_at: float = time.perf_counter()
         run = True
-        while run:
-            state_to_render, _ = self.environment.step_living_regime()
-            self.visualizer.render_step(state_to_render)
-            self.statistics_collector.make_snapshot()
+        try:
+            while run:
+                state_to_render, _ = self.environment.step_living_regime()
+                if self.visualizer:
+                    self.visualizer.render_step(state_to_render)
+                self.statistics_collector.make_snapshot()
+
+                if self.setup.cycle_length and self.environment.cycle >= self.setup.cycle_length:
+                    run = False
+
+                if self.max_cycles and self.environment.cycle >= self.max_cycles:
+                    run = False
 
-            if self.setup.cycle_length and self.environment.cycle >= self.setup.cycle_length:
-                run = False
+                if self.time_budget and time.perf_counter() - started_at >= self.time_budget:
+                    run = False
 
-            if self.environment.game_over:
-                run = False
+                if self.environment.game_over:
+                    run = False
+        finally:
+            # Statistics recorded so far are kept even if the run fails
+            self.statistics_collector.dump_to_file()
+            self.environment.stop_recording()
+            BackgroundLearner.shutdown_all()
 
-        pygame.quit()
-        self.statistics_collector.dump_to_file()
+        elapsed: float = time.perf_counter() - started_at
+        self.cycles_per_second = self.environment.cycle / elapsed if elapsed > 0 else 0.0
+
+        if self.visualizer:
+            import pygame
+            pygame.quit()
         logger.info(f'Game was closed {self.environment.cycle=}')
+        logger.info(f'{self.environment.cycle} cycles in {elapsed:.2f}s, {self.cycles_per_second:.1f} cycles/sec')
 
 
 if __name__ == '__main__':
@@ -96,6 +142,27 @@ if __name__ == '__main__':
         '--path_for_saving', type=str, metavar='PATH_FOR_SAVING', required=True,
         help='Path for saving the model',
     )
+    train_the_best_model.add_argument(
+        '--n_envs', type=int, metavar='N_ENVS', default=1,
+        help='Amount of trainer environments stepping in parallel worker processes',
+    )
+    train_the_best_model.add_argument(
+        '--n_agents', type=int, metavar='N_AGENTS', default=1,
+        help='Amount of entities of the species that learn one shared policy in the same environment',
+    )
+    train_the_best_model.add_argument(
+        '--checkpoint_frequency', type=int, metavar='STEPS', default=0,
+        help='Save a checkpoint every this many steps in background, 0 to disable',
+    )
+    train_the_best_model.add_argument(
+        '--keep_checkpoints', type=int, metavar='K', default=3, help='Amount of the latest checkpoints kept on disk',
+    )
+    train_the_best_model.add_argument(
+        '--resume', action='store_true', help='Continue from the latest checkpoint of the model',
+    )
+    train_the_best_model.add_argument(
+        '--seed', type=int, metavar='SEED', default=None, help='Seed of the trainers and the model',
+    )
 
     herbivore_visualization_train_from_scratch = command_parser.add_parser(
         'herbivore_visualization_train_from_scratch',
@@ -215,6 +282,128 @@ if __name__ == '__main__':
         help='Initial predator health', default=10,
     )
 
+    for visualization_parser in (
+            herbivore_visualization_train_from_scratch, predator_visualization_train_from_scratch,
+    ):
+        visualization_parser.add_argument(
+            '--headless', action='store_true', help='Run without pygame window as fast as possible',
+        )
+        visualization_parser.add_argument(
+            '--max_cycles', type=int, metavar='MAX_CYCLES', default=None, help='Stop after this amount of cycles',
+        )
+        visualization_parser.add_argument(
+            '--time_budget', type=float, metavar='SECONDS', default=None,
+            help='Stop after this amount of wall clock seconds',
+        )
+        visualization_parser.add_argument(
+            '--array_grid', action='store_true', help='Store the environment cells in numpy arrays',
+        )
+        visualization_parser.add_argument(
+            '--seed', type=int, metavar='SEED', default=None,
+            help='Seed of the run, the same seed replays the same run when the brains learn inline',
+        )
+        visualization_parser.add_argument(
+            '--statistics_interval', type=int, metavar='CYCLES', default=1,
+            help='Record the statistics every this amount of cycles',
+        )
+        visualization_parser.add_argument(
+            '--record_replay', type=str, metavar='PATH', default=None,
+            help='Record every cycle into a replay file that play_replay shows afterwards',
+        )
+        visualization_parser.add_argument(
+            '--learning_workers', type=int, metavar='WORKERS', default=0,
+            help='Processes that train the brains in background, 0 to learn inside the simulation loop',
+        )
+
+    export_numpy_policy = command_parser.add_parser(
+        'export_numpy_policy', help='Export the policy of a saved model for inference without torch',
+    )
+    export_numpy_policy.add_argument(
+        '--model_name', type=str, metavar='MODEL_NAME', required=True,
+        help='Name of the model in Training/saved_models or path to it',
+    )
+
+    distill_tabular_policy = command_parser.add_parser(
+        'distill_tabular_policy', help='Tabulate the actions of a saved one cell model for every observation',
+    )
+    distill_tabular_policy.add_argument(
+        '--model_name', type=str, metavar='MODEL_NAME', required=True,
+        help='Name of the model in Training/saved_models or path to it',
+    )
+    distill_tabular_policy.add_argument(
+        '--deterministic', action='store_true',
+        help='Keep only the most likely action of every observation instead of sampling the actions like the model',
+    )
+
+    evaluate_models_parser = command_parser.add_parser(
+        'evaluate_models', help='Compare saved models on seeded headless episodes',
+    )
+    evaluate_models_parser.add_argument(
+        '--model_names', type=str, nargs='+', metavar='MODEL_NAME', required=True,
+        help='Names of the models in Training/saved_models or paths to them, .npz and .npy exports are accepted too',
+    )
+    evaluate_models_parser.add_argument(
+        '--entity_type', choices=['predator', 'herbivore'], required=True, help='Type of the evaluated entities',
+    )
+    evaluate_models_parser.add_argument(
+        '--episodes', type=int, metavar='EPISODES', default=20, help='Amount of episodes per model',
+    )
+    evaluate_models_parser.add_argument(
+        '--workers', type=int, metavar='WORKERS', default=0,
+        help='Processes that run the episodes, 0 to run them in this process',
+    )
+    evaluate_models_parser.add_argument('--width', type=int, metavar='WIDTH', default=20, help='Width of the field')
+    evaluate_models_parser.add_argument('--height', type=int, metavar='HEIGHT', default=20, help='Height of the field')
+    evaluate_models_parser.add_argument(
+        '--population', type=int, metavar='POPULATION', default=10, help='Amount of evaluated entities per episode',
+    )
+    evaluate_models_parser.add_argument(
+        '--health', type=int, metavar='HEALTH', default=10, help='Initial health of the evaluated entities',
+    )
+    evaluate_models_parser.add_argument(
+        '--max_cycles', type=int, metavar='MAX_CYCLES', default=1000, help='Episode length limit',
+    )
+    evaluate_models_parser.add_argument(
+        '--seed', type=int, metavar='SEED', default=0, help='Seed of the first episode, the next ones count up',
+    )
+
+    sweep_parser = command_parser.add_parser(
+        'sweep', help='Headless runs of a setup over a grid or a random sample of its parameters',
+    )
+    sweep_parser.add_argument('--setup', choices=['herbivore', 'predator'], required=True, help='Setup to sweep')
+    sweep_parser.add_argument(
+        '--vary', nargs='+', metavar='NAME=VALUES', required=True,
+        help='Swept parameters of the setup with comma separated values, e.g. learning_frequency=2,4,8',
+    )
+    sweep_parser.add_argument(
+        '--fixed', nargs='+', metavar='NAME=VALUE', default=[],
+        help='Parameters that override the defaults of the setup command for every run',
+    )
+    sweep_parser.add_argument(
+        '--samples', type=int, metavar='SAMPLES', default=None,
+        help='Amount of randomly sampled points, every combination of the values is run if not given',
+    )
+    sweep_parser.add_argument('--workers', type=int, metavar='WORKERS', default=1, help='Processes that run the sweep')
+    sweep_parser.add_argument('--max_cycles', type=int, metavar='MAX_CYCLES', default=1000, help='Run length limit')
+    sweep_parser.add_argument(
+        '--timeout', type=float, metavar='SECONDS', default=None, help='Runs longer than this are stopped',
+    )
+    sweep_parser.add_argument(
+        '--seed', type=int, metavar='SEED', default=0, help='Seed of the first run, the next ones count up',
+    )
+    sweep_parser.add_argument(
+        '--output', type=str, metavar='PATH', default='statistics/sweep.ndjson',
+        help='File the results are appended to',
+    )
+    sweep_parser.add_argument('--resume', action='store_true', help='Skip the runs that already succeeded')
+
+    play_replay_parser = command_parser.add_parser('play_replay', help='Show a recorded replay')
+    play_replay_parser.add_argument('--path', type=str, metavar='PATH', required=True, help='Replay file')
+    play_replay_parser.add_argument('--fps', type=int, metavar='FPS', default=30, help='Frames per second')
+    play_replay_parser.add_argument(
+        '--start_cycle', type=int, metavar='CYCLE', default=0, help='Cycle the playback starts from',
+    )
+
     args = parser.parse_args()
 
     if args.command == 'train_the_best_model':
@@ -232,10 +421,15 @@ if __name__ == '__main__':
                 EntityType.HERBIVORE if args.entity_type == 'herbivore' else EntityType.PREDATOR
             ),
             save_path=args.path_for_saving,
+            n_envs=args.n_envs,
+            seed=args.seed,
+            n_agents=args.n_agents,
+            checkpoint_frequency=args.checkpoint_frequency,
+            keep_checkpoints=args.keep_checkpoints,
+            resume=args.resume,
         )
     elif args.command == 'herbivore_visualization_train_from_scratch':
-        Runner(
-            setup=setup_for_real_time_training_visualization_herb_evolving(
+        herbivore_setup: Setup = setup_for_real_time_training_visualization_herb_evolving(
                 width=args.width,
                 height=args.height,
                 amount_of_herb_food=args.amount_of_herb_food,
@@ -250,11 +444,22 @@ if __name__ == '__main__':
                 child_health_after_birth=args.child_health_after_birth,
                 birth_after_health_amount=args.birth_after_health_amount,
                 initial_herb_health=args.initial_herb_health,
-            )
+                learning_workers=args.learning_workers,
+                seed=args.seed,
+        )
+        Runner(
+            setup=dataclasses.replace(
+                herbivore_setup,
+                grid_class=ArrayGrid if args.array_grid else herbivore_setup.grid_class,
+            ),
+            headless=args.headless,
+            max_cycles=args.max_cycles,
+            time_budget=args.time_budget,
+            statistics_interval=args.statistics_interval,
+            record_replay=args.record_replay,
         ).run()
     elif args.command == 'predator_visualization_train_from_scratch':
-        Runner(
-            setup=setup_for_real_time_training_visualization_predator_evolving(
+        predator_setup: Setup = setup_for_real_time_training_visualization_predator_evolving(
                 width=args.width,
                 height=args.height,
                 amount_of_predator_food=args.amount_of_pred_food,
@@ -269,7 +474,77 @@ if __name__ == '__main__':
                 child_health_after_birth=args.child_health_after_birth,
                 birth_after_health_amount=args.birth_after_health_amount,
                 initial_pred_health=args.initial_pred_health,
-            )
+                learning_workers=args.learning_workers,
+                seed=args.seed,
+        )
+        Runner(
+            setup=dataclasses.replace(
+                predator_setup,
+                grid_class=ArrayGrid if args.array_grid else predator_setup.grid_class,
+            ),
+            headless=args.headless,
+            max_cycles=args.max_cycles,
+            time_budget=args.time_budget,
+            statistics_interval=args.statistics_interval,
+            record_replay=args.record_replay,
         ).run()
+    elif args.command == 'export_numpy_policy':
+        model_path = ModelRegistry.resolve(args.model_name)
+        NumpyPolicy.from_model(PPO.load(model_path)).save(model_path.with_suffix('.npz'))
+        logger.info(f'Policy exported to {model_path.with_suffix(".npz")}')
+    elif args.command == 'distill_tabular_policy':
+        model_path = ModelRegistry.resolve(args.model_name)
+        np.save(
+            model_path.with_suffix('.npy'),
+            distill_action_table(PPO.load(model_path), deterministic=args.deterministic),
+        )
+        logger.info(f'Action table saved to {model_path.with_suffix(".npy")}')
+    elif args.command == 'evaluate_models':
+        evaluations: List[ModelEvaluation] = evaluate_models(
+            model_names=args.model_names,
+            setup=EvaluationSetup(
+                entity_type=EntityType.HERBIVORE if args.entity_type == 'herbivore' else EntityType.PREDATOR,
+                window_width=args.width,
+                window_height=args.height,
+                population=args.population,
+                health=args.health,
+                max_cycles=args.max_cycles,
+            ),
+            episodes=args.episodes,
+            seed=args.seed,
+            workers=args.workers,
+        )
+        for evaluation in evaluations:
+            logger.info(
+                f'{evaluation.model_name}: survival {evaluation.survival}, food eaten {evaluation.food_eaten}, '
+                f'kills {evaluation.kills} ({evaluation.episodes} episodes, 95% confidence intervals)'
+            )
+    elif args.command == 'sweep':
+        factory, setup_parser = {
+            'herbivore': (setup_for_real_time_training_visualization_herb_evolving,
+                          herbivore_visualization_train_from_scratch),
+            'predator': (setup_for_real_time_training_visualization_predator_evolving,
+                         predator_visualization_train_from_scratch),
+        }[args.setup]
+        # Defaults of the matching visualization command, parameters that it names differently go to --fixed
+        fixed: Dict[str, Any] = {
+            name: setup_parser.get_default(name) for name in inspect.signature(factory).parameters
+            if setup_parser.get_default(name) is not None
+        }
+        fixed.update((name, values[0]) for name, values in map(parse_values, args.fixed))
+        varied: Dict[str, List[Any]] = dict(map(parse_values, args.vary))
+        runs: List[SweepRun] = (
+            sampled_runs(factory, varied, samples=args.samples, fixed=fixed, seed=args.seed) if args.samples
+            else grid_runs(factory, varied, fixed=fixed, seed=args.seed)
+        )
+        records = run_sweep(
+            factory, runs, output=pathlib.Path(args.output), workers=args.workers, max_cycles=args.max_cycles,
+            timeout=args.timeout, resume=args.resume,
+        )
+        statuses: Counter = Counter(record['status'] for record in records)
+        logger.info(f'Sweep finished: {dict(statuses)}, results in {args.output}')
+    elif args.command == 'play_replay':
+        from visualization.replay import ReplayPlayer
+        ReplayPlayer(Replay(args.path), fps=args.fps).play(start_cycle=args.start_cycle)
     else:
         raise ValueError('Unknown command')
@@ -1,9 +1,14 @@
-import os
+import pathlib
+import random
 from functools import partial
-from typing import List, Optional
+from typing import Callable, List, Optional
 
 from stable_baselines3 import PPO
+from stable_baselines3.common.callbacks import BaseCallback
+from stable_baselines3.common.utils import set_random_seed
+from stable_baselines3.common.vec_env import SubprocVecEnv, VecEnv, VecMonitor
 
+from contrib.utils import logger
 from domain.interfaces.environment import SustainEnvironmentService
 from evolution.brain import (
     BrainForTraining, get_user_trained_brain,
@@ -11,13 +16,39 @@ from evolution.brain import (
 from domain.entities import Predator, Herbivore, EntityType
 from domain.environment import Environment
 from domain.interfaces.setup import Setup, WindowSetup, EntitySetup, TrainSetup
-from domain.interfaces.entities import BirthSetup
+from domain.interfaces.entities import AliveEntity, BirthSetup
 from domain.interfaces.objects import Movement, ObservationRange
+from domain.rng import TORCH, TRAINER, RandomService, derived_seed
 from domain.service import (
     HerbivoreFoodSustainConstantService,
     HerbivoreSustainConstantService,
 )
-from evolution.training import HerbivoreTrainer, PredatorTrainer, EntityTrainer
+from evolution.callbacks import AsyncCheckpointCallback
+from evolution.checkpoints import CHECKPOINTS_DIR, latest_checkpoint, load_checkpoint
+from evolution.registry import SAVED_MODELS_DIR
+from evolution.training import HerbivoreTrainer, PredatorTrainer, EntityTrainer, SpeciesTrainer
+
+# Initial layouts a trainer generates before it starts restoring them on reset, each one also gives 3 mirrored variants
+TRAINER_TEMPLATE_POOL_SIZE: int = 16
+
+
+def create_entities(setup: Setup, rng: RandomService) -> List[AliveEntity]:
+    """ Initial population of the setup, named with a number drawn from the births stream. Brains are built with the
+    streams of the run active, and a seeded run seeds torch too: stochastic predictions of the models draw from it """
+
+    if setup.seed is not None:
+        set_random_seed(derived_seed(setup.seed, TORCH))
+    with rng.activated():
+        return [
+            entity_setup.entity_type(
+                health=entity_setup.initial_health,
+                name=f"{entity_setup.entity_type.__name__}#{rng.births.randint(1, 10000)}",
+                brain=entity_setup.brain(),  # noqa
+                birth_config=entity_setup.birth,
+            )
+            for entity_setup in setup.entities
+            for _ in range(entity_setup.entities_amount)
+        ]
 
 
 def setup_for_real_time_training_visualization_herb_evolving(
@@ -35,6 +66,8 @@ def setup_for_real_time_training_visualization_herb_evolving(
     child_health_after_birth: int,
     birth_after_health_amount: int,
     initial_herb_health: int,
+    learning_workers: int = 0,
+    seed: Optional[int] = None,
 ):
     window_setup = WindowSetup(
         width=width, height=height,
@@ -49,6 +82,7 @@ def setup_for_real_time_training_visualization_herb_evolving(
             learn_frequency=learning_frequency,
             learn_timesteps=learning_timesteps,
             learn_n_steps=learning_n_steps,
+            learning_workers=learning_workers,
         ),
         gym_trainer=HerbivoreTrainer(
             movement_class=Movement,
@@ -56,12 +90,14 @@ def setup_for_real_time_training_visualization_herb_evolving(
                 window_width=window_setup.width,
                 window_height=window_setup.height,
                 sustain_services=[basic_herbivore_food_service],
+                seed=derived_seed(seed, TRAINER),
             ),
             max_live_training_length=3000,
             health_after_birth=health_after_birth,
             observation_range=(
                 ObservationRange.ONE_CELL_AROUND if observation_range == 1 else ObservationRange.TWO_CELL_AROUND
             ),
+            template_pool_size=TRAINER_TEMPLATE_POOL_SIZE,
         )
     )
 
@@ -81,6 +117,7 @@ def setup_for_real_time_training_visualization_herb_evolving(
             ),
         ],
         sustain_services=[basic_herbivore_food_service],
+        seed=seed,
     )
 
 
@@ -99,6 +136,8 @@ def setup_for_real_time_training_visualization_predator_evolving(
     child_health_after_birth: int,
     birth_after_health_amount: int,
     initial_pred_health: int,
+    learning_workers: int = 0,
+    seed: Optional[int] = None,
 ) -> Setup:
     window_setup = WindowSetup(
         width=width,
@@ -111,6 +150,7 @@ def setup_for_real_time_training_visualization_predator_evolving(
             learn_frequency=learning_frequency,
             learn_timesteps=learning_timesteps,
             learn_n_steps=learning_n_steps,
+            learning_workers=learning_workers,
         ),
         gym_trainer=PredatorTrainer(
             movement_class=Movement,
@@ -123,12 +163,14 @@ def setup_for_real_time_training_visualization_predator_evolving(
                         initial_herbivore_health=predator_food_nutrition,
                     ),
                 ],
+                seed=derived_seed(seed, TRAINER),
             ),
             max_live_training_length=3000,
             health_after_birth=health_after_birth,
             observation_range=(
                 ObservationRange.ONE_CELL_AROUND if observation_range == 1 else ObservationRange.TWO_CELL_AROUND
             ),
+            template_pool_size=TRAINER_TEMPLATE_POOL_SIZE,
         )
     )
 
@@ -153,6 +195,7 @@ def setup_for_real_time_training_visualization_predator_evolving(
                 initial_herbivore_health=predator_food_nutrition
             ),
         ],
+        seed=seed,
     )
 
 
@@ -178,6 +221,7 @@ def get_default_trainer_factory(
         max_live_training_length: int,
         health_after_birth: int,
         observation_range: ObservationRange,
+        template_pool_size: int = TRAINER_TEMPLATE_POOL_SIZE,
 ) -> EntityTrainer:
     if entity_type == EntityType.HERBIVORE:
         return HerbivoreTrainer(
@@ -186,6 +230,7 @@ def get_default_trainer_factory(
             max_live_training_length=max_live_training_length,
             health_after_birth=health_after_birth,
             observation_range=observation_range,
+            template_pool_size=template_pool_size,
         )
     elif entity_type == EntityType.PREDATOR:
         return PredatorTrainer(
@@ -194,21 +239,27 @@ def get_default_trainer_factory(
             max_live_training_length=max_live_training_length,
             health_after_birth=health_after_birth,
             observation_range=observation_range,
+            template_pool_size=template_pool_size,
         )
     else:
         raise ValueError(f"Unknown entity type: {entity_type}")
 
 
-def train_the_best_entity(
+def make_default_trainer(
+        entity_type: EntityType,
         window_width: int,
         window_height: int,
         max_live_training_length: int,
         health_after_birth: int,
-        total_timestep: int,
         observation_range: ObservationRange,
-        entity_type: EntityType,
-        save_path: str,
-) -> None:
+        seed: Optional[int] = None,
+) -> EntityTrainer:
+    """ Module level so that it can be shipped to worker processes of a vectorized env. Every worker gets its own
+    seed, otherwise forked workers would replay the same random state. The seed goes to the environment streams and to
+    the global random, numpy and torch generators of the process the trainer is built in """
+
+    if seed is not None:
+        set_random_seed(seed)
     env = Environment(
         window_width=window_width,
         window_height=window_height,
@@ -216,20 +267,123 @@ def train_the_best_entity(
             entity_type=entity_type,
             amount=int(0.1 * window_width * window_height)
         ),
+        seed=seed,
     )
-    gym_trainer: EntityTrainer = get_default_trainer_factory(
+    return get_default_trainer_factory(
         entity_type=entity_type,
         environment=env,
         max_live_training_length=max_live_training_length,
         health_after_birth=health_after_birth,
         observation_range=observation_range,
     )
+
+
+def make_species_trainer(
+        entity_type: EntityType,
+        window_width: int,
+        window_height: int,
+        max_live_training_length: int,
+        health_after_birth: int,
+        observation_range: ObservationRange,
+        n_agents: int,
+        seed: Optional[int] = None,
+) -> SpeciesTrainer:
+    """ All agents of the species share one environment, sized like the one of a single entity trainer """
+
+    env = Environment(
+        window_width=window_width,
+        window_height=window_height,
+        sustain_services=get_default_sustain_services_factory(
+            entity_type=entity_type,
+            amount=int(0.1 * window_width * window_height)
+        ),
+        seed=seed,
+    )
+    return SpeciesTrainer(
+        entity_class=Herbivore if entity_type == EntityType.HERBIVORE else Predator,
+        environment=env,
+        n_agents=n_agents,
+        max_live_training_length=max_live_training_length,
+        health_after_birth=health_after_birth,
+        observation_range=observation_range,
+    )
+
+
+def make_parallel_trainers(n_envs: int, seed: Optional[int] = None, **trainer_kwargs) -> VecEnv:
+    """ N independently seeded trainers, each one stepping in its own process """
+
+    base_seed: int = seed if seed is not None else random.randint(0, 2 ** 31 - 1)
+    env_factories: List[Callable[[], EntityTrainer]] = [
+        partial(make_default_trainer, seed=base_seed + rank, **trainer_kwargs) for rank in range(n_envs)
+    ]
+    return VecMonitor(SubprocVecEnv(env_factories))
+
+
+def train_the_best_entity(
+        window_width: int,
+        window_height: int,
+        max_live_training_length: int,
+        health_after_birth: int,
+        total_timestep: int,
+        observation_range: ObservationRange,
+        entity_type: EntityType,
+        save_path: str,
+        n_envs: int = 1,
+        seed: Optional[int] = None,
+        n_agents: int = 1,
+        checkpoint_frequency: int = 0,
+        keep_checkpoints: int = 3,
+        resume: bool = False,
+) -> None:
+    """ With checkpoint frequency the training is saved every that many steps to Training/checkpoints/<save_path>,
+    resume continues from the latest checkpoint there """
+
+    trainer_kwargs: dict = dict(
+        entity_type=entity_type,
+        window_width=window_width,
+        window_height=window_height,
+        max_live_training_length=max_live_training_length,
+        health_after_birth=health_after_birth,
+        observation_range=observation_range,
+    )
+    if n_agents > 1 and n_envs > 1:
+        raise ValueError('Multi-agent training runs in one process, use either n_agents or n_envs')
+    if n_agents > 1:
+        gym_trainer = VecMonitor(make_species_trainer(n_agents=n_agents, seed=seed, **trainer_kwargs))
+    elif n_envs > 1:
+        gym_trainer = make_parallel_trainers(n_envs=n_envs, seed=seed, **trainer_kwargs)
+    else:
+        gym_trainer = make_default_trainer(seed=seed, **trainer_kwargs)
+
     model = PPO(
-        "MlpPolicy", gym_trainer, verbose=1, tensorboard_log=None,
+        "MlpPolicy", gym_trainer, verbose=1, tensorboard_log=None, seed=seed,
     )
-    model.learn(total_timesteps=total_timestep, progress_bar=True)
-    save_path = os.path.join('Training', 'saved_models', save_path)
-    model.save(save_path)
+
+    checkpoints_directory = CHECKPOINTS_DIR / save_path
+    checkpoint: Optional[pathlib.Path] = latest_checkpoint(checkpoints_directory) if resume else None
+    if checkpoint:
+        load_checkpoint(model, checkpoint)
+        logger.info(f'Resumed from {checkpoint} at {model.num_timesteps} steps')
+    elif resume:
+        logger.warning(f'No checkpoints in {checkpoints_directory}, training from scratch')
+
+    callbacks: List[BaseCallback] = []
+    if checkpoint_frequency:
+        callbacks.append(
+            AsyncCheckpointCallback(
+                directory=checkpoints_directory, save_frequency=checkpoint_frequency, keep_last=keep_checkpoints,
+            )
+        )
+    try:
+        model.learn(
+            total_timesteps=max(total_timestep - model.num_timesteps, 0),
+            progress_bar=True,
+            callback=callbacks,
+            reset_num_timesteps=checkpoint is None,
+        )
+    finally:
+        gym_trainer.close()
+    model.save(SAVED_MODELS_DIR / save_path)
 
 
 def get_setup_for_trained_model_predator_and_herb(
@@ -0,0 +1,32 @@
+from benchmarks.suite import compare, run_suite, run_workload
+from benchmarks.workloads import WORKLOADS, Workload, build_trainer_steps
+
+
+def test_run_workload_collects_metrics():
+    result = run_workload(Workload('trainer', '', build_trainer_steps), steps=20, seed=1, warmup=1)
+    assert result.steps == 20
+    assert result.steps_per_second > 0
+    assert result.latency_p50_ms <= result.latency_p90_ms <= result.latency_p99_ms
+    assert result.peak_memory_mb >= 0
+
+
+def test_workloads_are_reproducible():
+    states = []
+    for _ in range(2):
+        prepared = WORKLOADS['predator_heavy'].build(7)
+        for _ in range(3):
+            prepared.step()
+        states.append(prepared.environment.cell_types.tolist())
+    assert states[0] == states[1]
+
+
+def test_compare_flags_only_regressions_beyond_tolerance():
+    baseline = run_suite([Workload('trainer', '', build_trainer_steps)], steps=5, seed=0)
+    report = {'results': {'trainer': dict(baseline['results']['trainer'])}}
+    report['results']['trainer']['steps_per_second'] = baseline['results']['trainer']['steps_per_second'] * 0.95
+    report['results']['trainer']['peak_memory_mb'] = baseline['results']['trainer']['peak_memory_mb'] * 2 + 1
+
+    regressions = compare(report, baseline, tolerance=0.1)
+
+    assert [regression.metric for regression in regressions] == ['peak_memory_mb']
+    assert compare(report, {'results': {}}) == []
@@ -0,0 +1,86 @@
+from typing import List
+
+import pytest
+
+from domain.census import PopulationCensus
+from domain.entities import Herbivore, Predator
+from domain.environment import Environment
+from domain.grid import ArrayGrid
+from domain.interfaces.entities import AliveEntity, BirthSetup
+from domain.interfaces.objects import CellType, Coordinates
+from domain.interfaces.setup import HerbivoreFood
+from domain.service import HerbivoreFoodSustainConstantService, HerbivoreSustainConstantService
+from evolution.brain import RandomBrain
+
+
+def count_matrix(environment: Environment):
+    objects = [element for row in environment.matrix for element in row]
+    herbivores = [obj for obj in objects if isinstance(obj, Herbivore)]
+    predators = [obj for obj in objects if isinstance(obj, Predator)]
+    return {
+        'herbivores': len(herbivores),
+        'predators': len(predators),
+        'food': len([obj for obj in objects if isinstance(obj, HerbivoreFood)]),
+        'herbivores_health': sum(herbivore.health for herbivore in herbivores),
+        'predators_health': sum(predator.health for predator in predators),
+    }
+
+
+def count_census(environment: Environment):
+    return {
+        'herbivores': environment.herbivores_amount,
+        'predators': environment.predators_amount,
+        'food': environment.herbivore_food_amount,
+        'herbivores_health': environment.herbivores_health,
+        'predators_health': environment.predators_health,
+    }
+
+
+class TestPopulationCensus:
+    def test_add_and_remove(self, basic_herbivore, basic_predator):
+        census = PopulationCensus.from_objects([0, None, HerbivoreFood(3), basic_herbivore, basic_predator])
+        assert census.count(CellType.FOOD) == 1
+        assert census.count(CellType.HERBIVORE) == 1
+        assert census.total_health(CellType.PREDATOR) == 10
+
+        census.change_health(basic_predator, 5)
+        census.remove(basic_herbivore)
+
+        assert census.count(CellType.HERBIVORE) == 0
+        assert census.total_health(CellType.HERBIVORE) == 0
+        assert census.total_health(CellType.PREDATOR) == 15
+
+    def test_environment_counts_respawned_and_erased_objects(self, basic_env, basic_herbivore):
+        basic_env._respawn_object(Coordinates(1, 1), basic_herbivore)
+        basic_env._respawn_object(Coordinates(2, 1), HerbivoreFood(3))
+        assert basic_env.herbivores_amount == 1
+        assert basic_env.herbivore_food_amount == 1
+        assert basic_env.herbivores_health == 10
+
+        basic_env._erase_object(basic_herbivore, Coordinates(1, 1))
+        assert basic_env.herbivores_amount == 0
+        assert basic_env.herbivores_health == 0
+
+    @pytest.mark.parametrize('grid_class', [None, ArrayGrid], ids=['list', 'array'])
+    def test_census_stays_consistent_with_the_matrix(self, grid_class):
+        birth = BirthSetup(decrease_health_after_birth=5, health_after_birth=5, birth_after=15)
+        environment = Environment(
+            window_width=12,
+            window_height=12,
+            sustain_services=[
+                HerbivoreFoodSustainConstantService(required_amount_of_herb_food=20, food_nutrition=4),
+                HerbivoreSustainConstantService(required_amount_of_herbivores=6, initial_herbivore_health=8),
+            ],
+            grid_class=grid_class,
+        )
+        entities: List[AliveEntity] = [
+            Herbivore(name=f'Herb {i}', health=12, brain=RandomBrain(), birth_config=birth) for i in range(6)
+        ] + [
+            Predator(name=f'Pred {i}', health=12, brain=RandomBrain(), birth_config=birth) for i in range(3)
+        ]
+        environment.setup_initial_state(entities)
+        assert count_census(environment) == count_matrix(environment)
+
+        for _ in range(30):
+            environment.step_living_regime()
+            assert count_census(environment) == count_matrix(environment)
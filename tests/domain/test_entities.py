@@ -0,0 +1,42 @@
+import numpy as np
+
+from domain.entities import HerbivoreMatrixConverter, PredatorMatrixConverter
+from domain.interfaces.objects import CellType
+from domain.interfaces.setup import HerbivoreFood
+
+
+class TestMatrixConverters:
+    def test_herbivore_converter_from_objects(self, basic_herbivore, basic_predator):
+        matrix = [[None, 0, HerbivoreFood(3)], [basic_herbivore, basic_predator, 0], [0, 0, 0]]
+        observation = HerbivoreMatrixConverter.from_environment_to_stable_baseline(matrix)
+        assert observation.dtype == np.uint8
+        assert observation.tolist() == [0, 1, 2, 0, 3, 1, 1, 1, 1]
+
+    def test_predator_converter_from_objects(self, basic_herbivore, basic_predator):
+        matrix = [[None, 0, HerbivoreFood(3)], [basic_herbivore, basic_predator, 0], [0, 0, 0]]
+        observation = PredatorMatrixConverter.from_environment_to_stable_baseline(matrix)
+        assert observation.dtype == np.uint8
+        assert observation.tolist() == [0, 1, 0, 2, 0, 1, 1, 1, 1]
+
+    def test_converters_accept_batches_and_unknown_codes(self):
+        cell_types = np.array([
+            [CellType.EMPTY, CellType.WALL, CellType.FOOD, CellType.HERBIVORE, CellType.PREDATOR, 7],
+            [CellType.PREDATOR, CellType.PREDATOR, CellType.EMPTY, CellType.EMPTY, CellType.FOOD, 0],
+        ], dtype=np.uint8)
+
+        assert HerbivoreMatrixConverter.from_cell_types(cell_types).tolist() == [
+            [1, 0, 2, 0, 3, 0], [3, 3, 1, 1, 2, 1],
+        ]
+        assert PredatorMatrixConverter.from_cell_types(cell_types).tolist() == [
+            [1, 0, 0, 2, 0, 0], [0, 0, 1, 1, 0, 1],
+        ]
+
+
+class TestMeals:
+    def test_meals_are_counted(self, basic_herbivore, basic_predator):
+        basic_herbivore.eat(HerbivoreFood(3))
+        basic_herbivore.eat(HerbivoreFood(3))
+        basic_predator.eat(basic_herbivore)
+        assert basic_herbivore.meals == 2
+        assert basic_predator.meals == 1
+        assert basic_predator.health == 26
@@ -1,13 +1,15 @@
 import itertools
 
+import numpy as np
 import pytest
 
 from domain.interfaces.entities import AliveEntity, BirthSetup
 from evolution.brain import RandomBrain, ControlledBrain
 from domain.entities import Herbivore, Predator
 from domain.environment import Environment
+from domain.grid import ArrayGrid, ChunkedGrid
 from domain.service import HerbivoreFoodSustainConstantService
-from domain.exceptions import NotVacantPlaceException
+from domain.exceptions import NotVacantPlaceException, SetupEnvironmentError
 from domain.interfaces.setup import HerbivoreFood
 from domain.interfaces.objects import Coordinates, Movement, ObservationRange
 
@@ -64,6 +66,27 @@ MOVEMENT_TEST_CASES = {
 }
 
 
+class RecordingPolicy:
+    def __init__(self, action: int):
+        self.action = action
+        self.batches = []
+
+
+class SharedPolicyBrain(ControlledBrain):
+    """ Brain that is predicted in batches together with other brains of the same policy """
+
+    def __init__(self, policy: RecordingPolicy):
+        super().__init__()
+        self.policy = policy
+
+    def batch_key(self):
+        return id(self.policy)
+
+    def predict_batch(self, observations: np.ndarray) -> np.ndarray:
+        self.policy.batches.append(observations.shape)
+        return np.full(len(observations), self.policy.action)
+
+
 class TestEnvironment:
     def test_has_space_left_returns_true_when_space_left(self, basic_env):
         basic_env.matrix = [[0, 0, 0], [0, 1, 1], [1, 1, 1]]
@@ -693,3 +716,121 @@ class TestEnvironment:
             [0, 0, 0, 0, 0],
             [0, 0, 0, 0, 0],
         ], True)
+
+    def test_get_living_objects_observations_one_cell(self, basic_env, basic_herbivore, basic_predator):
+        basic_env._respawn_object(Coordinates(1, 1), basic_herbivore)
+        basic_env._respawn_object(Coordinates(2, 2), basic_predator)
+        basic_env._respawn_object(Coordinates(2, 1), HerbivoreFood(3))
+
+        observations = basic_env.get_living_objects_observations(ObservationRange.ONE_CELL_AROUND)
+
+        assert observations.shape == (2, 9)
+        assert observations.tolist() == [
+            [1, 1, 1, 1, 3, 2, 1, 0, 4],
+            [3, 2, 0, 0, 4, 0, 0, 0, 0],
+        ]
+
+    def test_get_living_objects_observations_two_cells_beyond_matrix(self, basic_env, basic_herbivore):
+        basic_env._respawn_object(Coordinates(1, 1), basic_herbivore)
+
+        observations = basic_env.get_living_objects_observations(
+            ObservationRange.TWO_CELL_AROUND, entities=[basic_herbivore],
+        )
+
+        assert observations.reshape(5, 5).tolist() == [
+            [1, 1, 1, 1, 1],
+            [1, 1, 1, 1, 1],
+            [1, 1, 3, 0, 0],
+            [1, 1, 0, 0, 0],
+            [1, 1, 0, 0, 0],
+        ]
+
+    def test_step_living_regime_predicts_shared_policy_in_one_batch(self, basic_env):
+        policy = RecordingPolicy(action=2)
+        herbivores = [Herbivore(name=f'Herb {i}', health=10, brain=SharedPolicyBrain(policy)) for i in range(3)]
+        for x, herbivore in zip((2, 5, 8), herbivores):
+            basic_env._respawn_object(Coordinates(x, 5), herbivore)
+
+        basic_env.step_living_regime()
+
+        assert policy.batches == [(3, 9)]
+        assert [basic_env.alive_entities_coords[herbivore] for herbivore in herbivores] == [
+            Coordinates(2, 4), Coordinates(5, 4), Coordinates(8, 4),
+        ]
+        assert all(herbivore.health == 9 for herbivore in herbivores)
+
+    def test_step_living_regime_batched_prey_is_not_charged_before_being_eaten(self, basic_env, basic_predator):
+        herbivore = Herbivore(name='Herb', health=10, brain=SharedPolicyBrain(RecordingPolicy(action=0)))
+        basic_env._respawn_object(Coordinates(5, 5), basic_predator)
+        basic_env._respawn_object(Coordinates(5, 4), herbivore)
+        basic_predator.brain.set_next_movement(2)
+
+        basic_env.step_living_regime()
+
+        assert herbivore.eaten
+        assert basic_predator.health == 19
+        assert basic_env.alive_entities_coords == {basic_predator: Coordinates(5, 4)}
+
+    def test_step_living_regime_random_brains_are_batched(self, basic_env):
+        herbivores = [Herbivore(name=f'Herb {i}', health=10, brain=RandomBrain()) for i in range(4)]
+        for x, herbivore in zip((2, 5, 8, 11), herbivores):
+            basic_env._respawn_object(Coordinates(x, 5), herbivore)
+
+        basic_env.step_living_regime()
+
+        assert all(herbivore.lived_for == 1 for herbivore in herbivores)
+        assert len(basic_env.alive_entities_coords) == 4
+
+    def test_set_object_randomly_skips_cells_filled_behind_the_index(self, basic_env, basic_herbivore):
+        basic_env.matrix = [[1, 1, 1], [1, 0, 0], [1, 1, 1]]
+        basic_env.matrix[1][1] = 1
+
+        basic_env.set_object_randomly_in_environment(basic_herbivore)
+
+        assert basic_env.matrix == [[1, 1, 1], [1, 1, basic_herbivore], [1, 1, 1]]
+        with pytest.raises(SetupEnvironmentError):
+            basic_env.set_object_randomly_in_environment(HerbivoreFood(3))
+
+
+class TestEnvironmentSnapshot:
+    @pytest.fixture(params=[None, ArrayGrid, ChunkedGrid], ids=['list', 'array', 'chunked'])
+    def env(self, request) -> Environment:
+        return Environment(window_width=8, window_height=6, sustain_services=[], grid_class=request.param)
+
+    def test_restore_brings_state_back(self, env, basic_herbivore):
+        env._respawn_object(Coordinates(2, 2), basic_herbivore)
+        env._respawn_object(Coordinates(3, 3), HerbivoreFood(3))
+        snapshot = env.snapshot()
+
+        basic_herbivore.brain.set_next_movement(0)
+        env.step_living_regime()
+        env._erase_object(HerbivoreFood(3), Coordinates(3, 3))
+        env.restore(snapshot)
+
+        [restored] = env.alive_entities_coords
+        assert restored is not basic_herbivore
+        assert restored.health == 10 and restored.lived_for == 0
+        assert env.matrix[2][2] is restored
+        assert env.herbivore_food_amount == 1 and env.herbivores_health == 10
+        assert env.cycle == 0
+        assert Coordinates(3, 3) not in env.free_cells and len(env.free_cells) == 6 * 4 - 2
+
+    def test_snapshot_without_excluded_entity(self, env, basic_herbivore, basic_predator):
+        env._respawn_object(Coordinates(2, 2), basic_herbivore)
+        env._respawn_object(Coordinates(4, 2), basic_predator)
+        env.restore(env.snapshot(exclude=[basic_herbivore]))
+
+        assert env.herbivores_amount == 0 and env.predators_amount == 1
+        assert env.matrix[2][2] == 0
+        assert Coordinates(2, 2) in env.free_cells
+
+    def test_flip(self, env, basic_herbivore):
+        env._respawn_object(Coordinates(1, 1), basic_herbivore)
+        env._respawn_object(Coordinates(2, 1), HerbivoreFood(3))
+        env.flip(horizontal=True, vertical=True)
+
+        assert env.alive_entities_coords == {basic_herbivore: Coordinates(6, 4)}
+        assert env.matrix[4][6] is basic_herbivore
+        assert env.matrix[4][5] == HerbivoreFood(3)
+        assert Coordinates(1, 1) in env.free_cells and Coordinates(6, 4) not in env.free_cells
+        assert env.herbivore_food_amount == 1
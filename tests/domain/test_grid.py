@@ -0,0 +1,310 @@
+import numpy as np
+import pytest
+
+from domain.entities import Herbivore, Predator
+from domain.environment import Environment
+from domain.exceptions import SetupEnvironmentError
+from domain.grid import ArrayGrid, ChunkedGrid, FreeCellIndex, MatrixView, cell_type_of, cell_types_of
+from domain.interfaces.objects import CellType, Coordinates, ObservationRange
+from domain.interfaces.setup import HerbivoreFood
+from domain.service import HerbivoreFoodSustainConstantService
+from evolution.brain import ControlledBrain, RandomBrain
+
+
+@pytest.fixture
+def array_env() -> Environment:
+    return Environment(
+        window_width=8,
+        window_height=6,
+        sustain_services=[],
+        grid_class=ArrayGrid,
+    )
+
+
+class TestArrayGrid:
+    def test_blank_grid_has_walls_on_the_border(self):
+        grid = ArrayGrid(width=5, height=4)
+        assert grid.cell_types().tolist() == [
+            [1, 1, 1, 1, 1],
+            [1, 0, 0, 0, 1],
+            [1, 0, 0, 0, 1],
+            [1, 1, 1, 1, 1],
+        ]
+
+    def test_cell_type_of(self, basic_herbivore, basic_predator):
+        assert cell_type_of(0) == CellType.EMPTY
+        assert cell_type_of(None) == CellType.WALL
+        assert cell_type_of(HerbivoreFood(3)) == CellType.FOOD
+        assert cell_type_of(basic_herbivore) == CellType.HERBIVORE
+        assert cell_type_of(basic_predator) == CellType.PREDATOR
+
+    def test_set_and_get_objects(self, basic_herbivore):
+        grid = ArrayGrid(width=4, height=4)
+        food = HerbivoreFood(3)
+        grid.set(1, 2, food)
+        grid.set(2, 1, basic_herbivore)
+
+        assert grid.get(1, 2) is food
+        assert grid.get(2, 1) is basic_herbivore
+        assert grid.get(1, 1) == 0
+        assert grid.get(0, 0) is None
+        assert grid.cell_type(2, 1) == CellType.HERBIVORE
+        assert grid.object_ids[1, 2] != grid.object_ids[2, 1]
+
+    def test_moved_object_keeps_its_id(self, basic_herbivore):
+        grid = ArrayGrid(width=4, height=4)
+        grid.set(1, 1, basic_herbivore)
+        object_id = grid.object_ids[1, 1]
+
+        grid.set(1, 2, basic_herbivore)
+        grid.set(1, 1, 0)
+
+        assert grid.object_ids[1, 2] == object_id
+        assert grid.object_ids[1, 1] == 0
+        assert grid.objects == {object_id: basic_herbivore}
+
+    def test_erased_object_is_forgotten(self, basic_herbivore):
+        grid = ArrayGrid(width=4, height=4)
+        grid.set(1, 1, basic_herbivore)
+        grid.set(1, 1, 0)
+        assert grid.objects == {}
+        assert grid.cell_type(1, 1) == CellType.EMPTY
+
+
+class TestChunkedGrid:
+    @pytest.mark.parametrize('width, height', [(5, 4), (70, 130)])
+    def test_blank_grid_matches_array_grid(self, width, height):
+        grid = ChunkedGrid(width=width, height=height)
+        assert grid.cell_types().tolist() == ArrayGrid(width=width, height=height).cell_types().tolist()
+        assert len(grid.free_cell_index()) == (width - 2) * (height - 2)
+
+    def test_set_and_get_objects(self, basic_herbivore):
+        grid = ChunkedGrid(width=200, height=200)
+        food = HerbivoreFood(3)
+        grid.set(100, 120, food)
+        grid.set(101, 120, basic_herbivore)
+
+        assert grid.get(100, 120) is food
+        assert grid.get(101, 120) is basic_herbivore
+        assert grid.get(1, 1) == 0
+        assert grid.get(0, 0) is None
+        assert grid.cell_type(101, 120) == CellType.HERBIVORE
+        assert list(grid.iter_objects()) == [food, basic_herbivore]
+
+    def test_chunks_are_allocated_on_write_and_freed_when_empty(self, basic_herbivore):
+        grid = ChunkedGrid(width=300, height=300)
+        walls_only = grid.chunks
+
+        grid.set(150, 150, basic_herbivore)
+        grid.set(150, 151, HerbivoreFood(1))
+        assert grid.chunks == walls_only + 1
+
+        grid.set(150, 150, 0)
+        grid.set(150, 151, 0)
+        assert grid.chunks == walls_only
+        assert grid.objects == {}
+        assert grid.cell_type(150, 150) == CellType.EMPTY
+
+    def test_pool_is_compacted(self):
+        grid = ChunkedGrid(width=2000, height=2000)
+        cells = [(y, x) for y in range(100, 1900, 64) for x in range(100, 1900, 64)]
+        for y, x in cells:
+            grid.set(y, x, HerbivoreFood(1))
+        for y, x in cells[:-10]:
+            grid.set(y, x, 0)
+
+        assert len(grid.pool) < len(cells)
+        assert all(grid.cell_type(y, x) == CellType.FOOD for y, x in cells[-10:])
+        assert grid.cell_types().sum() == ArrayGrid(width=2000, height=2000).cell_types().sum() + 10 * CellType.FOOD
+
+    def test_observation_windows_match_array_grid(self, basic_herbivore):
+        chunked, array = ChunkedGrid(width=150, height=90), ArrayGrid(width=150, height=90)
+        for grid in (chunked, array):
+            grid.set(63, 62, basic_herbivore)
+            grid.set(64, 63, HerbivoreFood(1))
+        ys, xs = np.array([1, 63, 64, 88]), np.array([1, 63, 62, 148])
+
+        for radius in (1, 2):
+            assert (chunked.observation_windows(ys, xs, radius) == array.observation_windows(ys, xs, radius)).all()
+
+    def test_free_cells_are_sampled_from_the_grid(self, basic_herbivore):
+        grid = ChunkedGrid(width=4, height=4)
+        free_cells = grid.free_cell_index()
+        grid.set(1, 1, basic_herbivore)
+        grid.set(2, 2, HerbivoreFood(1))
+
+        assert len(free_cells) == 2
+        assert Coordinates(1, 1) not in free_cells
+        for _ in range(20):
+            assert free_cells.random() in (Coordinates(2, 1), Coordinates(1, 2))
+
+
+class TestMatrixView:
+    def test_view_behaves_like_list_of_lists(self, basic_herbivore):
+        grid = ArrayGrid(width=3, height=3)
+        matrix = MatrixView(grid)
+        matrix[1][1] = basic_herbivore
+
+        assert len(matrix) == 3
+        assert len(matrix[0]) == 3
+        assert matrix[1][1] is basic_herbivore
+        assert matrix[1][-1] is None
+        assert matrix == [[None, None, None], [None, basic_herbivore, None], [None, None, None]]
+        assert [row[0:2] for row in matrix[1:3]] == [[None, basic_herbivore], [None, None]]
+
+    def test_cell_types_of_list_matrix(self, basic_predator):
+        assert cell_types_of([[None, 0], [HerbivoreFood(1), basic_predator]]).tolist() == [[1, 0], [2, 4]]
+
+
+class TestEnvironmentWithArrayGrid:
+    def test_blank_matrix_is_a_view_over_the_grid(self, array_env):
+        assert isinstance(array_env.grid, ArrayGrid)
+        assert isinstance(array_env.matrix, MatrixView)
+        assert array_env.cell_types.shape == (6, 8)
+
+    def test_plain_matrix_is_copied_into_the_grid(self, array_env, basic_herbivore):
+        food = HerbivoreFood(3)
+        array_env.matrix = [[None, None, None, None], [None, food, 0, None], [None, None, None, None]]
+
+        assert isinstance(array_env.matrix, MatrixView)
+        assert array_env.cell_types.tolist() == [[1, 1, 1, 1], [1, 2, 0, 1], [1, 1, 1, 1]]
+        assert array_env.matrix[1][1] is food
+        assert len(array_env.free_cells) == 1 and Coordinates(2, 1) in array_env.free_cells
+        array_env._respawn_object(Coordinates(2, 1), basic_herbivore)
+        assert array_env.grid.get(1, 2) is basic_herbivore
+
+    def test_setup_initial_state(self, array_env, basic_herbivore, basic_predator):
+        array_env.sustain_services = [
+            HerbivoreFoodSustainConstantService(required_amount_of_herb_food=5, food_nutrition=3)
+        ]
+        array_env.setup_initial_state([basic_herbivore, basic_predator])
+
+        assert (array_env.cell_types == CellType.FOOD).sum() == 5
+        assert (array_env.cell_types == CellType.HERBIVORE).sum() == 1
+        assert (array_env.cell_types == CellType.PREDATOR).sum() == 1
+        coordinates = array_env.alive_entities_coords[basic_herbivore]
+        assert array_env.matrix[coordinates.y][coordinates.x] is basic_herbivore
+
+    def test_has_space_left(self, array_env):
+        assert array_env.has_space_left is True
+        for y in range(1, 5):
+            for x in range(1, 7):
+                array_env._respawn_object(Coordinates(x, y), HerbivoreFood(1))
+        assert array_env.has_space_left is False
+
+    def test_herbivore_eats_food(self, array_env, basic_herbivore):
+        array_env._respawn_object(Coordinates(2, 1), HerbivoreFood(3))
+        array_env._respawn_object(Coordinates(2, 2), basic_herbivore)
+        basic_herbivore.brain.set_next_movement(2)
+        array_env._get_next_state()
+
+        assert array_env.grid.cell_type(1, 2) == CellType.HERBIVORE
+        assert array_env.grid.cell_type(2, 2) == CellType.EMPTY
+        assert basic_herbivore.health == 12
+
+    def test_predator_eats_herbivore(self, array_env, basic_herbivore, basic_predator):
+        array_env._respawn_object(Coordinates(2, 2), basic_predator)
+        array_env._respawn_object(Coordinates(2, 1), basic_herbivore)
+        basic_herbivore.brain.set_next_movement(0)
+        basic_predator.brain.set_next_movement(2)
+        array_env._get_next_state()
+
+        assert array_env.grid.cell_type(1, 2) == CellType.PREDATOR
+        assert array_env.grid.objects == {array_env.grid.object_ids[1, 2]: basic_predator}
+        assert basic_herbivore.eaten
+
+    def test_observation_through_view(self, array_env):
+        herbivore = Herbivore(name='Herb', health=10, brain=ControlledBrain())
+        predator = Predator(name='Pred', health=10, brain=ControlledBrain())
+        array_env._respawn_object(Coordinates(1, 1), herbivore)
+        array_env._respawn_object(Coordinates(2, 2), predator)
+
+        assert array_env.get_living_object_observation(herbivore) == [
+            [None, None, None], [None, herbivore, 0], [None, 0, predator]
+        ]
+
+    def test_batched_observations_match_list_matrix(self, array_env):
+        list_env = Environment(window_width=8, window_height=6, sustain_services=[])
+        entities = [Herbivore(name=f'Herb {i}', health=10, brain=ControlledBrain()) for i in range(3)]
+        for env in (array_env, list_env):
+            env._respawn_object(Coordinates(1, 1), entities[0])
+            env._respawn_object(Coordinates(6, 4), entities[1])
+            env._respawn_object(Coordinates(3, 2), entities[2])
+            env._respawn_object(Coordinates(2, 2), HerbivoreFood(3))
+
+        for observation_range in ObservationRange:
+            assert (
+                array_env.get_living_objects_observations(observation_range).tolist()
+                == list_env.get_living_objects_observations(observation_range).tolist()
+            )
+
+
+class TestFreeCellIndex:
+    def test_from_matrix(self):
+        free_cells = FreeCellIndex.from_matrix([[None, None, None], [None, 0, 1], [None, 0, None]])
+        assert len(free_cells) == 2
+        assert Coordinates(1, 1) in free_cells
+        assert Coordinates(1, 2) in free_cells
+        assert Coordinates(2, 1) not in free_cells
+
+    def test_add_discard_and_random(self):
+        free_cells = FreeCellIndex.from_cell_types(ArrayGrid(width=4, height=4).cell_types())
+        assert len(free_cells) == 4
+
+        free_cells.discard(Coordinates(1, 1))
+        free_cells.discard(Coordinates(1, 1))
+        free_cells.discard(Coordinates(2, 2))
+        free_cells.add(Coordinates(2, 2))
+        free_cells.add(Coordinates(2, 2))
+
+        assert len(free_cells) == 3
+        assert Coordinates(1, 1) not in free_cells
+        for _ in range(20):
+            assert free_cells.random() in (Coordinates(2, 1), Coordinates(1, 2), Coordinates(2, 2))
+
+    def test_copy_is_independent(self):
+        free_cells = FreeCellIndex.from_cell_types(ArrayGrid(width=4, height=4).cell_types())
+        copied = free_cells.copy()
+        copied.discard(Coordinates(1, 1))
+        free_cells.discard(Coordinates(2, 2))
+
+        assert Coordinates(1, 1) in free_cells and Coordinates(2, 2) not in free_cells
+        assert Coordinates(2, 2) in copied and Coordinates(1, 1) not in copied
+        assert len(free_cells) == len(copied) == 3
+
+    def test_environment_keeps_index_in_sync(self, array_env, basic_herbivore):
+        array_env._respawn_object(Coordinates(2, 2), basic_herbivore)
+        assert Coordinates(2, 2) not in array_env.free_cells
+
+        array_env._change_coordinates_of_alive_object(basic_herbivore, Coordinates(3, 2), from_=Coordinates(2, 2))
+        assert Coordinates(2, 2) in array_env.free_cells
+        assert Coordinates(3, 2) not in array_env.free_cells
+
+        array_env._erase_object(basic_herbivore, Coordinates(3, 2))
+        assert len(array_env.free_cells) == 6 * 4
+
+    def test_random_placement_fills_every_free_cell_and_never_a_wall(self, array_env):
+        for _ in range(6 * 4):
+            array_env.set_object_randomly_in_environment(HerbivoreFood(1))
+
+        assert array_env.has_space_left is False
+        assert (array_env.cell_types[1:-1, 1:-1] == CellType.FOOD).all()
+        with pytest.raises(SetupEnvironmentError):
+            array_env.set_object_randomly_in_environment(HerbivoreFood(1))
+
+
+def test_environment_runs_on_chunked_grid():
+    entities = [Herbivore(name=f'Herb {i}', health=100, brain=RandomBrain()) for i in range(2)]
+    env = Environment(
+        window_width=100,
+        window_height=80,
+        sustain_services=[HerbivoreFoodSustainConstantService(required_amount_of_herb_food=20, food_nutrition=3)],
+        grid_class=ChunkedGrid,
+    )
+    env.setup_initial_state(entities)
+    for _ in range(5):
+        env.step_living_regime()
+
+    assert (env.cell_types == CellType.FOOD).sum() == 20
+    assert len(env.free_cells) == 98 * 78 - 22
+    assert env.has_space_left
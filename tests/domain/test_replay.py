@@ -0,0 +1,69 @@
+import pytest
+
+from domain.entities import Herbivore
+from domain.environment import Environment
+from domain.grid import ArrayGrid
+from domain.interfaces.entities import BirthSetup
+from domain.replay import Replay, health_grid
+from domain.service import HerbivoreFoodSustainConstantService
+from evolution.brain import RandomBrain
+
+
+def record_run(path, cycles: int, keyframe_interval: int, grid_class=None) -> list:
+    """ Records a seeded run and returns the expected (cycle, cell types, health) of every frame """
+
+    environment = Environment(
+        window_width=20,
+        window_height=12,
+        sustain_services=[HerbivoreFoodSustainConstantService(required_amount_of_herb_food=20, food_nutrition=5)],
+        grid_class=grid_class,
+        seed=4,
+    )
+    birth = BirthSetup(decrease_health_after_birth=10, health_after_birth=10, birth_after=30)
+    environment.setup_initial_state(
+        [Herbivore(name=f'Herbivore#{i}', health=25, brain=RandomBrain(), birth_config=birth) for i in range(8)]
+    )
+    environment.start_recording(path, keyframe_interval=keyframe_interval)
+    expected = [(0, environment.cell_types.copy(), health_grid(environment))]
+    for _ in range(cycles):
+        environment.step_living_regime()
+        expected.append((environment.cycle, environment.cell_types.copy(), health_grid(environment)))
+    environment.stop_recording()
+    return expected
+
+
+@pytest.mark.parametrize('grid_class', [None, ArrayGrid])
+def test_replay_reproduces_every_recorded_frame(tmp_path, grid_class):
+    expected = record_run(tmp_path / 'run.replay', cycles=25, keyframe_interval=10, grid_class=grid_class)
+    replay = Replay(tmp_path / 'run.replay')
+
+    assert (replay.width, replay.height, replay.keyframe_interval) == (20, 12, 10)
+    assert len(replay) == 26
+    assert replay.keyframes.tolist() == [0, 10, 20]
+    for index, (cycle, cell_types, health) in enumerate(expected):
+        assert replay.cycles[index] == cycle
+        frame_types, frame_health = replay.frame(index)
+        assert (frame_types == cell_types).all() and (frame_health == health).all()
+
+
+def test_seeking_back_and_forth(tmp_path):
+    expected = record_run(tmp_path / 'run.replay', cycles=30, keyframe_interval=8)
+    replay = Replay(tmp_path / 'run.replay')
+
+    for index in (27, 3, 17, 16, 30, 0):
+        cell_types, health = replay.frame(index)
+        assert (cell_types == expected[index][1]).all() and (health == expected[index][2]).all()
+    assert replay.index_of_cycle(12) == 12
+    assert replay.index_of_cycle(1000) == 30
+    with pytest.raises(IndexError):
+        replay.frame(31)
+
+
+def test_frame_cut_off_by_a_crash_is_ignored(tmp_path):
+    path = tmp_path / 'run.replay'
+    expected = record_run(path, cycles=5, keyframe_interval=100)
+    path.write_bytes(path.read_bytes()[:-3])
+
+    replay = Replay(path)
+    assert len(replay) == 5
+    assert (replay.frame(4)[0] == expected[4][1]).all()
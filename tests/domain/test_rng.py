@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from domain.entities import Herbivore
+from domain.environment import Environment
+from domain.grid import ArrayGrid
+from domain.interfaces.entities import BirthSetup
+from domain.rng import RandomService, RandomStream, active_random, derived_seed
+from domain.service import HerbivoreFoodSustainConstantService
+from evolution.brain import RandomBrain
+
+
+def test_same_seed_gives_same_streams():
+    first, second = RandomService(seed=7), RandomService(seed=7)
+    assert [first.placement.random() for _ in range(10)] == [second.placement.random() for _ in range(10)]
+    assert first.brains.integers(9, size=20).tolist() == second.brains.integers(9, size=20).tolist()
+    assert [first.placement.random() for _ in range(5)] != [RandomService(seed=8).placement.random() for _ in range(5)]
+
+
+def test_streams_do_not_depend_on_each_other():
+    quiet, busy = RandomService(seed=3), RandomService(seed=3)
+    for _ in range(10000):
+        busy.brains.random()
+    assert [quiet.births.random() for _ in range(10)] == [busy.births.random() for _ in range(10)]
+    assert quiet.placement.random() != quiet.births.random()
+
+
+def test_values_cross_block_borders_within_bounds():
+    stream = RandomService(seed=1, block_size=16).stream('test')
+    values = [stream.randrange(2, 5) for _ in range(100)]
+    assert set(values) == {2, 3, 4}
+    assert {stream.randint(0, 1) for _ in range(100)} == {0, 1}
+    assert stream.choice('ab') in 'ab'
+    assert isinstance(stream, RandomStream)
+
+
+def test_choices_follow_the_weights():
+    stream = RandomService(seed=5).placement
+    picked = stream.choices(np.array([0, 3, 1]), size=4000)
+    assert set(picked.tolist()) == {1, 2}
+    assert 0.7 < np.mean(picked == 1) < 0.8
+
+
+def run(seed: int, grid_class=None) -> tuple:
+    environment = Environment(
+        window_width=30,
+        window_height=20,
+        sustain_services=[HerbivoreFoodSustainConstantService(required_amount_of_herb_food=40, food_nutrition=5)],
+        grid_class=grid_class,
+        seed=seed,
+    )
+    birth = BirthSetup(decrease_health_after_birth=10, health_after_birth=10, birth_after=25)
+    environment.setup_initial_state(
+        [Herbivore(name=f'Herbivore#{i}', health=20, brain=RandomBrain(), birth_config=birth) for i in range(10)]
+    )
+    for _ in range(30):
+        environment.step_living_regime()
+    names = sorted(entity.name for entity in environment.alive_entities_coords)
+    return environment.cell_types.tolist(), environment.herbivores_health, names
+
+
+@pytest.mark.parametrize('grid_class', [None, ArrayGrid])
+def test_same_seed_replays_the_same_run(grid_class):
+    assert run(seed=42, grid_class=grid_class) == run(seed=42, grid_class=grid_class)
+    assert run(seed=42, grid_class=grid_class) != run(seed=43, grid_class=grid_class)
+
+
+class RecordingBrain(RandomBrain):
+    """ Random brain that remembers which service was active while it was asked """
+
+    def __init__(self, seen: list, nested: Environment = None):
+        self.seen = seen
+        self.nested = nested
+
+    def batch_key(self):
+        return None
+
+    def predict(self, *args, **kwargs):
+        if self.nested is not None:
+            self.nested.step_living_regime()
+        self.seen.append(active_random())
+        return super().predict(*args, **kwargs)
+
+
+def test_environment_activates_its_service_while_stepped():
+    first = Environment(window_width=5, window_height=5, sustain_services=[], seed=1)
+    second = Environment(window_width=5, window_height=5, sustain_services=[], seed=2)
+    assert active_random() is second.rng
+
+    seen = []
+    first.setup_initial_state([Herbivore(name='Herbivore', health=10, brain=RecordingBrain(seen), birth_config=None)])
+    first.step_living_regime()
+    assert seen == [first.rng]
+    assert active_random() is second.rng
+
+
+def test_nested_step_hands_the_streams_back():
+    nested = Environment(window_width=5, window_height=5, sustain_services=[], seed=1)
+    nested_seen = []
+    nested.setup_initial_state([Herbivore(name='Nested', health=10, brain=RecordingBrain(nested_seen))])
+    outer = Environment(window_width=5, window_height=5, sustain_services=[], seed=2)
+    seen = []
+    outer.setup_initial_state([Herbivore(name='Outer', health=10, brain=RecordingBrain(seen, nested=nested))])
+
+    outer.step_living_regime()
+    assert nested_seen == [nested.rng]
+    assert seen == [outer.rng]
+    assert active_random() is outer.rng
+
+
+def test_derived_seeds():
+    assert derived_seed(None, 'trainer') is None
+    assert derived_seed(5, 'trainer') == derived_seed(5, 'trainer')
+    assert len({derived_seed(5, 'trainer'), derived_seed(5, 'torch'), derived_seed(6, 'trainer')}) == 3
@@ -0,0 +1,82 @@
+import numpy as np
+
+from domain.entities import Herbivore
+from domain.environment import Environment
+from domain.grid import register_cell_type
+from domain.interfaces.entities import AliveEntity
+from domain.interfaces.objects import CellType, Coordinates
+from domain.interfaces.setup import HerbivoreFood
+from domain.rules import DEFAULT_INTERACTION_RULES, Interaction, InteractionRules
+from evolution.brain import ControlledBrain
+
+SCAVENGER = 5
+
+
+class BlindConverter:
+    @staticmethod
+    def from_environment_to_stable_baseline(matrix) -> np.ndarray:
+        return np.zeros(9, dtype=np.uint8)
+
+
+class Scavenger(AliveEntity):
+    """ Species that is not known to the environment, eats both food and herbivores """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.matrix_converted = BlindConverter()
+
+    def eat(self, food) -> None:
+        self.health += food.nutrition if isinstance(food, HerbivoreFood) else food.health
+
+
+register_cell_type(Scavenger, SCAVENGER)
+
+
+class TestInteractionRules:
+    def test_default_rules(self):
+        assert DEFAULT_INTERACTION_RULES.interaction(CellType.HERBIVORE, CellType.EMPTY) == Interaction.MOVE
+        assert DEFAULT_INTERACTION_RULES.interaction(CellType.HERBIVORE, CellType.FOOD) == Interaction.EAT_FOOD
+        assert DEFAULT_INTERACTION_RULES.interaction(CellType.HERBIVORE, CellType.PREDATOR) == Interaction.BLOCKED
+        assert DEFAULT_INTERACTION_RULES.interaction(CellType.PREDATOR, CellType.HERBIVORE) == Interaction.EAT_PREY
+        assert DEFAULT_INTERACTION_RULES.interaction(CellType.PREDATOR, CellType.FOOD) == Interaction.BLOCKED
+        assert DEFAULT_INTERACTION_RULES.interaction(CellType.PREDATOR, CellType.WALL) == Interaction.BLOCKED
+
+    def test_allow_grows_the_table(self):
+        rules = InteractionRules().allow(SCAVENGER, CellType.EMPTY, Interaction.MOVE)
+        assert len(rules.table) == SCAVENGER + 1
+        assert all(len(row) == SCAVENGER + 1 for row in rules.table)
+        assert rules.interaction(SCAVENGER, CellType.EMPTY) == Interaction.MOVE
+        assert rules.interaction(CellType.EMPTY, SCAVENGER) == Interaction.BLOCKED
+
+    def test_environments_do_not_share_the_default_rules(self, basic_env):
+        basic_env.rules.allow(CellType.HERBIVORE, CellType.PREDATOR, Interaction.EAT_PREY)
+        assert DEFAULT_INTERACTION_RULES.interaction(CellType.HERBIVORE, CellType.PREDATOR) == Interaction.BLOCKED
+        other = Environment(window_width=10, window_height=10, sustain_services=[])
+        assert other.rules.interaction(CellType.HERBIVORE, CellType.PREDATOR) == Interaction.BLOCKED
+
+    def test_new_species_is_resolved_by_the_table(self, basic_env):
+        basic_env.rules = (
+            InteractionRules()
+            .allow(SCAVENGER, CellType.EMPTY, Interaction.MOVE)
+            .allow(SCAVENGER, CellType.FOOD, Interaction.EAT_FOOD)
+            .allow(SCAVENGER, CellType.HERBIVORE, Interaction.EAT_PREY)
+        )
+        scavenger = Scavenger(name='Scavenger', health=10, brain=ControlledBrain())
+        herbivore = Herbivore(name='Herb', health=10, brain=ControlledBrain())
+        herbivore.matrix_converted = BlindConverter()
+        basic_env._respawn_object(Coordinates(5, 5), scavenger)
+        basic_env._respawn_object(Coordinates(5, 4), HerbivoreFood(3))
+        basic_env._respawn_object(Coordinates(5, 3), herbivore)
+
+        scavenger.brain.set_next_movement(2)
+        herbivore.brain.set_next_movement(0)
+        basic_env._get_next_state()
+        assert scavenger.health == 12
+        assert basic_env.herbivore_food_amount == 0
+
+        herbivore.brain.set_next_movement(0)
+        scavenger.brain.set_next_movement(2)
+        basic_env._get_next_state()
+        assert basic_env.alive_entities_coords == {scavenger: Coordinates(5, 3)}
+        assert scavenger.health == 20
+        assert herbivore.eaten
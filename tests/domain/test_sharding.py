@@ -0,0 +1,139 @@
+import numpy as np
+import pytest
+
+from domain.entities import Herbivore, Predator
+from domain.exceptions import SetupEnvironmentError
+from domain.grid import ArrayGrid, ChunkedGrid
+from domain.interfaces.objects import CellType, Coordinates, Movement
+from domain.interfaces.setup import HerbivoreFood
+from domain.service import HerbivoreFoodSustainConstantService
+from domain.sharding import HALO, ShardEnvironment, ShardedEnvironment, split_rows
+from evolution.brain import ControlledBrain, RandomBrain
+
+MOVE_DOWN = 6
+
+
+def food_services(fraction: float):
+    return [HerbivoreFoodSustainConstantService(required_amount_of_herb_food=int(200 * fraction), food_nutrition=5)]
+
+
+def herbivore(brain=None, health: int = 1000) -> Herbivore:
+    return Herbivore(name='Herbivore', health=health, brain=brain or RandomBrain(), birth_config=None)
+
+
+def shard_with(entity, at: Coordinates, grid_class=None) -> ShardEnvironment:
+    """ Upper shard of a 10 row world, owning rows [0, 5) """
+
+    shard = ShardEnvironment(window_width=8, world_height=10, top=0, bottom=5, sustain_services=[], grid_class=grid_class)
+    shard.setup_shard([])
+    shard._respawn_object(Coordinates(at.x, at.y - shard.top + HALO), entity)
+    return shard
+
+
+def test_rows_are_split_into_strips():
+    assert split_rows(10, 3) == [(0, 3), (3, 6), (6, 10)]
+    with pytest.raises(SetupEnvironmentError):
+        split_rows(5, 3)
+
+
+@pytest.mark.parametrize('grid_class', [None, ArrayGrid])
+def test_entity_moving_into_halo_leaves_the_shard(grid_class):
+    entity = herbivore(ControlledBrain())
+    shard = shard_with(entity, Coordinates(3, 4), grid_class)
+    shard.write_halo(above=None, below=np.full((HALO, 8), CellType.EMPTY, dtype=np.uint8))
+
+    entity.brain.set_next_movement(MOVE_DOWN)
+    assert shard.step_local() == [(entity, Coordinates(3, 5))]
+    assert entity not in shard.alive_entities_coords
+    assert shard.herbivores_amount == 0
+    assert Coordinates(3, 4 + HALO) in shard.free_cells
+
+
+@pytest.mark.parametrize('grid_class', [None, ArrayGrid])
+def test_halo_is_observed_and_blocks(grid_class):
+    entity = herbivore(ControlledBrain())
+    shard = shard_with(entity, Coordinates(3, 4), grid_class)
+    below = np.full((HALO, 8), CellType.EMPTY, dtype=np.uint8)
+    below[0, 3] = CellType.PREDATOR
+    shard.write_halo(above=None, below=below)
+
+    observation = shard.get_living_objects_observations(entity.get_observation_range(), [entity])[0]
+    assert observation[7] == CellType.PREDATOR
+    assert shard.herbivores_amount + shard.predators_amount == 1
+
+    entity.brain.set_next_movement(MOVE_DOWN)
+    assert shard.step_local() == []
+    assert shard.alive_entities_coords[entity] == Coordinates(3, 4 + HALO)
+
+
+@pytest.mark.parametrize('grid_class', [None, ArrayGrid, ChunkedGrid])
+def test_shard_is_filled_only_in_owned_rows_after_halo_exchange(grid_class):
+    shard = ShardEnvironment(
+        window_width=6, world_height=20, top=5, bottom=8, sustain_services=[], grid_class=grid_class,
+    )
+    shard.setup_shard([])
+    empty = np.full((HALO, 6), CellType.EMPTY, dtype=np.uint8)
+    shard.write_halo(above=empty, below=empty)
+    assert len(shard.free_cells) == 3 * 4
+
+    for _ in range(3 * 4):
+        shard.set_object_randomly_in_environment(HerbivoreFood(nutrition=5))
+    assert np.count_nonzero(shard.owned_cell_types() == CellType.FOOD) == 3 * 4
+    with pytest.raises(SetupEnvironmentError):
+        shard.set_object_randomly_in_environment(HerbivoreFood(nutrition=5))
+
+
+def test_arrival_eats_the_food_of_the_target_cell():
+    shard = ShardEnvironment(window_width=8, world_height=10, top=5, bottom=10, sustain_services=[])
+    shard.setup_shard([])
+    food = HerbivoreFood(7)
+    shard._respawn_object(Coordinates(3, HALO), food)
+    entity = herbivore(health=10)
+
+    shard.arrive(entity, Coordinates(3, 5))
+    assert entity.health == 17
+    assert shard.alive_entities_coords[entity] == Coordinates(3, HALO)
+    assert shard.herbivore_food_amount == 0
+    assert shard.herbivores_health == 17
+
+
+def test_arrival_on_a_taken_cell_lands_nearby():
+    shard = ShardEnvironment(window_width=8, world_height=10, top=5, bottom=10, sustain_services=[])
+    shard.setup_shard([])
+    resident = herbivore()
+    shard._respawn_object(Coordinates(3, HALO), resident)
+    predator = Predator(name='Predator', health=10, brain=RandomBrain(), birth_config=None)
+
+    shard.arrive(predator, Coordinates(3, 5))
+    assert resident.eaten
+    assert shard.alive_entities_coords[predator] == Coordinates(3, HALO)
+
+    newcomer = herbivore()
+    shard.arrive(newcomer, Coordinates(3, 5))
+    where = shard.alive_entities_coords[newcomer]
+    assert shard.owns(where.y) and where != Coordinates(3, HALO)
+
+
+def test_sharded_world_keeps_every_entity():
+    entities = [herbivore() for _ in range(60)]
+    with ShardedEnvironment(30, 40, shards=3, sustain_services_factory=food_services, seed=1) as environment:
+        environment.setup_initial_state(entities)
+        assert environment.alive_entities_amount == 60
+        assert environment.herbivore_food_amount == sum(int(200 * (b - t) / 40) for t, b in environment.bounds)
+
+        handoffs = 0
+        for _ in range(30):
+            assert not environment.step()
+            handoffs += environment.handoffs
+        assert environment.cycle == 30
+        assert handoffs > 0
+        assert environment.herbivores_amount == 60
+
+        cell_types = environment.cell_types
+        matrix = environment.gather_matrix()
+
+    assert cell_types.shape == (40, 30)
+    assert (cell_types[[0, -1]] == CellType.WALL).all() and (cell_types[:, [0, -1]] == CellType.WALL).all()
+    alive = [obj for row in matrix for obj in row if isinstance(obj, Herbivore)]
+    assert sorted(entity.uid for entity in alive) == sorted(entity.uid for entity in entities)
+    assert np.count_nonzero(cell_types == CellType.HERBIVORE) == 60
@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+from domain.entities import Herbivore
+from domain.environment import Environment
+from domain.service import HerbivoreFoodSustainConstantService
+from domain.utils import COLUMNS, StatisticsCollector, read_statistics
+from evolution.brain import RandomBrain
+
+
+def populated_environment() -> Environment:
+    environment = Environment(
+        window_width=10,
+        window_height=10,
+        sustain_services=[HerbivoreFoodSustainConstantService(required_amount_of_herb_food=5, food_nutrition=3)],
+        seed=0,
+    )
+    environment.setup_initial_state([Herbivore(name='Herbivore', health=100, brain=RandomBrain()) for _ in range(4)])
+    return environment
+
+
+def test_statistics_are_flushed_in_chunks_and_readable_during_the_run(tmp_path):
+    environment = populated_environment()
+    collector = StatisticsCollector(environment, filename='run', directory=tmp_path, chunk_size=4)
+    for _ in range(10):
+        environment.step_living_regime()
+        collector.make_snapshot()
+
+    # Two full chunks are on their way to the file, the last two rows are still in the buffer
+    deadline = time.monotonic() + 5
+    while len(read_statistics(tmp_path / 'run.ndjson')['cycle']) < 8 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert read_statistics(tmp_path / 'run.ndjson')['cycle'].tolist() == list(range(1, 9))
+
+    collector.dump_to_file()
+    statistics = read_statistics(tmp_path / 'run.ndjson')
+    assert set(statistics) == set(COLUMNS)
+    assert statistics['cycle'].tolist() == list(range(1, 11))
+    assert statistics['herbivores_amount'].tolist() == [4] * 10
+    assert statistics['herbivore_food'][-1] == environment.herbivore_food_amount
+
+
+def test_sampling_interval_and_partial_last_line(tmp_path):
+    environment = populated_environment()
+    collector = StatisticsCollector(environment, filename='run', directory=tmp_path, interval=3, chunk_size=2)
+    for _ in range(10):
+        environment.step_living_regime()
+        collector.make_snapshot()
+    collector.dump_to_file()
+
+    with open(tmp_path / 'run.ndjson', 'a') as file:
+        file.write('{"cycle": [12')
+    statistics = read_statistics(tmp_path / 'run.ndjson', columns=('cycle',))
+    assert list(statistics) == ['cycle']
+    assert statistics['cycle'].tolist() == [3, 6, 9]
+
+
+
+class FailingJson:
+    @staticmethod
+    def dumps(value):
+        raise ValueError('Cannot encode')
+
+
+def test_writer_failure_is_raised_instead_of_waiting_forever(tmp_path, monkeypatch):
+    monkeypatch.setattr('domain.utils.json', FailingJson)
+    environment = populated_environment()
+    collector = StatisticsCollector(environment, filename='run', directory=tmp_path, chunk_size=1)
+
+    # Buffers stop coming back once the writer died, the flush that runs out of them gets its error
+    with pytest.raises(ValueError, match='Cannot encode'):
+        for _ in range(3):
+            environment.step_living_regime()
+            collector.make_snapshot()
+    with pytest.raises(ValueError, match='Cannot encode'):
+        collector.dump_to_file()
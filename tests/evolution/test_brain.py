@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+import torch
+
+from domain.entities import Herbivore
+from domain.environment import Environment
+from domain.interfaces.objects import Coordinates, Movement, ObservationRange
+from domain.interfaces.setup import TrainSetup
+from domain.service import HerbivoreFoodSustainConstantService
+from evolution.brain import BrainForTraining
+from evolution.training import HerbivoreTrainer
+
+
+@pytest.fixture
+def brain() -> BrainForTraining:
+    gym_trainer = HerbivoreTrainer(
+        movement_class=Movement,
+        environment=Environment(
+            window_width=10,
+            window_height=10,
+            sustain_services=[HerbivoreFoodSustainConstantService(required_amount_of_herb_food=10, food_nutrition=3)],
+        ),
+        max_live_training_length=100,
+        health_after_birth=10,
+        observation_range=ObservationRange.ONE_CELL_AROUND,
+    )
+    return BrainForTraining(
+        train_setup=TrainSetup(learn_frequency=1000, learn_n_steps=64, learn_timesteps=64), gym_trainer=gym_trainer,
+    )
+
+
+class TestCopyOnWriteInheritance:
+    def test_children_share_the_parent_model(self, brain):
+        children = [brain.get_copy() for _ in range(3)]
+        assert all(child.model is brain.model for child in children)
+        assert brain.shared.owners == 4
+
+        observation = np.ones(9, dtype=np.uint8)
+        actions = {int(child.predict(observation, deterministic=True)[0]) for child in children}
+        assert actions == {int(brain.predict(observation, deterministic=True)[0])}
+
+    def test_learning_child_gets_own_model_and_parent_keeps_weights(self, brain):
+        child = brain.get_copy()
+        parent_weights = {k: v.clone() for k, v in brain.model.policy.state_dict().items()}
+
+        child.learn(total_timesteps=64)
+
+        assert child.model is not brain.model
+        assert brain.shared.owners == 1 and child.shared.owners == 1
+        assert all(torch.equal(parent_weights[k], v) for k, v in brain.model.policy.state_dict().items())
+        assert any(not torch.equal(parent_weights[k], v) for k, v in child.model.policy.state_dict().items())
+
+    def test_last_owner_learns_in_place(self, brain):
+        model = brain.model
+        brain.get_copy().release()
+        brain.learn(total_timesteps=64)
+        assert brain.model is model
+
+    def test_dead_entity_releases_its_brain(self, brain):
+        environment = Environment(window_width=6, window_height=6, sustain_services=[])
+        child = Herbivore(name='Child', health=0, brain=brain.get_copy())
+        environment._respawn_object(Coordinates(2, 2), child)
+        assert brain.shared.owners == 2
+
+        environment._erase_dead_entities()
+
+        assert brain.shared.owners == 1
+        assert child.brain.shared is None
+
+    def test_snapshot_and_restore_keep_the_owners_balanced(self, brain):
+        environment = Environment(window_width=6, window_height=6, sustain_services=[])
+        environment._respawn_object(Coordinates(2, 2), Herbivore(name='Herbivore', health=10, brain=brain))
+        shared = brain.shared
+        snapshot = environment.snapshot()
+        assert shared.owners == 2
+
+        for _ in range(3):
+            environment.restore(snapshot)
+        # The brain in the snapshot and the one of the restored entity, replaced entities gave theirs back
+        assert shared.owners == 2 and brain.shared is None
+        [restored] = environment.alive_entities_coords
+        assert restored.brain.shared is shared
+
+        restored.brain.learn(total_timesteps=64)
+        assert restored.brain.shared is not shared and shared.owners == 1
@@ -0,0 +1,82 @@
+import numpy as np
+import torch
+from stable_baselines3 import PPO
+
+from domain.entities import EntityType
+from domain.interfaces.objects import ObservationRange
+from evolution.callbacks import AsyncCheckpointCallback
+from evolution.checkpoints import (
+    capture_checkpoint, latest_checkpoint, list_checkpoints, load_checkpoint, prune_checkpoints, write_checkpoint,
+)
+from run_setups import make_default_trainer
+
+
+def make_model() -> PPO:
+    trainer = make_default_trainer(
+        entity_type=EntityType.HERBIVORE,
+        window_width=10,
+        window_height=10,
+        max_live_training_length=50,
+        health_after_birth=10,
+        observation_range=ObservationRange.ONE_CELL_AROUND,
+        seed=0,
+    )
+    return PPO("MlpPolicy", trainer, n_steps=64, batch_size=64, verbose=0, seed=0)
+
+
+def test_checkpoints_are_ordered_by_steps_and_pruned(tmp_path):
+    for steps in (100, 20, 3000):
+        write_checkpoint({'num_timesteps': steps}, tmp_path)
+    (tmp_path / 'notes.txt').write_text('not a checkpoint')
+
+    assert [path.name for path in list_checkpoints(tmp_path)] == [
+        'checkpoint_20_steps.pt', 'checkpoint_100_steps.pt', 'checkpoint_3000_steps.pt',
+    ]
+    prune_checkpoints(tmp_path, keep_last=2)
+    assert latest_checkpoint(tmp_path).name == 'checkpoint_3000_steps.pt'
+    assert len(list_checkpoints(tmp_path)) == 2
+    assert latest_checkpoint(tmp_path / 'missing') is None
+
+
+def test_captured_checkpoint_does_not_change_with_training():
+    model = make_model()
+    checkpoint = capture_checkpoint(model)
+    weights = {k: v.clone() for k, v in checkpoint['parameters']['policy'].items()}
+
+    model.learn(total_timesteps=64)
+
+    assert all(torch.equal(weights[k], v) for k, v in checkpoint['parameters']['policy'].items())
+
+
+def test_callback_saves_in_background_and_model_resumes(tmp_path):
+    model = make_model()
+    model.learn(total_timesteps=256, callback=AsyncCheckpointCallback(tmp_path, save_frequency=64, keep_last=2))
+
+    assert [path.name for path in list_checkpoints(tmp_path)] == [
+        'checkpoint_192_steps.pt', 'checkpoint_256_steps.pt',
+    ]
+
+    resumed = make_model()
+    load_checkpoint(resumed, latest_checkpoint(tmp_path))
+    assert resumed.num_timesteps == 256
+    assert all(
+        torch.equal(value, resumed.policy.state_dict()[key]) for key, value in model.policy.state_dict().items()
+    )
+
+
+def draw_random_numbers(model: PPO) -> tuple:
+    """ Next values of every stream of the trainer environment and of the global generators """
+
+    rng = model.get_env().get_attr('environment')[0].rng
+    return [rng.stream(name).random() for name in sorted(rng.streams)], np.random.random(), torch.rand(3).tolist()
+
+
+def test_resumed_training_continues_the_random_state(tmp_path):
+    model = make_model()
+    model.learn(total_timesteps=64)
+    path = write_checkpoint(capture_checkpoint(model), tmp_path)
+    expected = draw_random_numbers(model)
+
+    resumed = make_model()
+    load_checkpoint(resumed, path)
+    assert draw_random_numbers(resumed) == expected
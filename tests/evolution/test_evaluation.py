@@ -0,0 +1,40 @@
+import pytest
+
+from domain.entities import EntityType
+from evolution.evaluation import Estimate, EvaluationSetup, evaluate_models, run_episode
+
+HERBIVORE_MODEL = 'PPO_model_Herbivore_100000_20x20_food60_3_one_cells'
+PREDATOR_MODEL = 'PPO_model_Predator_100000_20x20_food30'
+
+
+def test_estimate_has_normal_confidence_interval():
+    estimate = Estimate.of([1.0, 2.0, 3.0, 4.0])
+    assert estimate.mean == 2.5
+    assert estimate.low == pytest.approx(2.5 - 1.96 * 1.2909944 / 2)
+    assert estimate.high == pytest.approx(2.5 + 1.96 * 1.2909944 / 2)
+    assert Estimate.of([5.0]) == Estimate(5.0, 5.0, 5.0)
+
+
+def test_episode_is_reproducible_by_seed():
+    setup = EvaluationSetup(entity_type=EntityType.HERBIVORE, population=5, max_cycles=50)
+    first = run_episode(HERBIVORE_MODEL, setup, seed=3)
+    assert first == run_episode(HERBIVORE_MODEL, setup, seed=3)
+    assert 0 < first.survival <= 50
+    assert first.kills == 0
+
+
+def test_predators_are_scored_by_kills():
+    setup = EvaluationSetup(entity_type=EntityType.PREDATOR, population=5, max_cycles=50)
+    result = run_episode(PREDATOR_MODEL, setup, seed=1)
+    assert result.food_eaten == 0
+    assert result.kills > 0
+
+
+def test_models_are_evaluated_in_worker_processes():
+    setup = EvaluationSetup(entity_type=EntityType.HERBIVORE, population=3, max_cycles=20)
+    parallel = evaluate_models([HERBIVORE_MODEL, HERBIVORE_MODEL + '.zip'], setup, episodes=2, workers=2)
+    serial = evaluate_models([HERBIVORE_MODEL], setup, episodes=2)
+
+    assert [evaluation.episodes for evaluation in parallel] == [2, 2]
+    assert parallel[0].survival == parallel[1].survival == serial[0].survival
+    assert parallel[0].food_eaten == serial[0].food_eaten
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+import torch
+
+from domain.environment import Environment
+from domain.interfaces.objects import Movement, ObservationRange
+from domain.interfaces.setup import TrainSetup
+from domain.service import HerbivoreFoodSustainConstantService
+from evolution.brain import BrainForTraining
+from evolution.learning import BackgroundLearner
+from evolution.training import HerbivoreTrainer
+
+
+@pytest.fixture
+def gym_trainer() -> HerbivoreTrainer:
+    return HerbivoreTrainer(
+        movement_class=Movement,
+        environment=Environment(
+            window_width=10,
+            window_height=10,
+            sustain_services=[HerbivoreFoodSustainConstantService(required_amount_of_herb_food=10, food_nutrition=3)],
+        ),
+        max_live_training_length=100,
+        health_after_birth=10,
+        observation_range=ObservationRange.ONE_CELL_AROUND,
+    )
+
+
+def test_learned_parameters_are_swapped_in_after_the_job(gym_trainer):
+    train_setup = TrainSetup(learn_frequency=0, learn_n_steps=64, learn_timesteps=64, learning_workers=1)
+    brain = BrainForTraining(train_setup=train_setup, gym_trainer=gym_trainer)
+    observation = np.ones(9, dtype=np.uint8)
+    try:
+        weights_before = {k: v.clone() for k, v in brain.model.policy.state_dict().items()}
+        brain.predict(observation)
+        job = brain.learning_job
+        assert job is not None
+
+        brain.predict(observation)
+        assert brain.learning_job is job or job.done()
+
+        job.result(timeout=120)
+        brain.predict(observation)
+        weights_after = brain.model.policy.state_dict()
+        assert any(not torch.equal(weights_before[k], weights_after[k]) for k in weights_before)
+        assert brain.get_copy().learner is brain.learner
+    finally:
+        BackgroundLearner.shutdown_all()
+
+
+def test_learns_inline_without_workers(gym_trainer):
+    brain = BrainForTraining(train_setup=TrainSetup(learning_workers=0), gym_trainer=gym_trainer)
+    assert brain.learner is None
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+import torch
+from stable_baselines3 import PPO
+
+from domain.interfaces.objects import ObservationRange
+from evolution.numpy_policy import NumpyBrain, NumpyPolicy, get_numpy_brain
+from evolution.registry import model_registry
+
+MODEL_NAME = 'PPO_model_Herbivore_100000_20x20_food60_3_one_cells'
+
+
+@pytest.fixture(scope='module')
+def model() -> PPO:
+    return model_registry.load(MODEL_NAME)
+
+
+@pytest.fixture(scope='module')
+def observations() -> np.ndarray:
+    return np.random.RandomState(0).randint(0, 4, size=(300, 9)).astype(np.uint8)
+
+
+def test_logits_match_torch_policy(model, observations):
+    policy = NumpyPolicy.from_model(model)
+    observation_tensor, _ = model.policy.obs_to_tensor(observations)
+    with torch.no_grad():
+        expected = model.policy.get_distribution(observation_tensor).distribution.logits.numpy()
+    logits = policy.logits(observations)
+    assert np.allclose(
+        logits - logits.max(axis=1, keepdims=True), expected - expected.max(axis=1, keepdims=True), atol=1e-4,
+    )
+
+
+def test_deterministic_actions_match_stable_baselines(model, observations):
+    expected, _ = model.predict(observations, deterministic=True)
+    assert np.array_equal(NumpyPolicy.from_model(model).predict(observations, deterministic=True), expected)
+
+
+def test_stochastic_actions_follow_distribution(model):
+    policy = NumpyPolicy.from_model(model)
+    observations = np.zeros((20000, 9), dtype=np.uint8)
+    logits = policy.logits(observations[:1])[0]
+    expected = np.exp(logits - logits.max()) / np.exp(logits - logits.max()).sum()
+    frequencies = np.bincount(policy.predict(observations), minlength=len(expected)) / len(observations)
+    assert np.abs(frequencies - expected).max() < 0.02
+
+
+def test_save_and_load_round_trip(model, observations, tmp_path):
+    policy = NumpyPolicy.from_model(model)
+    policy.save(tmp_path / 'policy.npz')
+    loaded = NumpyPolicy.load(tmp_path / 'policy.npz')
+    assert loaded.activation == policy.activation
+    assert np.array_equal(loaded.logits(observations), policy.logits(observations))
+
+
+def test_numpy_brain_follows_brain_protocol(observations):
+    brain = get_numpy_brain(MODEL_NAME, deterministic=True)
+    action, _ = brain.predict(observations[0])
+    assert np.isscalar(action) or np.ndim(action) == 0
+    assert brain.predict_batch(observations).shape == (len(observations),)
+    assert action == brain.predict_batch(observations[:1])[0]
+    assert brain.required_observation_range() == ObservationRange.ONE_CELL_AROUND
+    assert brain.learn(total_timesteps=64) is None
+
+    child = brain.get_copy()
+    assert isinstance(child, NumpyBrain)
+    assert child.policy is brain.policy
+    assert child.batch_key() == brain.batch_key()
+    assert get_numpy_brain(MODEL_NAME).batch_key() != brain.batch_key()
@@ -0,0 +1,92 @@
+import pathlib
+import pickle
+import subprocess
+import sys
+
+from evolution.brain import TrainedModelMixin, get_user_trained_brain
+from evolution.registry import ModelRegistry, RegisteredModel, model_registry
+
+
+class CountingLoader:
+    def __init__(self):
+        self.loaded = []
+
+    def __call__(self, path):
+        self.loaded.append(path)
+        return object()
+
+
+def test_model_is_loaded_once_per_content(tmp_path):
+    loader = CountingLoader()
+    registry = ModelRegistry(loader=loader)
+    (tmp_path / 'first.zip').write_bytes(b'weights')
+    (tmp_path / 'copy.zip').write_bytes(b'weights')
+
+    model = registry.load(tmp_path / 'first.zip')
+    assert registry.load(tmp_path / 'first') is model
+    assert registry.load(tmp_path / 'copy.zip') is model
+    assert len(loader.loaded) == 1
+
+
+def test_changed_file_is_loaded_again(tmp_path):
+    loader = CountingLoader()
+    registry = ModelRegistry(loader=loader)
+    path = tmp_path / 'model.zip'
+    path.write_bytes(b'weights')
+    model = registry.load(path)
+
+    path.write_bytes(b'new weights')
+    assert registry.load(path) is not model
+    assert len(registry) == 2
+
+
+def test_registered_model_is_lazy_and_shared(tmp_path):
+    loader = CountingLoader()
+    registry = ModelRegistry(loader=loader)
+    (tmp_path / 'model.zip').write_bytes(b'weights')
+
+    class Brain(TrainedModelMixin):
+        model = RegisteredModel(tmp_path / 'model.zip', registry=registry)
+
+    assert loader.loaded == []
+    brain = Brain()
+    assert brain.model is brain.get_copy().model
+    assert len(loader.loaded) == 1
+
+
+def test_registered_model_is_loaded_again_after_clear(tmp_path):
+    loader = CountingLoader()
+    registry = ModelRegistry(loader=loader)
+    (tmp_path / 'model.zip').write_bytes(b'weights')
+
+    class Brain(TrainedModelMixin):
+        model = RegisteredModel(tmp_path / 'model.zip', registry=registry)
+
+    model = Brain().model
+    registry.clear()
+    assert registry.path_of(model) is None
+
+    reloaded = Brain().model
+    assert reloaded is not model
+    assert registry.path_of(reloaded) == tmp_path / 'model.zip'
+    assert len(loader.loaded) == 2
+
+
+def test_instance_model_is_shared_with_copies():
+    brain = TrainedModelMixin()
+    brain.model = object()
+    assert brain.get_copy().model is brain.model
+
+
+def test_brain_of_registered_model_is_pickled_as_path():
+    brain = get_user_trained_brain('PPO_model_Herbivore_100000_20x20_food60_3_one_cells')
+    assert model_registry.path_of(brain.model).name == 'PPO_model_Herbivore_100000_20x20_food60_3_one_cells.zip'
+
+    payload = pickle.dumps(brain)
+    assert len(payload) < 1000
+    assert pickle.loads(payload).model is brain.model
+
+
+def test_import_does_not_load_saved_models():
+    code = 'import evolution.brain, evolution.registry as r; assert len(r.model_registry) == 0'
+    subprocess.run([sys.executable, '-c', code], check=True, cwd=pathlib.Path(__file__).resolve().parents[2])
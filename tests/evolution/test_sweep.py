@@ -0,0 +1,74 @@
+import os
+import time
+
+import pytest
+
+from domain.entities import Herbivore
+from domain.interfaces.setup import EntitySetup, Setup, WindowSetup
+from domain.service import HerbivoreFoodSustainConstantService
+from evolution.brain import RandomBrain
+from evolution.sweep import (
+    CRASHED, FAILED, OK, TIMEOUT, grid_runs, read_sweep_results, run_sweep, sampled_runs, SweepRun,
+)
+
+
+def small_setup(food: int, population: int, fault: str = '') -> Setup:
+    """ Setup factory of the tests, fault makes the run crash its process, raise or hang """
+
+    if fault == 'crash':
+        os._exit(3)
+    if fault == 'raise':
+        raise ValueError('Broken setup')
+    if fault == 'hang':
+        time.sleep(60)
+    return Setup(
+        window=WindowSetup(width=15, height=15),
+        sustain_services=[HerbivoreFoodSustainConstantService(required_amount_of_herb_food=food, food_nutrition=3)],
+        entities=[EntitySetup(Herbivore, population, initial_health=50, brain=RandomBrain, birth=None)],
+    )
+
+
+def test_grid_runs_cover_every_combination():
+    runs = grid_runs(small_setup, {'food': [5, 10], 'population': [1, 2, 3]}, seed=10)
+    assert [run.parameters for run in runs[:3]] == [
+        {'food': 5, 'population': 1}, {'food': 5, 'population': 2}, {'food': 5, 'population': 3},
+    ]
+    assert len(runs) == 6
+    assert [run.seed for run in runs] == list(range(10, 16))
+
+
+def test_sampled_runs_are_reproducible_and_checked():
+    runs = sampled_runs(small_setup, {'food': range(5, 50)}, samples=8, fixed={'population': 3}, seed=1)
+    assert runs == sampled_runs(small_setup, {'food': range(5, 50)}, samples=8, fixed={'population': 3}, seed=1)
+    assert all(5 <= run.parameters['food'] < 50 and run.parameters['population'] == 3 for run in runs)
+    with pytest.raises(TypeError):
+        grid_runs(small_setup, {'food': [5], 'populaton': [3]})
+
+
+def test_sweep_survives_failing_runs(tmp_path):
+    output = tmp_path / 'sweep.ndjson'
+    runs = grid_runs(small_setup, {'fault': ['', 'crash', 'raise', 'hang', '']}, fixed={'food': 10, 'population': 3})
+    records = run_sweep(small_setup, runs, output, workers=2, max_cycles=20, timeout=5)
+
+    by_run = {record['run']: record for record in read_sweep_results(output)}
+    assert len(records) == len(by_run) == 5
+    assert [by_run[index]['status'] for index in range(5)] == [OK, CRASHED, FAILED, TIMEOUT, OK]
+    assert 'exited with code 3' in by_run[1]['error']
+    assert 'Broken setup' in by_run[2]['error']
+    assert by_run[0]['metrics']['cycles'] == 20
+    assert by_run[0]['metrics']['herbivores'] == 3
+
+
+def test_runs_are_reproducible_in_workers_and_resumed(tmp_path):
+    output = tmp_path / 'sweep.ndjson'
+    runs = grid_runs(small_setup, {'food': [10, 20]}, fixed={'population': 4}, seed=3)
+    inline = run_sweep(small_setup, runs, tmp_path / 'inline.ndjson', workers=0, max_cycles=15)
+    parallel = run_sweep(small_setup, runs, output, workers=2, max_cycles=15)
+
+    def metrics(records):
+        return sorted((record['run'], {**record['metrics'], 'elapsed': 0}) for record in records)
+    assert metrics(inline) == metrics(parallel)
+
+    extra = SweepRun(index=2, seed=5, parameters={'food': 30, 'population': 4})
+    assert [record['run'] for record in run_sweep(small_setup, runs + [extra], output, resume=True)] == [2]
+    assert len(read_sweep_results(output)) == 3
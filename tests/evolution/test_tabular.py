@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from gym.spaces import MultiDiscrete
+
+from domain.exceptions import UnsupportedPolicy
+from domain.interfaces.objects import ObservationRange
+from domain.rng import RandomService
+from evolution.registry import model_registry
+from evolution.tabular import (
+    TabularBrain, action_probabilities, distill_action_table, enumerate_observations, get_tabular_brain,
+)
+
+MODEL_NAME = 'PPO_model_Predator_100000_20x20_food30'
+
+
+class SpyModel:
+    """ Deterministic stand-in: action is the first cell of the observation """
+
+    def __init__(self, categories: int, observation_length: int = 9):
+        self.observation_space = MultiDiscrete([categories] * observation_length)
+        self.batches = []
+
+    def predict(self, observations, deterministic=False):
+        assert deterministic
+        self.batches.append(len(observations))
+        return observations[:, 0], None
+
+
+def test_enumerated_observations_are_ordered_by_index():
+    observations = enumerate_observations(3)
+    assert observations.shape == (3 ** 9, 9)
+    assert np.array_equal(observations[0], np.zeros(9))
+    assert np.array_equal(observations[-1], np.full(9, 2))
+    assert np.array_equal(observations @ 3 ** np.arange(8, -1, -1), np.arange(3 ** 9))
+
+
+def test_table_is_distilled_in_batches():
+    model = SpyModel(categories=4)
+    table = distill_action_table(model, batch_size=100000, deterministic=True)
+    assert model.batches == [100000, 100000, 4 ** 9 - 200000]
+    assert np.array_equal(table, enumerate_observations(4)[:, 0])
+
+
+def test_two_cell_policies_are_not_tabulated():
+    with pytest.raises(UnsupportedPolicy):
+        distill_action_table(SpyModel(categories=4, observation_length=25))
+
+
+def test_deterministic_tabular_brain_matches_trained_model():
+    model = model_registry.load(MODEL_NAME)
+    brain = TabularBrain(distill_action_table(model, deterministic=True))
+    observations = np.random.RandomState(0).randint(0, 3, size=(500, 9)).astype(np.uint8)
+    expected, _ = model.predict(observations, deterministic=True)
+
+    assert np.array_equal(brain.predict_batch(observations), expected)
+    assert brain.predict(observations[0])[0] == expected[0]
+
+
+def test_stochastic_tabular_brain_samples_the_model_distribution():
+    model = model_registry.load(MODEL_NAME)
+    brain = get_tabular_brain(MODEL_NAME)
+    observations = np.random.RandomState(0).randint(0, 3, size=(50, 9)).astype(np.uint8)
+    cumulative = brain.table[observations @ brain.place_values]
+    assert np.allclose(np.diff(cumulative, prepend=0, axis=1), action_probabilities(model, observations), atol=1e-5)
+
+    with RandomService(seed=0).activated():
+        samples = brain.predict_batch(np.repeat(observations[:1], 20000, axis=0))
+        frequencies = np.bincount(samples, minlength=cumulative.shape[1]) / len(samples)
+        assert np.allclose(frequencies, np.diff(cumulative[0], prepend=0), atol=0.02)
+        assert brain.predict(observations[0])[0] in range(cumulative.shape[1])
+
+    assert brain.required_observation_range() == ObservationRange.ONE_CELL_AROUND
+    assert brain.learn(total_timesteps=64) is None
+    child = brain.get_copy()
+    assert child.table is brain.table
+    assert child.batch_key() == brain.batch_key()
+
+
+def test_table_of_wrong_size_is_rejected():
+    with pytest.raises(UnsupportedPolicy):
+        TabularBrain(np.zeros(1000, dtype=np.uint8))
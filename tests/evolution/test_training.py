@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+from domain.entities import Herbivore, Predator
+from domain.environment import Environment
+from domain.interfaces.objects import Coordinates, Movement, ObservationRange
+from domain.interfaces.setup import HerbivoreFood
+from domain.service import HerbivoreFoodSustainConstantService
+from evolution.training import HerbivoreTrainer, SpeciesTrainer
+
+
+@pytest.fixture
+def species_trainer() -> SpeciesTrainer:
+    return SpeciesTrainer(
+        entity_class=Herbivore,
+        environment=Environment(
+            window_width=12,
+            window_height=12,
+            sustain_services=[HerbivoreFoodSustainConstantService(required_amount_of_herb_food=10, food_nutrition=3)],
+        ),
+        n_agents=5,
+        max_live_training_length=3,
+        health_after_birth=10,
+        observation_range=ObservationRange.ONE_CELL_AROUND,
+    )
+
+
+class TestSpeciesTrainer:
+    def test_every_agent_is_a_slot(self, species_trainer):
+        observations = species_trainer.reset()
+        assert observations.shape == (5, 9)
+        assert species_trainer.environment.herbivores_amount == 5
+        assert species_trainer.observation_space.nvec.tolist() == [4] * 9
+
+    def test_step_returns_batched_arrays(self, species_trainer):
+        species_trainer.reset()
+        observations, rewards, dones, infos = species_trainer.step(np.zeros(5, dtype=np.int64))
+        assert observations.shape == (5, 9)
+        assert rewards.shape == dones.shape == (5,)
+        assert len(infos) == 5
+        assert all(agent.lived_for == 1 for agent in species_trainer.agents)
+
+    def test_agent_that_eats_is_rewarded(self, species_trainer):
+        environment = species_trainer.environment
+        species_trainer.agents = [species_trainer._newborn() for _ in range(5)]
+        for x, agent in enumerate(species_trainer.agents, start=2):
+            environment._respawn_object(Coordinates(x, 5), agent)
+        environment._respawn_object(Coordinates(2, 4), HerbivoreFood(5))
+
+        _, rewards, dones, _ = species_trainer.step(np.array([2, 0, 0, 0, 0]))
+
+        assert rewards.tolist() == [1, 0, 0, 0, 0]
+        assert not dones.any()
+
+    def test_finished_agents_are_replaced_in_their_slots(self, species_trainer):
+        species_trainer.reset()
+        first_generation = list(species_trainer.agents)
+        for _ in range(3):
+            _, _, dones, infos = species_trainer.step(np.zeros(5, dtype=np.int64))
+
+        assert dones.all()
+        assert all(info['terminal_observation'].shape == (9,) for info in infos)
+        assert not set(first_generation) & set(species_trainer.agents)
+        assert set(species_trainer.environment.alive_entities_coords) == set(species_trainer.agents)
+
+    def test_predator_species(self):
+        trainer = SpeciesTrainer(
+            entity_class=Predator,
+            environment=Environment(window_width=10, window_height=10, sustain_services=[]),
+            n_agents=3,
+            max_live_training_length=10,
+            health_after_birth=10,
+            observation_range=ObservationRange.TWO_CELL_AROUND,
+        )
+        assert trainer.reset().shape == (3, 25)
+        assert trainer.observation_space.nvec.tolist() == [3] * 25
+
+
+class TestTrainerTemplates:
+    def test_resets_restore_generated_layouts(self):
+        trainer = HerbivoreTrainer(
+            movement_class=Movement,
+            environment=Environment(
+                window_width=12,
+                window_height=12,
+                sustain_services=[
+                    HerbivoreFoodSustainConstantService(required_amount_of_herb_food=20, food_nutrition=3),
+                ],
+            ),
+            max_live_training_length=100,
+            health_after_birth=10,
+            observation_range=ObservationRange.ONE_CELL_AROUND,
+            template_pool_size=2,
+        )
+        trainer.reset()
+        trainer.reset()
+        assert len(trainer.templates) == 8
+        assert {len(template.free_cells) for template in trainer.templates} == {10 * 10 - 20}
+
+        for _ in range(5):
+            observation = trainer.reset()
+            assert observation.shape == (9,)
+            assert len(trainer.templates) == 8
+            assert trainer.environment.alive_entities_coords.keys() == {trainer.entity}
+            assert trainer.environment.herbivore_food_amount == 20
+            assert trainer.environment.cycle == 0
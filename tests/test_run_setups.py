@@ -0,0 +1,73 @@
+import numpy as np
+import torch
+
+from domain.entities import EntityType
+from domain.environment import Environment
+from domain.interfaces.objects import ObservationRange
+from domain.utils import StatisticsCollector, read_statistics
+from run_setups import (
+    create_entities, make_default_trainer, make_parallel_trainers,
+    setup_for_real_time_training_visualization_herb_evolving,
+)
+
+TRAINER_KWARGS = dict(
+    entity_type=EntityType.HERBIVORE,
+    window_width=12,
+    window_height=12,
+    max_live_training_length=100,
+    health_after_birth=20,
+    observation_range=ObservationRange.ONE_CELL_AROUND,
+)
+
+
+def test_seeded_trainer_is_reproducible():
+    states = []
+    for _ in range(2):
+        trainer = make_default_trainer(seed=5, **TRAINER_KWARGS)
+        # Global generators of the process are seeded too, in a vectorized env that is the worker process
+        generators = (np.random.random(), torch.rand(1).item())
+        states.append((trainer.reset().tolist(), trainer.environment.cell_types.tolist(), generators))
+    assert states[0] == states[1]
+
+
+def test_parallel_trainers_step_independently_seeded_envs():
+    vec_env = make_parallel_trainers(n_envs=3, seed=11, **TRAINER_KWARGS)
+    try:
+        observations = vec_env.reset()
+        assert observations.shape == (3, 9)
+        observations, rewards, dones, _ = vec_env.step(np.array([1, 2, 3]))
+        assert observations.shape == (3, 9)
+        assert rewards.shape == dones.shape == (3,)
+
+        worlds = vec_env.get_attr('environment')
+        assert len({world.cell_types.tobytes() for world in worlds}) == 3
+    finally:
+        vec_env.close()
+
+
+def run_learning_setup(seed: int, directory) -> dict:
+    setup = setup_for_real_time_training_visualization_herb_evolving(
+        width=10, height=10, amount_of_herb_food=8, herb_food_nutrition=5, learning_frequency=3,
+        learning_timesteps=32, learning_n_steps=32, health_after_birth=20, observation_range=1, start_herb_amount=4,
+        decrease_parent_health_after_birth=5, child_health_after_birth=10, birth_after_health_amount=25,
+        initial_herb_health=20, seed=seed,
+    )
+    environment = Environment(
+        window_width=setup.window.width,
+        window_height=setup.window.height,
+        sustain_services=setup.sustain_services,
+        seed=setup.seed,
+    )
+    environment.setup_initial_state(create_entities(setup, environment.rng))
+    collector = StatisticsCollector(environment, filename=f'seed_{seed}', directory=directory)
+    for _ in range(25):
+        environment.step_living_regime()
+        collector.make_snapshot()
+    collector.dump_to_file()
+    return {column: values.tolist() for column, values in read_statistics(collector.path).items()}
+
+
+def test_seeded_setup_with_learning_brains_is_reproducible(tmp_path):
+    first = run_learning_setup(seed=5, directory=tmp_path / 'first')
+    assert first == run_learning_setup(seed=5, directory=tmp_path / 'second')
+    assert first['cycle'] == list(range(1, 26))
@@ -0,0 +1,82 @@
+from typing import Dict, Tuple
+
+import numpy as np
+import pygame
+
+from domain.interfaces.objects import CellType
+from domain.replay import Replay
+from visualization.visualize import Visualizer
+
+MIN_FPS: int = 1
+MAX_FPS: int = 240
+
+
+class ReplayPlayer(Visualizer):
+    """ Plays a recorded replay with the drawing of the live visualization, at any speed and with seeking. Space
+    pauses, left and right step a frame back and forth, page up and page down jump by ten keyframes, up and down double
+    and halve the speed, s and f switch to the slow and the fast speed like in the live visualization """
+
+    def __init__(self, replay: Replay, fps: int = 30):
+        self.replay: Replay = replay
+        self._open_window(number_of_rows=replay.height, number_of_columns=replay.width)
+        self.FPS = fps
+        self.index: int = 0
+        self.paused: bool = False
+        self.running: bool = True
+
+    def play(self, start_cycle: int = 0) -> None:
+        """ Shows the frames from the start cycle until the window is closed, stays on the last frame at the end """
+
+        if not len(self.replay):
+            raise ValueError(f'{self.replay.path} has no frames')
+        self.seek(self.replay.index_of_cycle(start_cycle))
+        while self.running:
+            self._check_keyboard_events()
+            self.show(self.index)
+            if not self.paused:
+                self.seek(self.index + 1)
+            self.clock.tick(self.FPS)
+
+    def seek(self, index: int) -> None:
+        self.index = min(max(index, 0), len(self.replay) - 1)
+
+    def show(self, index: int) -> None:
+        cell_types, health = self.replay.frame(index)
+        occupied: np.ndarray = np.argwhere(health > 0)
+        health_of_cells: Dict[Tuple[int, int], int] = {
+            (int(y), int(x)): int(health[y, x]) for y, x in occupied
+        }
+        self._create_blank_space()
+        self._render_cells(cell_types, health_of_cells)
+        self._render_stat_text(
+            f"Cycle: {self.replay.cycles[index]} ({index + 1}/{len(self.replay)}). "
+            f"Herbivores: {np.count_nonzero(cell_types == CellType.HERBIVORE)}. "
+            f"Predators: {np.count_nonzero(cell_types == CellType.PREDATOR)}. "
+            f"Food: {np.count_nonzero(cell_types == CellType.FOOD)}. "
+            f"{'Paused' if self.paused else f'{self.FPS} fps'}"
+        )
+        pygame.display.update()
+
+    def _check_keyboard_events(self):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    self.paused = not self.paused
+                elif event.key == pygame.K_RIGHT:
+                    self.seek(self.index + 1)
+                elif event.key == pygame.K_LEFT:
+                    self.seek(self.index - 1)
+                elif event.key == pygame.K_PAGEUP:
+                    self.seek(self.index + 10 * self.replay.keyframe_interval)
+                elif event.key == pygame.K_PAGEDOWN:
+                    self.seek(self.index - 10 * self.replay.keyframe_interval)
+                elif event.key == pygame.K_UP:
+                    self.FPS = min(self.FPS * 2, MAX_FPS)
+                elif event.key == pygame.K_DOWN:
+                    self.FPS = max(self.FPS // 2, MIN_FPS)
+                elif event.key == pygame.K_s:
+                    self.FPS = 1
+                elif event.key == pygame.K_f:
+                    self.FPS = 30
@@ -1,17 +1,27 @@
-from typing import List
+from typing import List, Dict, Tuple
 
+import numpy as np
 import pygame
 
-from domain.entities import Predator
 from domain.environment import Environment
-from domain.interfaces.entities import AliveEntity
-from domain.interfaces.setup import HerbivoreFood
-from domain.interfaces.objects import Coordinates
+from domain.grid import cell_types_of
+from domain.interfaces.objects import Coordinates, CellType
 from visualization.constants import GREY_DARK, GREY_LIGHT, GREEN, BLUE, BLACK, RED
 
+CELL_COLORS = {
+    CellType.WALL: BLACK,
+    CellType.FOOD: GREEN,
+    CellType.HERBIVORE: BLUE,
+    CellType.PREDATOR: RED,
+}
+
 
 class Visualizer:
     def __init__(self, env: Environment):
+        self.env: Environment = env
+        self._open_window(number_of_rows=env.height, number_of_columns=env.width)
+
+    def _open_window(self, number_of_rows: int, number_of_columns: int):
         pygame.display.set_caption('AI')
         pygame.font.init()
 
@@ -20,12 +30,11 @@ class Visualizer:
         self.field_height = 800
         self.FPS = 1
         self.window = pygame.display.set_mode((self.field_width, self.field_height + self.statistic_block_height))
-        self.env: Environment = env
         self.large_font = pygame.font.SysFont("Arial", 24)
         self.small_font = pygame.font.SysFont("Arial", 12)
 
-        self.number_of_rows: int = self.env.height
-        self.number_of_columns: int = self.env.width
+        self.number_of_rows: int = number_of_rows
+        self.number_of_columns: int = number_of_columns
         self.cell_width: int = self.field_width // self.number_of_columns
         self.cell_height: int = self.field_height // self.number_of_rows
 
@@ -42,6 +51,14 @@ class Visualizer:
         self.clock.tick(self.FPS)
 
     def _render_stat(self):
+        self._render_stat_text(
+            f"Current cycle: {self.env.cycle}. "
+            f"Herbivores: {self.env.herbivores_amount}. "
+            f"Predators: {self.env.predators_amount}. "
+            f"Food: {self.env.herbivore_food_amount}."
+        )
+
+    def _render_stat_text(self, text_to_render: str):
         statistics_rect = pygame.draw.rect(
             self.window,
             GREY_LIGHT,
@@ -49,12 +66,6 @@ class Visualizer:
             border_radius=20,
         )
 
-        text_to_render = (
-            f"Current cycle: {self.env.cycle}. "
-            f"Herbivores: {self.env.herbivores_amount}. "
-            f"Predators: {self.env.predators_amount}. "
-            f"Food: {self.env.herbivore_food_amount}."
-        )
         text = self.large_font.render(text_to_render, True, BLACK)
         text_rect = text.get_rect(center=statistics_rect.center)
         self.window.blit(text, text_rect)
@@ -71,31 +82,33 @@ class Visualizer:
                 )
 
     def _render(self, matrix: List[List]):
-        for y, row in enumerate(matrix):
-            for x, element in enumerate(row):
-                cell_center = Coordinates(
-                    y * self.cell_height + self.cell_height // 2,
-                    x * self.cell_width + self.cell_width // 2,
-                )
-                radius: int = self.cell_width // 2
-
-                if isinstance(element, AliveEntity):
-                    entity_circle = pygame.draw.circle(self.window, BLUE, (cell_center.x, cell_center.y), radius)
-                    text = self.small_font.render(str(element.health), True, BLACK)
-                    text_rect = text.get_rect(center=entity_circle.center)
-                    self.window.blit(text, text_rect)
-
-                if isinstance(element, HerbivoreFood):
-                    pygame.draw.circle(self.window, GREEN, (cell_center.x, cell_center.y), radius)
-
-                if isinstance(element, Predator):
-                    entity_circle = pygame.draw.circle(self.window, RED, (cell_center.x, cell_center.y), radius)
-                    text = self.small_font.render(str(element.health), True, BLACK)
-                    text_rect = text.get_rect(center=entity_circle.center)
-                    self.window.blit(text, text_rect)
-
-                if element is None:
-                    pygame.draw.circle(self.window, BLACK, (cell_center.x, cell_center.y), radius)
+        cell_types: np.ndarray = self.env.cell_types if matrix is self.env.matrix else cell_types_of(matrix)
+        health: Dict[Tuple[int, int], int] = {
+            (coordinates.y, coordinates.x): entity.health
+            for entity, coordinates in self.env.alive_entities_coords.items()
+        }
+        self._render_cells(cell_types, health)
+
+    def _render_cells(self, cell_types: np.ndarray, health: Dict[Tuple[int, int], int]):
+        """ Draw only occupied cells, walks cell type codes instead of checking every object """
+
+        radius: int = self.cell_width // 2
+
+        for y, x in np.argwhere(cell_types != CellType.EMPTY):
+            cell_center = Coordinates(
+                y * self.cell_height + self.cell_height // 2,
+                x * self.cell_width + self.cell_width // 2,
+            )
+            cell_type = cell_types[y, x]
+            color = CELL_COLORS.get(cell_type)
+            if color is None:
+                continue
+
+            circle = pygame.draw.circle(self.window, color, (cell_center.x, cell_center.y), radius)
+            if cell_type in (CellType.HERBIVORE, CellType.PREDATOR):
+                text = self.small_font.render(str(health.get((y, x), '')), True, BLACK)
+                text_rect = text.get_rect(center=circle.center)
+                self.window.blit(text, text_rect)
 
     def _check_keyboard_events(self):
         for event in pygame.event.get():